@@ -0,0 +1,48 @@
+"""add keyset pagination indexes
+
+Revision ID: b7d4e2a9c1f3
+Revises: ef94bb1f717c
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d4e2a9c1f3'
+down_revision: Union[str, Sequence[str], None] = 'ef94bb1f717c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Índices compostos para a paginação por cursor: cada página vira uma
+    # varredura de intervalo em (user_id, created_at DESC, id DESC)
+    op.create_index(
+        'ix_ingredients_user_id_created_at_id',
+        'ingredients',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False
+    )
+    op.create_index(
+        'ix_recipes_user_id_created_at_id',
+        'recipes',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False
+    )
+
+    # Os índices simples em user_id ficam redundantes (prefixo dos compostos)
+    op.drop_index(op.f('ix_ingredients_user_id'), table_name='ingredients')
+    op.drop_index(op.f('ix_recipes_user_id'), table_name='recipes')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_recipes_user_id'), 'recipes', ['user_id'], unique=False)
+    op.create_index(op.f('ix_ingredients_user_id'), 'ingredients', ['user_id'], unique=False)
+    op.drop_index('ix_recipes_user_id_created_at_id', table_name='recipes')
+    op.drop_index('ix_ingredients_user_id_created_at_id', table_name='ingredients')
@@ -0,0 +1,89 @@
+"""add recipe steps jsonb
+
+Revision ID: c3f8a1d5e7b2
+Revises: b7d4e2a9c1f3
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import List, Sequence, Union
+import json
+
+from alembic import op
+from pydantic import BaseModel, TypeAdapter, ValidationError
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f8a1d5e7b2'
+down_revision: Union[str, Sequence[str], None] = 'b7d4e2a9c1f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Receitas convertidas por comando (cada lote é confirmado separadamente)
+BATCH_SIZE = 5000
+
+
+class _Step(BaseModel):
+    """Cópia de RecipeStep (src/api/schemas/recipe_schema.py) na data desta migração"""
+
+    numero: int
+    descricao: str
+
+
+_STEPS = TypeAdapter(List[_Step])
+
+
+def _parse_steps(instructions):
+    """
+    Converte a string JSON de instructions em passos, com a mesma validação
+    de RecipeCreate. Retorna None se o conteúdo não for uma lista de passos válida.
+    """
+    if not isinstance(instructions, str):
+        return None
+    try:
+        return [step.model_dump() for step in _STEPS.validate_json(instructions)]
+    except ValidationError:
+        return None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('recipes', sa.Column('steps', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+    # Conversão em lotes, fora da transação da migração: cada lote é
+    # confirmado ao terminar, sem bloquear a tabela inteira de uma só vez.
+    # Receitas com instructions inválido ficam com steps nulo.
+    connection = op.get_bind()
+    select_batch = sa.text(
+        "SELECT id, instructions FROM recipes "
+        "WHERE steps IS NULL AND id > CAST(:last_id AS uuid) ORDER BY id LIMIT :batch_size"
+    )
+    update_batch = sa.text(
+        "UPDATE recipes AS r SET steps = CAST(v.steps AS jsonb) "
+        "FROM unnest(CAST(:ids AS uuid[]), CAST(:steps AS text[])) AS v(id, steps) "
+        "WHERE r.id = v.id"
+    )
+    with op.get_context().autocommit_block():
+        last_id = '00000000-0000-0000-0000-000000000000'
+        while True:
+            rows = connection.execute(
+                select_batch, {'last_id': last_id, 'batch_size': BATCH_SIZE}
+            ).all()
+            if not rows:
+                break
+            last_id = str(rows[-1].id)
+
+            ids, steps = [], []
+            for row in rows:
+                parsed = _parse_steps(row.instructions)
+                if parsed is not None:
+                    ids.append(str(row.id))
+                    steps.append(json.dumps(parsed, ensure_ascii=False))
+            if ids:
+                connection.execute(update_batch, {'ids': ids, 'steps': steps})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('recipes', 'steps')
@@ -0,0 +1,82 @@
+"""add full-text and trigram search indexes
+
+Revision ID: d9e4b6c2a8f1
+Revises: c3f8a1d5e7b2
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9e4b6c2a8f1'
+down_revision: Union[str, Sequence[str], None] = 'c3f8a1d5e7b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nome do índice, tabela, expressão indexada)
+SEARCH_INDEXES = [
+    ('ix_recipes_search_vector', 'recipes', 'f_search_vector(name, steps)'),
+    ('ix_recipes_name_trgm', 'recipes', 'f_unaccent(lower(name)) gin_trgm_ops'),
+    ('ix_recipe_ingredients_search_vector', 'recipe_ingredients', 'f_search_vector(name)'),
+    ('ix_recipe_ingredients_name_trgm', 'recipe_ingredients', 'f_unaccent(lower(name)) gin_trgm_ops'),
+    ('ix_ingredients_search_vector', 'ingredients', 'f_search_vector(name)'),
+    ('ix_ingredients_name_trgm', 'ingredients', 'f_unaccent(lower(name)) gin_trgm_ops'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # unaccent() é STABLE e não pode ser usado em índices: a versão IMMUTABLE
+    # fixa o dicionário, qualificado com o schema da extensão (no Supabase, "extensions")
+    connection = op.get_bind()
+    unaccent_schema = connection.execute(sa.text(
+        "SELECT extnamespace::regnamespace::text FROM pg_extension WHERE extname = 'unaccent'"
+    )).scalar()
+    # Objetos referenciados com schema: índices são mantidos com search_path restrito
+    schema = connection.execute(sa.text("SELECT current_schema()")).scalar()
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT {unaccent_schema}.unaccent('{unaccent_schema}.unaccent'::regdictionary, $1) $$
+    """)
+
+    # Configuração em português que ignora acentos ("feijão" encontra "feijao")
+    op.execute("CREATE TEXT SEARCH CONFIGURATION portuguese_unaccent (COPY = portuguese)")
+    op.execute(f"""
+        ALTER TEXT SEARCH CONFIGURATION portuguese_unaccent
+        ALTER MAPPING FOR hword, hword_part, word WITH {unaccent_schema}.unaccent, portuguese_stem
+    """)
+
+    # Documento de busca: nome com peso A e textos dos passos (JSONB) com peso C
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION f_search_vector(name text, steps jsonb DEFAULT NULL) RETURNS tsvector
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE
+        AS $$
+            SELECT setweight(to_tsvector('{schema}.portuguese_unaccent'::regconfig, coalesce(name, '')), 'A')
+                || setweight(jsonb_to_tsvector('{schema}.portuguese_unaccent'::regconfig, coalesce(steps, '[]'::jsonb), '["string"]'), 'C')
+        $$
+    """)
+
+    # Índices criados sem bloquear escritas nas tabelas (fora da transação)
+    with op.get_context().autocommit_block():
+        for index_name, table_name, expression in SEARCH_INDEXES:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} "
+                f"ON {table_name} USING gin ({expression})"
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for index_name, _, _ in reversed(SEARCH_INDEXES):
+        op.execute(f"DROP INDEX IF EXISTS {index_name}")
+    op.execute("DROP FUNCTION IF EXISTS f_search_vector(text, jsonb)")
+    op.execute("DROP TEXT SEARCH CONFIGURATION IF EXISTS portuguese_unaccent")
+    op.execute("DROP FUNCTION IF EXISTS f_unaccent(text)")
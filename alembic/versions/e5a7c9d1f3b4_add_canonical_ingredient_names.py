@@ -0,0 +1,236 @@
+"""add canonical ingredient names
+
+Revision ID: e5a7c9d1f3b4
+Revises: d9e4b6c2a8f1
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Dict, List, Sequence, Union
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a7c9d1f3b4'
+down_revision: Union[str, Sequence[str], None] = 'd9e4b6c2a8f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Linhas preenchidas por comando (cada lote é confirmado separadamente)
+BATCH_SIZE = 5000
+
+# (tabela, tamanho da coluna, igual ao de name)
+TABLES = [
+    ('ingredients', 100),
+    ('recipe_ingredients', 255),
+]
+
+
+# Cópia congelada da normalização de src/core/normalization.py no momento desta
+# migração: ela não importa o código da aplicação, para que mudanças futuras nas
+# regras de normalização não alterem o que ela grava.
+
+# Nome canônico -> variações conhecidas (já normalizadas ou não: são
+# normalizadas ao montar o mapa). O próprio nome canônico não precisa ser listado.
+CANONICAL_INGREDIENTS: Dict[str, List[str]] = {
+    "abobrinha": ["abobrinha italiana", "abobrinha verde"],
+    "acucar": ["acucar refinado", "acucar cristal"],
+    "alho": ["dente de alho", "alho comum"],
+    "arroz": ["arroz branco", "arroz agulhinha", "arroz tipo 1"],
+    "azeite": ["azeite de oliva", "azeite extra virgem", "azeite de oliva extra virgem"],
+    "batata": ["batata inglesa", "batata comum"],
+    "brocolis": ["brocolis ninja", "brocolos", "brocoli"],
+    "carne moida": ["carne bovina moida", "patinho moido"],
+    "cebola": ["cebola branca", "cebola comum", "cebola amarela"],
+    "cebola roxa": ["cebola vermelha"],
+    "cheiro verde": ["cheiro-verde", "salsinha e cebolinha"],
+    "coentro": ["folhas de coentro"],
+    "creme de leite": ["creme de leite fresco", "creme de leite de caixinha"],
+    "farinha de trigo": ["farinha", "farinha de trigo branca"],
+    "feijao": ["feijao carioca", "feijao carioquinha"],
+    "frango": ["peito de frango", "file de frango", "carne de frango", "sobrecoxa de frango"],
+    "leite": ["leite integral", "leite de vaca", "leite desnatado", "leite semidesnatado"],
+    "limao": ["limao taiti", "limao tahiti"],
+    "manteiga": ["manteiga sem sal", "manteiga com sal"],
+    "oleo": ["oleo de soja", "oleo vegetal", "oleo de girassol", "oleo de canola"],
+    "ovo": ["ovo de galinha", "ovo caipira", "ovo branco", "ovo vermelho"],
+    "pimenta do reino": ["pimenta-do-reino", "pimenta preta", "pimenta do reino moida"],
+    "pimentao": ["pimentao verde"],
+    "queijo mussarela": ["mussarela", "muçarela", "mozarela", "mozzarella", "queijo mozzarella"],
+    "queijo parmesao": ["parmesao", "parmesao ralado"],
+    "sal": ["sal refinado", "sal de cozinha"],
+    "tomate": ["tomate italiano", "tomate caqui", "tomate debora", "tomate maduro"],
+    "tomate cereja": ["tomatinho", "tomate-cereja"],
+}
+
+# Qualificadores de preparo ou tamanho que não mudam o ingrediente
+# ("tomate picado" -> "tomate"); removidos apenas do final do nome
+DESCRIPTORS = {
+    "a gosto", "picado", "picada", "ralado", "ralada", "fatiado", "fatiada",
+    "fresco", "fresca", "maduro", "madura", "grande", "pequeno", "pequena",
+    "medio", "media", "moido", "moida", "cozido", "cozida", "em cubo",
+    "em rodela", "sem pele", "sem semente", "descascado", "descascada",
+    "amassado", "amassada", "triturado", "triturada", "opcional",
+}
+_MAX_DESCRIPTOR_WORDS = max(len(descriptor.split()) for descriptor in DESCRIPTORS)
+
+# Palavras terminadas em "s" também no singular (inclusive as em "ês" e "ís", que
+# perdem o acento); sem elas, "tênis" viraria "teni" e "cogumelo paris", "cogumelo pari"
+_INVARIABLE_WORDS = {
+    "brocolis", "ananas", "lapis", "gas", "pires", "mais", "menos", "onibus", "virus",
+    "frances", "ingles", "portugues", "japones", "chines", "holandes", "mes",
+    "tenis", "paris", "anis", "pais", "cais", "bis", "xis", "jus", "atlas", "oasis", "lilas",
+}
+
+# Singulares terminados em vogal + "re", "se" ou "ze", cujo plural é só + "s"
+# ("maioneses" -> "maionese"); as regras de "res", "ses" e "zes" os confundiriam
+# com os singulares terminados em "r", "s" ou "z" ("flores" -> "flor")
+_PLAIN_PLURAL_WORDS = {"maionese", "pure", "rose", "base", "classe", "frase", "fase", "crise", "tese"}
+
+# Terminações de plural, da mais específica para a mais genérica
+_PLURAL_SUFFIXES = [
+    ("oes", "ao"),  # limões, pimentões
+    ("aes", "ao"),  # pães
+    ("ais", "al"),  # animais
+    ("eis", "el"),  # pastéis
+    ("ois", "ol"),  # lençóis
+    ("uis", "ul"),  # azuis
+    ("ns", "m"),    # atuns, jardins
+    ("res", "r"),   # açúcares, flores
+    ("zes", "z"),   # nozes
+    ("ses", "s"),   # gases
+    ("s", ""),      # ovos, tomates
+]
+
+# Terminações aplicadas só depois de vogal: após consoante, o singular termina
+# em "e" e o plural é só + "s" ("espinafres" -> "espinafre", "mousses" -> "mousse")
+_AFTER_VOWEL_SUFFIXES = {"res", "zes", "ses"}
+_VOWELS = set("aeiou")
+
+_SEPARATORS = re.compile(r"[\s\-_/]+")
+
+
+def fold_text(text: str) -> str:
+    """Minúsculas, sem acentos e com espaços normalizados"""
+    folded = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii")
+    return " ".join(folded.lower().split())
+
+
+def singularize(word: str) -> str:
+    """
+    Singular de uma palavra em português já sem acentos (regras de plural regulares).
+    Palavras de uma ou duas letras ("os", "as") ficam como estão; as de três também
+    são plurais ("pés" -> "pe", "pás" -> "pa").
+    """
+    if len(word) < 3 or word in _INVARIABLE_WORDS or not word.endswith("s"):
+        return word
+    if word[:-1] in _PLAIN_PLURAL_WORDS:
+        return word[:-1]
+    for suffix, replacement in _PLURAL_SUFFIXES:
+        if not word.endswith(suffix) or len(word) <= len(suffix):
+            continue
+        if suffix in _AFTER_VOWEL_SUFFIXES and word[-len(suffix) - 1] not in _VOWELS:
+            continue
+        return word[:-len(suffix)] + replacement
+    return word
+
+
+def normalize_ingredient_name(name: str) -> str:
+    """
+    Nome do ingrediente em forma normalizada: minúsculas, sem acentos,
+    hífens e espaços unificados e cada palavra no singular
+    ("Tomates  Maduros" -> "tomate maduro")
+    """
+    words = _SEPARATORS.split(fold_text(name))
+    return " ".join(singularize(word) for word in words if word)
+
+
+def _strip_descriptors(normalized: str) -> str:
+    """Remove qualificadores do final do nome, mantendo ao menos uma palavra"""
+    words = normalized.split()
+    stripped = True
+    while stripped and len(words) > 1:
+        stripped = False
+        for size in range(min(_MAX_DESCRIPTOR_WORDS, len(words) - 1), 0, -1):
+            if " ".join(words[-size:]) in DESCRIPTORS:
+                del words[-size:]
+                stripped = True
+                break
+    return " ".join(words)
+
+
+def _build_canonical_map() -> Dict[str, str]:
+    """Mapa (hash) de cada variação normalizada para o nome canônico"""
+    canonical_map = {}
+    for canonical, variants in CANONICAL_INGREDIENTS.items():
+        canonical_key = normalize_ingredient_name(canonical)
+        canonical_map[canonical_key] = canonical_key
+        for variant in variants:
+            canonical_map[normalize_ingredient_name(variant)] = canonical_key
+    return canonical_map
+
+
+_CANONICAL_MAP = _build_canonical_map()
+
+
+def canonical_ingredient_name(name: str) -> str:
+    """
+    Nome canônico do ingrediente, usado para comparar ingredientes entre si
+    (despensa, receitas salvas e cache): o nome normalizado, sem qualificadores
+    finais, substituído pelo canônico do dicionário quando conhecido
+    ("Tomates italianos picados" -> "tomate").
+    """
+    normalized = normalize_ingredient_name(name)
+    if normalized in _CANONICAL_MAP:
+        return _CANONICAL_MAP[normalized]
+
+    stripped = _strip_descriptors(normalized)
+    return _CANONICAL_MAP.get(stripped, stripped)
+
+
+def _backfill(connection, table_name: str) -> None:
+    """Preenche canonical_name das linhas existentes, em lotes percorridos por id"""
+    select_batch = sa.text(
+        f"SELECT id, name FROM {table_name} "
+        "WHERE id > CAST(:last_id AS uuid) ORDER BY id LIMIT :batch_size"
+    )
+    update_batch = sa.text(
+        f"UPDATE {table_name} AS t SET canonical_name = v.canonical_name "
+        "FROM unnest(CAST(:ids AS uuid[]), CAST(:names AS text[])) AS v(id, canonical_name) "
+        "WHERE t.id = v.id"
+    )
+    last_id = '00000000-0000-0000-0000-000000000000'
+    while True:
+        rows = connection.execute(
+            select_batch, {'last_id': last_id, 'batch_size': BATCH_SIZE}
+        ).all()
+        if not rows:
+            break
+        last_id = str(rows[-1].id)
+        connection.execute(update_batch, {
+            'ids': [str(row.id) for row in rows],
+            'names': [canonical_ingredient_name(row.name) for row in rows],
+        })
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table_name, length in TABLES:
+        op.add_column(table_name, sa.Column('canonical_name', sa.String(length=length), nullable=True))
+
+    # Preenchimento em lotes, fora da transação da migração: cada lote é
+    # confirmado ao terminar, sem bloquear as tabelas inteiras de uma só vez.
+    # Linhas ainda sem nome canônico têm o nome calculado pela aplicação ao serem lidas.
+    connection = op.get_bind()
+    with op.get_context().autocommit_block():
+        for table_name, _ in TABLES:
+            _backfill(connection, table_name)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table_name, _ in reversed(TABLES):
+        op.drop_column(table_name, 'canonical_name')
@@ -1,20 +1,42 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from typing import Tuple, Union
 from uuid import UUID
 
+from src.core.cache import TTLCache
+from src.core.config import settings
 from src.core.security import verify_token
-from src.database.connection import get_db
-from src.repositories.user_repository import UserRepository
+from src.database.connection import get_session
+from src.models.user import User
+from src.repositories.user_repository import get_user_repository
 from src.services.user_service import UserService
+from src.api.schemas.user_schema import UserResponse
 
 security = HTTPBearer()
 
+# Usuários autenticados recentemente, por (id do usuário, iat do token).
+# Evita uma consulta ao banco a cada requisição autenticada.
+user_cache = TTLCache(max_entries=settings.AUTH_USER_CACHE_SIZE, ttl=settings.AUTH_USER_CACHE_TTL)
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-):
+
+def invalidate_user_cache(user_id: UUID) -> None:
+    """Remove do cache todas as entradas de um usuário (em qualquer token)"""
+    user_cache.delete_where(lambda key: key[0] == user_id)
+
+
+# Só cobre alterações de objetos User feitas pelo ORM neste processo: update()/delete()
+# em lote não disparam esses eventos e devem chamar invalidate_user_cache (ver AUTH_USER_CACHE_TTL)
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target):
+    invalidate_user_cache(target.id)
+
+
+def _decode_token(credentials: HTTPAuthorizationCredentials) -> Tuple[UUID, dict]:
+    """Valida o token e retorna o ID do usuário e o payload"""
     token = credentials.credentials
     payload = verify_token(token)
     
@@ -39,9 +61,47 @@ def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid user ID format"
         )
+
+    return user_id, payload
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Union[Session, AsyncSession] = Depends(get_session)
+) -> UserResponse:
+    user_id, payload = _decode_token(credentials)
+
+    cache_key = (user_id, payload.get("iat"))
+    user = user_cache.get(cache_key)
+    if user is not None:
+        return user
     
-    user_repository = UserRepository(db)
+    user_repository = get_user_repository(db)
     user_service = UserService(user_repository)
-    user = user_service.get_user_by_id(user_id)
-    
+    user = UserResponse.model_validate(await user_service.get_user_by_id(user_id))
+
+    user_cache.set(cache_key, user)
     return user
+
+
+async def get_current_user_readonly(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Union[Session, AsyncSession] = Depends(get_session)
+) -> UserResponse:
+    """
+    Variante de get_current_user para endpoints somente leitura.
+    Com AUTH_TRUST_JWT_CLAIMS habilitado, o usuário é montado a partir dos
+    dados assinados do token, sem consultar banco nem cache.
+    """
+    if settings.AUTH_TRUST_JWT_CLAIMS:
+        user_id, payload = _decode_token(credentials)
+        claims = ("username", "email", "full_name")
+        if all(payload.get(claim) for claim in claims):
+            return UserResponse(
+                id=user_id,
+                username=payload["username"],
+                email=payload["email"],
+                full_name=payload["full_name"]
+            )
+
+    return await get_current_user(credentials, db)
@@ -0,0 +1,120 @@
+from contextlib import aclosing
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from src.api.middlewares.auth import get_current_user
+from src.models.user import User
+from src.services.admission_service import (
+    RateLimitExceeded,
+    ServiceOverloaded,
+    admission_service,
+    retry_after_header
+)
+from src.services.ai_service import ai_service
+from src.services.recipe_cache_service import build_cache_key, recipe_cache_service
+from src.api.schemas.recipe_schema import GenerateRecipeRequest
+import json
+
+router = APIRouter(prefix="/recipes", tags=["recipes"])
+
+
+@router.post("/generate/stream")
+async def generate_recipe_stream(
+    request: GenerateRecipeRequest,
+    http_request: Request,
+    tokens: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Gera 5 receitas usando IA e envia cada uma assim que fica pronta,
+    sem esperar pelas demais.
+
+    - Por padrão, cada evento é uma linha JSON (NDJSON, `application/x-ndjson`)
+    - Com `Accept: text/event-stream`, os eventos são enviados como Server-Sent Events
+    - **tokens**: se true, envia também os trechos de texto da receita em andamento
+    - **estrategia** (no corpo): "paralela" ou "lote"; no lote, as receitas chegam
+      uma a uma à medida que a resposta única da IA é recebida
+
+    Tipos de evento: `token`, `receita`, `erro` e `fim`.
+    Listas de ingredientes equivalentes já geradas são respondidas pelo cache.
+    Se o cliente desconectar, as chamadas pendentes à IA são canceladas.
+
+    Com o limite de gerações do usuário excedido, responde 429; sem vaga para
+    gerar, 503 (ambos com `Retry-After`), antes de iniciar o stream.
+    """
+    if not ai_service.configured:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Nenhum provedor de IA configurado"
+        )
+    user_id = str(current_user.id)
+    try:
+        admission_service.check_user(user_id)
+    except RateLimitExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers=retry_after_header(e.retry_after)
+        )
+    cache_key = build_cache_key(request.listaIngredientes, 5)
+    priority = admission_service.priority(user_id, cache_key)
+
+    cached = recipe_cache_service.get(request.listaIngredientes, 5)
+    slot = None
+    if cached is not None:
+        admission_service.mark_generated(user_id, cache_key)
+        # Respondida pelo cache: o limite do usuário não é consumido
+        admission_service.refund_user(user_id)
+    else:
+        try:
+            slot = await admission_service.acquire(priority)
+        except ServiceOverloaded as e:
+            admission_service.refund_user(user_id)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=str(e),
+                headers=retry_after_header(e.retry_after)
+            )
+
+    use_sse = "text/event-stream" in http_request.headers.get("accept", "")
+
+    def format_event(event: dict) -> str:
+        payload = json.dumps(jsonable_encoder(event), ensure_ascii=False)
+        if use_sse:
+            return f"event: {event['tipo']}\ndata: {payload}\n\n"
+        return payload + "\n"
+
+    async def event_stream():
+        if cached is not None:
+            for index, recipe in enumerate(cached):
+                yield format_event({"tipo": "receita", "indice": index, "receita": recipe})
+            yield format_event({"tipo": "fim", "total": len(cached), "parcial": False})
+            return
+
+        recipes = []
+        try:
+            async with aclosing(ai_service.stream_recipes(
+                ingredients=request.listaIngredientes,
+                count=5,
+                include_tokens=tokens,
+                strategy=request.estrategia
+            )) as events:
+                async for event in events:
+                    if event["tipo"] == "receita":
+                        recipes.append(event["receita"])
+                    yield format_event(event)
+        finally:
+            slot.release()
+
+        recipe_cache_service.set(request.listaIngredientes, 5, recipes)
+        if recipes:
+            admission_service.mark_generated(user_id, cache_key)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream" if use_sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Devolve a vaga mesmo se o stream não chegar a ser iniciado (release é idempotente)
+        background=BackgroundTask(slot.release) if slot is not None else None
+    )
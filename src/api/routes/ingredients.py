@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 from uuid import UUID
 
-from src.database.connection import get_db
-from src.api.middlewares.auth import get_current_user
+from src.core.pagination import NEXT_CURSOR_HEADER
+from src.database.connection import get_session
+from src.api.middlewares.auth import get_current_user, get_current_user_readonly
 from src.api.schemas.ingredient_schema import (
     IngredientCreate,
     IngredientUpdate,
@@ -12,6 +14,7 @@ from src.api.schemas.ingredient_schema import (
 )
 from src.api.schemas.user_schema import UserResponse
 from src.services.ingredient_service import IngredientService
+from src.services.storage_service import StorageService, get_storage_service
 
 router = APIRouter(
     prefix="/ingredients",
@@ -26,7 +29,8 @@ async def create_ingredient(
     unit: str = Form(...),
     image: Optional[UploadFile] = File(None),
     current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Union[Session, AsyncSession] = Depends(get_session),
+    storage_service: StorageService = Depends(get_storage_service)
 ):
     """
     Cria um novo ingrediente para o usuário autenticado
@@ -34,7 +38,8 @@ async def create_ingredient(
     - **name**: Nome do ingrediente (obrigatório)
     - **quantity**: Quantidade (obrigatório)
     - **unit**: Unidade de medida (obrigatório)
-    - **image**: Arquivo de imagem (opcional) - JPEG, PNG ou WebP, máximo 5MB
+    - **image**: Arquivo de imagem (opcional) - JPEG, PNG, WebP ou HEIC, máximo 5MB.
+      É convertida para WebP, sem metadados EXIF, e gera miniaturas (campo `thumbnails`)
     """
     ingredient_data = IngredientCreate(
         name=name,
@@ -42,27 +47,64 @@ async def create_ingredient(
         unit=unit
     )
     
-    service = IngredientService(db)
+    service = IngredientService(db, storage_service)
     return await service.create_ingredient(ingredient_data, current_user.id, image)
 
 
 @router.get("/", response_model=List[IngredientResponse])
-def list_ingredients(
-    current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def list_ingredients(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, description="Itens por página"),
+    cursor: Optional[str] = Query(None, description="Cursor retornado em X-Next-Cursor"),
+    current_user: UserResponse = Depends(get_current_user_readonly),
+    db: Union[Session, AsyncSession] = Depends(get_session),
+    storage_service: StorageService = Depends(get_storage_service)
 ):
     """
-    Lista todos os ingredientes do usuário autenticado
+    Lista os ingredientes do usuário autenticado, dos mais recentes aos mais antigos, paginados por cursor
+    
+    - **limit**: Itens por página (padrão e máximo definidos em PAGE_SIZE_DEFAULT/PAGE_SIZE_MAX)
+    - **cursor**: Cursor da página seguinte, recebido no cabeçalho `X-Next-Cursor`
+      (ausente na última página)
     """
-    service = IngredientService(db)
-    return service.list_user_ingredients(current_user.id)
+    service = IngredientService(db, storage_service)
+    ingredients, next_cursor = await service.list_user_ingredients(current_user.id, limit, cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return ingredients
+
+
+@router.get("/search", response_model=List[IngredientResponse])
+async def search_ingredients(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="Termos da busca"),
+    limit: Optional[int] = Query(None, ge=1, description="Itens por página"),
+    cursor: Optional[str] = Query(None, description="Cursor retornado em X-Next-Cursor"),
+    current_user: UserResponse = Depends(get_current_user_readonly),
+    db: Union[Session, AsyncSession] = Depends(get_session),
+    storage_service: StorageService = Depends(get_storage_service)
+):
+    """
+    Busca ingredientes do usuário autenticado pelo nome, dos mais relevantes aos menos relevantes.
+    Ignora acentos e tolera erros de digitação
+    
+    - **q**: Termos da busca
+    - **limit**: Itens por página (padrão e máximo definidos em PAGE_SIZE_DEFAULT/PAGE_SIZE_MAX)
+    - **cursor**: Cursor da página seguinte, recebido no cabeçalho `X-Next-Cursor`
+    """
+    service = IngredientService(db, storage_service)
+    ingredients, next_cursor = await service.search_user_ingredients(current_user.id, q, limit, cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return ingredients
 
 
 @router.get("/{ingredient_id}", response_model=IngredientResponse)
-def get_ingredient(
+async def get_ingredient(
     ingredient_id: str,
-    current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserResponse = Depends(get_current_user_readonly),
+    db: Union[Session, AsyncSession] = Depends(get_session),
+    storage_service: StorageService = Depends(get_storage_service)
 ):
     """
     Busca um ingrediente específico por ID
@@ -70,8 +112,8 @@ def get_ingredient(
     - **ingredient_id**: ID do ingrediente
     """
     try:
-        service = IngredientService(db)
-        return service.get_ingredient(UUID(ingredient_id), current_user.id)
+        service = IngredientService(db, storage_service)
+        return await service.get_ingredient(UUID(ingredient_id), current_user.id)
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -87,7 +129,8 @@ async def update_ingredient(
     unit: Optional[str] = Form(None),
     image: Optional[UploadFile] = File(None),
     current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Union[Session, AsyncSession] = Depends(get_session),
+    storage_service: StorageService = Depends(get_storage_service)
 ):
     """
     Atualiza um ingrediente existente
@@ -110,7 +153,7 @@ async def update_ingredient(
         
         ingredient_data = IngredientUpdate(**update_data)
         
-        service = IngredientService(db)
+        service = IngredientService(db, storage_service)
         return await service.update_ingredient(
             UUID(ingredient_id), 
             current_user.id, 
@@ -128,7 +171,8 @@ async def update_ingredient(
 async def delete_ingredient(
     ingredient_id: str,
     current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Union[Session, AsyncSession] = Depends(get_session),
+    storage_service: StorageService = Depends(get_storage_service)
 ):
     """
     Remove um ingrediente e sua imagem associada
@@ -136,7 +180,7 @@ async def delete_ingredient(
     - **ingredient_id**: ID do ingrediente
     """
     try:
-        service = IngredientService(db)
+        service = IngredientService(db, storage_service)
         return await service.delete_ingredient(UUID(ingredient_id), current_user.id)
     except ValueError:
         raise HTTPException(
@@ -1,45 +1,143 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from src.database.connection import get_db
-from src.api.middlewares.auth import get_current_user
+from src.database.connection import get_session
+from src.api.middlewares.auth import get_current_user, get_current_user_readonly
 from src.models.user import User
+from src.services.admission_service import (
+    RateLimitExceeded,
+    ServiceOverloaded,
+    admission_service,
+    retry_after_header
+)
 from src.services.ai_service import ai_service
+from src.services.recipe_cache_service import build_cache_key, recipe_cache_service
 from src.services.recipe_service import RecipeService
 from src.api.schemas.recipe_schema import (
     GenerateRecipeRequest,
     GenerateRecipeResponse,
     GeneratedRecipe,
     RecipeCreate,
+    RecipeBatchCreate,
     RecipeResponse,
     RecipeListResponse,
+    RecipeSearchResult,
+    CookableRecipe,
     RecipeIngredientCreate
 )
-from typing import List
+from src.core.pagination import NEXT_CURSOR_HEADER
+from typing import Any, Awaitable, List, Optional, Union
+import asyncio
 import json
 
 router = APIRouter(prefix="/recipes", tags=["recipes"])
 
+# Código de status usado quando o cliente encerra a conexão antes da resposta
+CLIENT_CLOSED_REQUEST = 499
+
+
+async def run_until_disconnected(request: Request, awaitable: Awaitable[Any], poll_interval: float = 0.5) -> Any:
+    """
+    Executa uma operação longa, cancelando-a se o cliente desconectar.
+    Evita que chamadas à LLM continuem consumindo recursos sem ninguém esperando a resposta.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                raise HTTPException(
+                    status_code=CLIENT_CLOSED_REQUEST,
+                    detail="Cliente desconectado"
+                )
+    finally:
+        if not task.done():
+            task.cancel()
+
 
 @router.post("/generate", response_model=GenerateRecipeResponse)
 async def generate_recipe(
     request: GenerateRecipeRequest,
+    http_request: Request,
     current_user: User = Depends(get_current_user)
 ):
     """
     Gera 5 receitas diferentes usando IA com base nos ingredientes fornecidos.
-    Cada receita é gerada em uma requisição separada, com restrições incrementais
-    para garantir variedade (não repetir receitas já geradas).
+    As receitas são geradas em requisições paralelas, cada uma com um estilo
+    culinário distinto; nomes repetidos são gerados novamente para garantir variedade.
+    Listas de ingredientes equivalentes já geradas são respondidas pelo cache.
+
+    - **estrategia**: "paralela" (uma chamada à IA por receita) ou "lote"
+      (as 5 receitas em uma única chamada, com menos tokens)
+
+    Falhas da IA são tentadas novamente dentro de um orçamento de tempo; se ele
+    se esgotar antes das 5 receitas, a resposta vem com `parcial: true`.
+
+    Cada usuário tem um limite de gerações por minuto (429 ao excedê-lo) e as
+    gerações que chegam à IA disputam vagas limitadas (503 se esgotadas);
+    ambas as respostas trazem `Retry-After`.
     """
+    if not ai_service.configured:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Nenhum provedor de IA configurado"
+        )
+    user_id = str(current_user.id)
+    try:
+        admission_service.check_user(user_id)
+    except RateLimitExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers=retry_after_header(e.retry_after)
+        )
+    cache_key = build_cache_key(request.listaIngredientes, 5)
+    priority = admission_service.priority(user_id, cache_key)
+
+    reached_llm = False
+
+    async def generate() -> List[GeneratedRecipe]:
+        nonlocal reached_llm
+        # Só as gerações que chegam à IA (sem cache) ocupam uma vaga
+        async with admission_service.slot(priority):
+            reached_llm = True
+            return await ai_service.generate_multiple_recipes(
+                ingredients=request.listaIngredientes,
+                count=5,
+                strategy=request.estrategia
+            )
+
     try:
-        # Chama o serviço de IA para gerar 5 receitas
-        generated_recipes = await ai_service.generate_multiple_recipes(
-            ingredients=request.listaIngredientes,
-            count=5
+        # Busca no cache ou chama o serviço de IA para gerar 5 receitas
+        # (cancelado automaticamente se o cliente desconectar)
+        generated_recipes = await run_until_disconnected(
+            http_request,
+            recipe_cache_service.get_or_generate(
+                ingredients=request.listaIngredientes,
+                count=5,
+                generate=generate
+            )
         )
+        # Registrado para cada requisição atendida, inclusive as que aguardaram
+        # a geração de outra (single-flight) ou vieram do cache
+        if generated_recipes:
+            admission_service.mark_generated(user_id, cache_key)
         
         # Retorna no formato esperado pelo frontend
         return GenerateRecipeResponse(
-            listaReceitas=generated_recipes
+            listaReceitas=generated_recipes,
+            parcial=len(generated_recipes) < 5
+        )
+    except HTTPException:
+        raise
+    except ServiceOverloaded as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers=retry_after_header(e.retry_after)
         )
     except ValueError as e:
         raise HTTPException(
@@ -51,13 +149,18 @@ async def generate_recipe(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao gerar receitas: {str(e)}"
         )
+    finally:
+        # Respondida pelo cache, pela geração de outra requisição (single-flight)
+        # ou recusada com 503: o limite do usuário não é consumido
+        if not reached_llm:
+            admission_service.refund_user(user_id)
 
 
 @router.post("/save", response_model=RecipeResponse, status_code=status.HTTP_201_CREATED)
 async def save_recipe(
     recipe_data: RecipeCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Union[Session, AsyncSession] = Depends(get_session)
 ):
     """
     Salva uma receita gerada no banco de dados do usuário.
@@ -70,7 +173,7 @@ async def save_recipe(
         print(f"Ingredients count: {len(recipe_data.ingredients)}")
         
         recipe_service = RecipeService(db)
-        recipe = recipe_service.create_recipe(
+        recipe = await recipe_service.create_recipe(
             user_id=str(current_user.id),
             recipe_data=recipe_data
         )
@@ -87,18 +190,55 @@ async def save_recipe(
         )
 
 
+@router.post("/save/batch", response_model=List[RecipeResponse], status_code=status.HTTP_201_CREATED)
+async def save_recipes_batch(
+    batch: RecipeBatchCreate,
+    current_user: User = Depends(get_current_user),
+    db: Union[Session, AsyncSession] = Depends(get_session)
+):
+    """
+    Salva várias receitas geradas de uma vez, em uma única transação
+    (todas são salvas ou nenhuma é).
+    """
+    try:
+        recipe_service = RecipeService(db)
+        return await recipe_service.create_recipes(
+            user_id=str(current_user.id),
+            recipes_data=batch.recipes
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao salvar receitas: {str(e)}"
+        )
+
+
 @router.get("/", response_model=List[RecipeListResponse])
 async def list_recipes(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, description="Itens por página"),
+    cursor: Optional[str] = Query(None, description="Cursor retornado em X-Next-Cursor"),
+    current_user: User = Depends(get_current_user_readonly),
+    db: Union[Session, AsyncSession] = Depends(get_session)
 ):
     """
-    Lista todas as receitas salvas do usuário.
+    Lista as receitas salvas do usuário, das mais recentes às mais antigas, paginadas por cursor.
+
+    - **limit**: Itens por página (padrão e máximo definidos em PAGE_SIZE_DEFAULT/PAGE_SIZE_MAX)
+    - **cursor**: Cursor da página seguinte, recebido no cabeçalho `X-Next-Cursor`
+      (ausente na última página)
     """
     try:
         recipe_service = RecipeService(db)
-        recipes = recipe_service.list_user_recipes(str(current_user.id))
+        recipes, next_cursor = await recipe_service.list_user_recipes(str(current_user.id), limit, cursor)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
         return recipes
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -106,18 +246,81 @@ async def list_recipes(
         )
 
 
+@router.get("/search", response_model=List[RecipeSearchResult])
+async def search_recipes(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="Termos da busca"),
+    limit: Optional[int] = Query(None, ge=1, description="Itens por página"),
+    cursor: Optional[str] = Query(None, description="Cursor retornado em X-Next-Cursor"),
+    current_user: User = Depends(get_current_user_readonly),
+    db: Union[Session, AsyncSession] = Depends(get_session)
+):
+    """
+    Busca as receitas salvas do usuário pelo nome, passos ou ingredientes,
+    das mais relevantes às menos relevantes, paginadas por cursor.
+    Ignora acentos e tolera erros de digitação.
+
+    - **q**: Termos da busca (aceita "frases entre aspas" e -exclusões)
+    - **limit**: Itens por página (padrão e máximo definidos em PAGE_SIZE_DEFAULT/PAGE_SIZE_MAX)
+    - **cursor**: Cursor da página seguinte, recebido no cabeçalho `X-Next-Cursor`
+    """
+    try:
+        recipe_service = RecipeService(db)
+        recipes, next_cursor = await recipe_service.search_recipes(str(current_user.id), q, limit, cursor)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return recipes
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao buscar receitas: {str(e)}"
+        )
+
+
+@router.get("/cookable", response_model=List[CookableRecipe])
+async def list_cookable_recipes(
+    limit: Optional[int] = Query(None, ge=1, description="Máximo de receitas"),
+    min_coverage: float = Query(0.0, ge=0.0, le=1.0, description="Fração mínima dos ingredientes na despensa"),
+    current_user: User = Depends(get_current_user_readonly),
+    db: Union[Session, AsyncSession] = Depends(get_session)
+):
+    """
+    Lista as receitas salvas que podem ser feitas com os ingredientes da despensa,
+    das que têm mais ingredientes disponíveis às que têm menos, sem chamar a IA.
+    Cada receita informa os ingredientes que faltam e os que estão na despensa
+    em quantidade insuficiente.
+
+    - **limit**: Máximo de receitas (padrão e máximo definidos em PAGE_SIZE_DEFAULT/PAGE_SIZE_MAX)
+    - **min_coverage**: Fração mínima dos ingredientes da receita presentes na despensa
+      (1 lista apenas as receitas que podem ser feitas sem comprar nada)
+    """
+    try:
+        recipe_service = RecipeService(db)
+        return await recipe_service.list_cookable_recipes(str(current_user.id), limit, min_coverage)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao listar receitas possíveis: {str(e)}"
+        )
+
+
 @router.get("/{recipe_id}", response_model=RecipeResponse)
 async def get_recipe(
     recipe_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_readonly),
+    db: Union[Session, AsyncSession] = Depends(get_session)
 ):
     """
     Busca uma receita específica do usuário.
     """
     try:
         recipe_service = RecipeService(db)
-        recipe = recipe_service.get_recipe(recipe_id, str(current_user.id))
+        recipe = await recipe_service.get_recipe(recipe_id, str(current_user.id))
         return recipe
     except ValueError as e:
         raise HTTPException(
@@ -140,14 +343,14 @@ async def get_recipe(
 async def delete_recipe(
     recipe_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Union[Session, AsyncSession] = Depends(get_session)
 ):
     """
     Deleta uma receita do usuário.
     """
     try:
         recipe_service = RecipeService(db)
-        recipe_service.delete_recipe(recipe_id, str(current_user.id))
+        await recipe_service.delete_recipe(recipe_id, str(current_user.id))
         return None
     except ValueError as e:
         raise HTTPException(
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Dict, Optional
 from datetime import datetime
 from uuid import UUID
 
@@ -27,7 +27,14 @@ class IngredientResponse(IngredientBase):
     """Schema de resposta para Ingrediente"""
     id: UUID
     user_id: UUID
+    canonical_name: Optional[str] = Field(None, description="Nome normalizado, usado para comparar ingredientes")
+    amount: Optional[float] = Field(None, description="Quantidade convertida para amount_unit")
+    amount_unit: Optional[str] = Field(None, description="Unidade canônica (g, ml ou un); nula se a quantidade não foi reconhecida")
     image_url: Optional[str] = Field(None, description="URL pública da imagem")
+    thumbnails: Dict[str, str] = Field(
+        default_factory=dict,
+        description="URLs das miniaturas da imagem por tamanho (sm, md)"
+    )
     created_at: datetime
     updated_at: datetime
 
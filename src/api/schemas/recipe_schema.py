@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, model_validator
+from typing import List, Literal, Optional
 from datetime import datetime
+import json
 
 
 # Schema para ingrediente na receita gerada pela IA (em português)
@@ -22,6 +23,9 @@ class RecipeIngredientCreate(RecipeIngredientBase):
 class RecipeIngredientResponse(RecipeIngredientBase):
     id: str
     recipe_id: str
+    canonical_name: Optional[str] = None  # Nome normalizado, usado para comparar ingredientes
+    amount: Optional[float] = None        # Quantidade convertida para amount_unit
+    amount_unit: Optional[str] = None     # "g", "ml" ou "un" (None se a quantidade não foi reconhecida)
     order: int
 
     class Config:
@@ -37,6 +41,8 @@ class RecipeStep(BaseModel):
 # Schema para request de geração de receita
 class GenerateRecipeRequest(BaseModel):
     listaIngredientes: List[dict]  # [{"Ingrediente": "Tomate", "qtd": "2 unidades"}]
+    # "paralela": uma chamada à IA por receita; "lote": todas em uma chamada (padrão: AI_GENERATION_STRATEGY)
+    estrategia: Optional[Literal["paralela", "lote"]] = None
 
 
 # Schema para resposta da IA
@@ -48,14 +54,38 @@ class GeneratedRecipe(BaseModel):
 
 class GenerateRecipeResponse(BaseModel):
     listaReceitas: List[GeneratedRecipe]
+    parcial: bool = False  # Menos receitas que as pedidas (orçamento de tempo esgotado ou falhas da IA)
 
 
 # Schema para criar receita no banco
 class RecipeCreate(BaseModel):
     name: str
-    instructions: str  # JSON string dos passos
+    instructions: Optional[str] = None  # JSON string dos passos (formato legado)
+    steps: Optional[List[RecipeStep]] = None
     ingredients: List[RecipeIngredientCreate]
 
+    @model_validator(mode="after")
+    def validate_steps(self):
+        """
+        Os passos podem vir estruturados (steps) ou como string JSON (instructions);
+        em ambos os casos são validados contra RecipeStep e mantidos nos dois campos.
+        """
+        if self.steps is None:
+            if self.instructions is None:
+                raise ValueError("Informe os passos da receita (steps ou instructions)")
+            try:
+                self.steps = TypeAdapter(List[RecipeStep]).validate_json(self.instructions)
+            except ValidationError:
+                raise ValueError("instructions deve ser uma lista JSON de passos com 'numero' e 'descricao'")
+
+        self.instructions = json.dumps([step.model_dump() for step in self.steps], ensure_ascii=False)
+        return self
+
+
+# Schema para salvar várias receitas de uma vez
+class RecipeBatchCreate(BaseModel):
+    recipes: List[RecipeCreate] = Field(..., min_length=1, max_length=20)
+
 
 # Schema para resposta de receita
 class RecipeResponse(BaseModel):
@@ -63,6 +93,7 @@ class RecipeResponse(BaseModel):
     user_id: str
     name: str
     instructions: str
+    steps: List[RecipeStep] = []
     created_at: datetime
     updated_at: Optional[datetime] = None
     recipe_ingredients: List[RecipeIngredientResponse] = []
@@ -80,3 +111,18 @@ class RecipeListResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+# Schema para resultados da busca de receitas
+class RecipeSearchResult(RecipeListResponse):
+    rank: float  # Relevância em relação à busca (maior é mais relevante)
+
+
+# Schema para receitas que podem ser feitas com a despensa do usuário
+class CookableRecipe(BaseModel):
+    id: str
+    name: str
+    coverage: float  # Fração dos ingredientes da receita presentes na despensa (0 a 1)
+    ingredients_count: int
+    missing_ingredients: List[str] = []
+    insufficient_ingredients: List[str] = []  # Na despensa, mas em quantidade menor que a da receita
@@ -3,13 +3,84 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     SUPABASE_DB_URL: str
+    DB_ASYNC: bool = False  # Usa o engine assíncrono (asyncpg) nas rotas em vez do síncrono (psycopg2)
+    DB_POOL_SIZE: int = 10          # Conexões mantidas abertas no pool (por processo e por engine)
+    DB_MAX_OVERFLOW: int = 10       # Conexões extras permitidas em picos, fechadas ao serem devolvidas
+    DB_POOL_TIMEOUT: float = 10.0   # Espera máxima (segundos) por uma conexão livre
+    DB_POOL_RECYCLE: int = 1800     # Recicla conexões mais antigas que isso (segundos)
+    DB_POOL_PRE_PING: bool = True   # Testa a conexão (SELECT 1) a cada checkout: o pooler do Supabase derruba conexões ociosas
+    DB_NULL_POOL: bool = False            # Sem pool local: abre uma conexão por sessão (ex.: atrás do Supavisor/pgbouncer)
+    DB_TRANSACTION_POOLER: bool = False   # Atrás de pooler em modo transação: desativa prepared statements
     SUPABASE_URL: str
     SUPABASE_KEY: str
     SUPABASE_BUCKET_NAME: str = "ingredients-images"
+    STORAGE_HTTP_MAX_CONNECTIONS: int = 20  # Pool de conexões HTTP com o Supabase Storage
+    STORAGE_HTTP_TIMEOUT: float = 20.0
+    STORAGE_UPLOAD_MAX_BYTES: int = 5 * 1024 * 1024  # Tamanho máximo das imagens enviadas
+    STORAGE_UPLOAD_CHUNK_SIZE: int = 64 * 1024       # Bloco de leitura/envio dos uploads
+    # Processamento de imagens (WebP + miniaturas, requer Pillow). O upload é gravado em um
+    # arquivo temporário e processado em outro processo: no processo da API a memória por upload
+    # continua sendo um bloco (mais as variantes WebP geradas), mas cada worker de imagem
+    # decodifica a imagem inteira, até IMAGE_MAX_PIXELS * 4 bytes (~200 MB com o padrão;
+    # JPEGs são decodificados já reduzidos).
+    IMAGE_PROCESSING_ENABLED: bool = True
+    IMAGE_MAX_DIMENSION: int = 1280        # Lado maior (pixels) da imagem principal
+    IMAGE_MAX_PIXELS: int = 50_000_000     # Imagens maiores são recusadas antes de decodificar (bomba de descompressão)
+    IMAGE_WEBP_QUALITY: int = 80
+    IMAGE_PROCESS_WORKERS: int = 2         # Processos dedicados ao processamento de imagens
+    STORAGE_SIGNED_URLS: bool = False          # Usa URLs assinadas (bucket privado) em vez de públicas
+    STORAGE_SIGNED_URL_EXPIRES_IN: int = 3600  # Validade (segundos) das URLs assinadas
+    STORAGE_SIGNED_URL_CACHE_SIZE: int = 10000
     SECRET_KEY: str
     OPENAI_API_KEY: str = ""  # Opcional: se não usar OpenAI
     GROQ_API_KEY: str = ""    # Opcional: se não usar Groq
     ALGORITHM: str = "HS256"
+    PAGE_SIZE_DEFAULT: int = 50   # Itens por página nas listagens paginadas por cursor
+    PAGE_SIZE_MAX: int = 200
+    # Validade (segundos) do usuário autenticado em cache. O cache é por processo e só é
+    # invalidado por alterações via ORM (session.add/delete) neste processo: update()/delete()
+    # em lote, SQL direto ou outros workers só são vistos depois do TTL (ou de
+    # invalidate_user_cache, em src/api/middlewares/auth.py)
+    AUTH_USER_CACHE_TTL: int = 300
+    AUTH_USER_CACHE_SIZE: int = 10000
+    AUTH_TRUST_JWT_CLAIMS: bool = False     # Endpoints de leitura usam os dados do token, sem consultar o banco
+    AI_PROVIDERS: str = "groq,openai"  # Provedores de LLM em ordem de preferência: groq, openai (API compatível) e fake
+    AI_GROQ_MODEL: str = "llama-3.3-70b-versatile"
+    OPENAI_BASE_URL: str = "https://api.openai.com/v1"  # Qualquer API compatível com a da OpenAI
+    OPENAI_MODEL: str = "gpt-4o-mini"
+    AI_FAKE_LATENCY: float = 0.0       # Latência simulada (segundos) do provedor fake
+    AI_HEDGE_ENABLED: bool = True      # Repete a chamada em outro provedor se a resposta passar do p95
+    AI_HEDGE_DELAY: float = 5.0        # Atraso do hedge (segundos) enquanto não há latências medidas
+    AI_PROVIDER_COOLDOWN: float = 15.0  # Pausa (segundos) de um provedor após 429/5xx, sem Retry-After
+    AI_MAX_CONCURRENCY: int = 5    # Máximo de chamadas simultâneas à LLM por geração
+    AI_DEDUP_MAX_ROUNDS: int = 2   # Rodadas extras para substituir receitas repetidas
+    AI_REQUEST_TIMEOUT: float = 30.0   # Timeout (segundos) de cada chamada à LLM
+    AI_HTTP_MAX_CONNECTIONS: int = 20  # Tamanho do pool de conexões HTTP com a LLM
+    AI_JSON_MODE: bool = True          # Pede à LLM saída em JSON (modo JSON do provedor)
+    AI_MAX_ATTEMPTS: int = 3           # Tentativas por receita em falhas transitórias (429, timeout, 5xx)
+    AI_RETRY_BASE_DELAY: float = 0.5   # Espera base (segundos) do backoff exponencial
+    AI_RETRY_MAX_DELAY: float = 8.0    # Espera máxima (segundos) entre tentativas
+    AI_GENERATION_DEADLINE: float = 45.0  # Orçamento total (segundos) de uma geração, incluindo novas tentativas
+    AI_REPAIR_ENABLED: bool = True     # Pede à LLM que corrija um JSON inválido antes de gerar de novo
+    AI_GENERATION_STRATEGY: str = "paralela"  # "paralela" (uma chamada por receita) ou "lote" (uma chamada para todas)
+    RECIPE_CACHE_ENABLED: bool = True
+    RECIPE_CACHE_BACKEND: str = "memory"  # "memory" (por processo) ou "sqlite" (compartilhado)
+    RECIPE_CACHE_TTL: int = 6 * 3600      # Validade (segundos) das receitas em cache
+    RECIPE_CACHE_MAX_ENTRIES: int = 1000
+    RECIPE_CACHE_SQLITE_PATH: str = ".cache/recipe_cache.sqlite3"
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"    # "memory" (por processo) ou "sqlite" (compartilhado)
+    RATE_LIMIT_SQLITE_PATH: str = ".cache/rate_limit.sqlite3"
+    RATE_LIMIT_MAX_ENTRIES: int = 10000
+    AI_USER_RATE_PER_MINUTE: float = 6.0    # Gerações por minuto por usuário (reposição do balde)
+    AI_USER_BURST: int = 3                  # Gerações seguidas permitidas a um usuário
+    AI_GLOBAL_RATE_PER_MINUTE: float = 60.0  # Gerações por minuto que chegam à LLM (todos os usuários)
+    AI_GLOBAL_BURST: int = 20
+    AI_MAX_ACTIVE_GENERATIONS: int = 8      # Gerações simultâneas por processo
+    AI_ADMISSION_QUEUE_SIZE: int = 32       # Gerações aguardando vaga; acima disso, 503
+    AI_ADMISSION_QUEUE_TIMEOUT: float = 10.0  # Espera máxima (segundos) por uma vaga
+    COOKABLE_INDEX_MAX_USERS: int = 1000  # Índices de receitas (GET /recipes/cookable) mantidos em memória
+    COOKABLE_INDEX_TTL: int = 600         # Validade (segundos) de cada índice
 
     class Config:
         env_file = ".env"
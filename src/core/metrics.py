@@ -0,0 +1,81 @@
+import bisect
+import threading
+from typing import Callable, Dict, Sequence
+
+
+# Limites superiores (segundos) padrão dos histogramas de latência
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Histograma cumulativo (no formato do Prometheus: contagem por limite superior)"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> dict:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+        return {"buckets": buckets, "count": self.count, "sum": self.sum}
+
+
+class MetricsRegistry:
+    """Registro simples de métricas em memória do processo, exposto em GET /metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+        self._histograms: Dict[str, Histogram] = {}
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """Incrementa um contador"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def get(self, name: str) -> float:
+        """Retorna o valor atual de um contador"""
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        """Registra uma observação em um histograma (criado no primeiro uso)"""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(buckets)
+            histogram.observe(value)
+
+    def register_gauge(self, name: str, callback: Callable[[], float]) -> None:
+        """Registra uma métrica calculada no momento da leitura"""
+        with self._lock:
+            self._gauges[name] = callback
+
+    def snapshot(self) -> dict:
+        """Retorna todas as métricas atuais"""
+        with self._lock:
+            data = dict(self._counters)
+            data.update({name: histogram.snapshot() for name, histogram in self._histograms.items()})
+            gauges = list(self._gauges.items())
+
+        for name, callback in gauges:
+            try:
+                data[name] = callback()
+            except Exception as e:
+                print(f"Erro ao calcular métrica {name}: {str(e)}")
+        return data
+
+
+# Instância única do registro de métricas
+metrics = MetricsRegistry()
@@ -0,0 +1,64 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+from uuid import UUID
+
+from src.core.config import settings
+
+# Cabeçalho de resposta com o cursor da próxima página
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def clamp_page_size(limit: Optional[int]) -> int:
+    """Retorna o tamanho de página solicitado, limitado a PAGE_SIZE_MAX"""
+    if limit is None:
+        return settings.PAGE_SIZE_DEFAULT
+    return max(1, min(limit, settings.PAGE_SIZE_MAX))
+
+
+def encode_cursor(created_at: datetime, item_id: UUID) -> str:
+    """Gera o cursor opaco que aponta para depois do item (created_at, id)"""
+    payload = json.dumps([created_at.isoformat(), str(item_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    Decodifica um cursor gerado por encode_cursor
+
+    Raises:
+        ValueError: Se o cursor for inválido
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), UUID(item_id)
+    except Exception:
+        raise ValueError("Cursor inválido")
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """
+    Gera o cursor opaco de listagens ordenadas por relevância (buscas),
+    que não têm uma chave estável para paginação keyset
+    """
+    payload = json.dumps({"offset": offset}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_offset_cursor(cursor: str) -> int:
+    """
+    Decodifica um cursor gerado por encode_offset_cursor
+
+    Raises:
+        ValueError: Se o cursor for inválido
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))["offset"]
+    except Exception:
+        raise ValueError("Cursor inválido")
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError("Cursor inválido")
+    return offset
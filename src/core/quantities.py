@@ -0,0 +1,163 @@
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import re
+
+from src.core.normalization import fold_text, singularize
+
+
+class Quantity(NamedTuple):
+    """Quantidade numérica em uma unidade canônica: "g" (massa), "ml" (volume) ou "un" (contagem)"""
+    amount: float
+    unit: str
+
+
+# Unidade (palavras no singular, sem acentos) -> (unidade canônica, fator de conversão)
+UNITS: Dict[str, Tuple[str, float]] = {
+    # Massa
+    "mg": ("g", 0.001),
+    "g": ("g", 1), "gr": ("g", 1), "grama": ("g", 1),
+    "kg": ("g", 1000), "quilo": ("g", 1000), "quilograma": ("g", 1000),
+    "pitada": ("g", 0.5),
+    # Volume (medidas caseiras brasileiras)
+    "ml": ("ml", 1), "mililitro": ("ml", 1),
+    "l": ("ml", 1000), "litro": ("ml", 1000),
+    "xicara": ("ml", 240), "xicara de cha": ("ml", 240), "xicara cha": ("ml", 240),
+    "copo": ("ml", 200), "copo americano": ("ml", 190),
+    "colher": ("ml", 15), "colher de sopa": ("ml", 15), "colher sopa": ("ml", 15),
+    "colher de sobremesa": ("ml", 10), "colher sobremesa": ("ml", 10),
+    "colher de cha": ("ml", 5), "colher cha": ("ml", 5),
+    "colher de cafe": ("ml", 2.5), "colher cafe": ("ml", 2.5),
+    # Contagem
+    "un": ("un", 1), "und": ("un", 1), "unidade": ("un", 1),
+    "duzia": ("un", 12),
+    "dente": ("un", 1), "fatia": ("un", 1), "folha": ("un", 1), "ramo": ("un", 1),
+    "maco": ("un", 1), "lata": ("un", 1), "pacote": ("un", 1), "caixa": ("un", 1),
+    "cabeca": ("un", 1), "file": ("un", 1), "posta": ("un", 1),
+}
+_MAX_UNIT_WORDS = max(len(unit.split()) for unit in UNITS)
+
+NUMBER_WORDS: Dict[str, float] = {
+    "um": 1, "uma": 1, "dois": 2, "duas": 2, "tres": 3, "quatro": 4, "cinco": 5,
+    "seis": 6, "sete": 7, "oito": 8, "nove": 9, "dez": 10, "onze": 11, "doze": 12,
+    "meio": 0.5, "meia": 0.5,
+}
+# Frações por extenso que multiplicam o número anterior ("um quarto", "dois terços")
+FRACTION_WORDS: Dict[str, float] = {"quarto": 0.25, "terco": 1 / 3}
+
+_UNICODE_FRACTIONS = {"½": " 1/2", "¼": " 1/4", "¾": " 3/4", "⅓": " 1/3", "⅔": " 2/3"}
+_TOKENS = re.compile(r"\d+/\d+|\d+(?:[.,]\d+)?|[a-z]+|-")
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)?")
+_FRACTION = re.compile(r"(\d+)/(\d+)")
+_RANGE_WORDS = {"a", "-", "ou"}
+
+
+def _tokenize(text: str) -> List[str]:
+    """Números, frações e palavras (no singular, sem acentos) do texto"""
+    for symbol, replacement in _UNICODE_FRACTIONS.items():
+        text = text.replace(symbol, replacement)
+    return [
+        singularize(token) if token.isalpha() and token not in NUMBER_WORDS else token
+        for token in _TOKENS.findall(fold_text(text))
+    ]
+
+
+def _parse_number(tokens: List[str], i: int) -> Tuple[Optional[float], int]:
+    """Número a partir de tokens[i] (algarismos, fração, número misto ou por extenso)"""
+    if i >= len(tokens):
+        return None, i
+    token = tokens[i]
+
+    fraction = _FRACTION.fullmatch(token)
+    if fraction:
+        denominator = int(fraction.group(2))
+        return (int(fraction.group(1)) / denominator if denominator else None), i + 1
+
+    if _NUMBER.fullmatch(token):
+        value = float(token.replace(",", "."))
+        mixed = _FRACTION.fullmatch(tokens[i + 1]) if i + 1 < len(tokens) else None
+        if mixed and int(mixed.group(2)):
+            return value + int(mixed.group(1)) / int(mixed.group(2)), i + 2
+        return value, i + 1
+
+    if token in NUMBER_WORDS:
+        value, i = NUMBER_WORDS[token], i + 1
+        if i < len(tokens) and tokens[i] in FRACTION_WORDS:
+            value, i = value * FRACTION_WORDS[tokens[i]], i + 1
+        elif tokens[i:i + 2] in (["e", "meio"], ["e", "meia"]):
+            value, i = value + 0.5, i + 2
+        return value, i
+
+    return None, i
+
+
+def _parse_unit(tokens: List[str], i: int) -> Tuple[Optional[Tuple[str, float]], int]:
+    """Unidade mais longa da tabela UNITS que começa em tokens[i]"""
+    for size in range(min(_MAX_UNIT_WORDS, len(tokens) - i), 0, -1):
+        unit = UNITS.get(" ".join(tokens[i:i + size]))
+        if unit is not None:
+            return unit, i + size
+    return None, i
+
+
+@lru_cache(maxsize=10000)
+def parse_quantity(text: Optional[str]) -> Optional[Quantity]:
+    """
+    Converte uma quantidade em texto livre para valor numérico e unidade canônica
+    ("200g", "1/2 kg", "1 1/2 xícara", "meia dúzia", "2 a 3 dentes", "uma e meia colher de sopa").
+    Faixas ("2 a 3") usam o valor médio; números sem unidade são contagens ("2 ovos").
+    Retorna None se não houver quantidade reconhecível ("a gosto") ou se o texto for vazio/nulo.
+    """
+    if not text:
+        return None
+    tokens = _tokenize(text)
+    amount, i = _parse_number(tokens, 0)
+    if amount is not None and i < len(tokens) and tokens[i] in _RANGE_WORDS:
+        upper, j = _parse_number(tokens, i + 1)
+        if upper is not None:
+            amount, i = (amount + upper) / 2, j
+
+    while i < len(tokens) and tokens[i] in ("de", "do", "da"):
+        i += 1
+    unit, i = _parse_unit(tokens, i)
+    if unit is None:
+        # Sem unidade conhecida: o número conta o que vem depois ("2 ovos", "1 cebola média picada")
+        if amount is None:
+            return None
+        unit = ("un", 1)
+    else:
+        if amount is None:
+            amount = 1.0  # "pitada", "xícara"
+        if tokens[i:i + 2] in (["e", "meio"], ["e", "meia"]):
+            amount += 0.5  # "1 xícara e meia"
+
+    canonical_unit, factor = unit
+    return Quantity(round(float(amount) * factor, 3), canonical_unit)
+
+
+def parse_quantities(texts: Iterable[Optional[str]]) -> List[Optional[Quantity]]:
+    """
+    Converte várias quantidades de uma vez (ex.: a despensa inteira),
+    analisando cada texto distinto uma única vez
+    """
+    texts = list(texts)
+    parsed = {text: parse_quantity(text) for text in set(texts)}
+    return [parsed[text] for text in texts]
+
+
+def ingredient_quantity_text(quantity: Optional[str], unit: Optional[str] = None) -> Optional[str]:
+    """
+    Texto da quantidade de um ingrediente da despensa, que tem quantidade e unidade separadas.
+    Sem quantidade, retorna None (a unidade sozinha seria lida como 1 unidade)
+    """
+    if not quantity:
+        return None
+    return f"{quantity} {unit}" if unit else quantity
+
+
+def sum_quantities(items: Iterable[Tuple[str, Optional[Quantity]]]) -> Dict[Tuple[str, str], float]:
+    """Soma as quantidades por (chave, unidade canônica), ignorando as não reconhecidas"""
+    totals: Dict[Tuple[str, str], float] = {}
+    for key, quantity in items:
+        if quantity is not None:
+            totals[key, quantity.unit] = totals.get((key, quantity.unit), 0.0) + quantity.amount
+    return totals
@@ -0,0 +1,65 @@
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+class Deadline:
+    """Orçamento de tempo de uma operação, compartilhado por todas as suas tentativas"""
+
+    def __init__(self, budget: float):
+        self.expires_at = time.monotonic() + budget
+
+    def remaining(self) -> float:
+        """Segundos restantes (0 se já expirou)"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, limit: float) -> float:
+        """Timeout de uma chamada: o limite por chamada, sem ultrapassar o orçamento restante"""
+        return min(limit, self.remaining())
+
+
+class RetryPolicy:
+    """
+    Espera entre tentativas: backoff exponencial com jitter completo
+    (aleatório entre 0 e base * 2^tentativa, limitado a max_delay), para que
+    chamadas que falharam juntas não tentem de novo ao mesmo tempo.
+    Um Retry-After informado pelo servidor é respeitado como espera mínima.
+    """
+
+    def __init__(self, max_attempts: int, base_delay: float, max_delay: float):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Espera (segundos) antes da tentativa seguinte à de número `attempt` (a partir de 0)"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def should_retry(self, attempt: int, delay: float, deadline: Deadline) -> bool:
+        """Se ainda há tentativas e a espera cabe no orçamento restante"""
+        return attempt + 1 < self.max_attempts and delay < deadline.remaining()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Converte o cabeçalho Retry-After (segundos ou data HTTP) em segundos de espera"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
@@ -0,0 +1,56 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Call:
+    """Execução em andamento compartilhada entre as requisições de uma mesma chave"""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Agrupa chamadas concorrentes idênticas em uma única execução.
+
+    A primeira chamada de uma chave inicia a execução; as seguintes, enquanto
+    ela estiver em andamento, aguardam o mesmo resultado (ou a mesma exceção).
+    Se uma das requisições for cancelada, a execução continua para as demais;
+    ela só é cancelada quando não resta ninguém aguardando.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def in_flight(self) -> int:
+        """Número de execuções em andamento"""
+        return len(self._calls)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Executa fn() uma única vez por chave entre chamadas concorrentes"""
+        call = self._calls.get(key)
+        leader = call is None
+        if leader:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Ninguém mais aguarda: cancela e libera a chave para novas execuções
+                self._forget(key, call)
+                call.task.cancel()
@@ -1,14 +1,18 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+import uuid
 
 from src.core.config import settings
+from src.database.pool import pool_options, register_pool_metrics
 
-# Configurar pool de conexões com timeouts
+# Pool de conexões configurado por DB_POOL_* (ver src/database/pool.py).
+# O psycopg2 não usa prepared statements no servidor, então funciona
+# sem ajustes atrás de poolers em modo transação.
 engine = create_engine(
     settings.SUPABASE_DB_URL,
-    pool_pre_ping=True,  # Verifica conexão antes de usar
-    pool_recycle=3600,   # Recicla conexões a cada hora
+    **pool_options(),
     connect_args={
         "connect_timeout": 5,  # Timeout de 5 segundos
         "keepalives": 1,
@@ -17,14 +21,68 @@ engine = create_engine(
         "keepalives_count": 5,
     }
 )
+register_pool_metrics(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
 
+def to_async_url(database_url: str) -> URL:
+    """
+    Converte a URL do banco (psycopg2) para o driver asyncpg.
+    O parâmetro sslmode, próprio do libpq, é removido da URL (ver async_connect_args).
+    """
+    url = make_url(database_url)
+    return url.set(drivername="postgresql+asyncpg").difference_update_query(["sslmode"])
+
+
+def async_connect_args(database_url: str) -> dict:
+    """Parâmetros de conexão do asyncpg equivalentes aos do engine síncrono"""
+    connect_args = {"timeout": 5}  # Timeout de 5 segundos
+    sslmode = make_url(database_url).query.get("sslmode")
+    if sslmode and sslmode != "disable":
+        connect_args["ssl"] = sslmode
+    if settings.DB_TRANSACTION_POOLER:
+        # Em modo transação, cada comando pode ir para outra conexão do servidor:
+        # desativa os caches de prepared statements e usa nomes únicos
+        connect_args.update({
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        })
+    return connect_args
+
+
+# Engine assíncrono (asyncpg), criado apenas com DB_ASYNC habilitado
+async_engine = None
+AsyncSessionLocal = None
+if settings.DB_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(
+        to_async_url(settings.SUPABASE_DB_URL),
+        **pool_options(is_async=True),
+        connect_args=async_connect_args(settings.SUPABASE_DB_URL)
+    )
+    register_pool_metrics(async_engine.sync_engine)
+    # expire_on_commit=False: atributos continuam acessíveis após o commit,
+    # já que não há carregamento implícito (lazy load) em sessões assíncronas
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Sessão usada pelas rotas: assíncrona (asyncpg) com DB_ASYNC habilitado,
+# síncrona (psycopg2, executada no threadpool) caso contrário
+get_session = get_async_db if settings.DB_ASYNC else get_db
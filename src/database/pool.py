@@ -0,0 +1,72 @@
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from src.core.config import settings
+from src.core.metrics import metrics
+
+
+class _InstrumentedPoolMixin:
+    """
+    Mede o tempo até obter uma conexão do pool (espera por uma conexão livre
+    ou abertura de uma nova) e conta os timeouts (DB_POOL_TIMEOUT).
+    """
+
+    metrics_prefix = "db_pool"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            metrics.increment(f"{self.metrics_prefix}_timeouts")
+            raise
+        finally:
+            metrics.observe(f"{self.metrics_prefix}_wait_seconds", time.perf_counter() - start)
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    """Pool do engine síncrono (psycopg2)"""
+
+    metrics_prefix = "db_pool"
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """Pool do engine assíncrono (asyncpg)"""
+
+    metrics_prefix = "db_async_pool"
+
+
+def pool_options(is_async: bool = False) -> dict:
+    """
+    Parâmetros de pool do engine conforme as configurações (DB_POOL_*).
+    Com DB_NULL_POOL, cada sessão abre e fecha sua própria conexão, deixando o
+    reaproveitamento para um pooler externo (Supavisor/pgbouncer).
+    """
+    if settings.DB_NULL_POOL:
+        return {"poolclass": NullPool}
+
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def register_pool_metrics(engine: Engine) -> None:
+    """Expõe em GET /metrics o estado do pool do engine (conexões em uso, ociosas e extras)"""
+    pool = engine.pool
+    if not isinstance(pool, _InstrumentedPoolMixin):
+        return
+
+    # engine.pool é consultado a cada leitura: o pool é recriado em engine.dispose()
+    prefix = pool.metrics_prefix
+    metrics.register_gauge(f"{prefix}_size", lambda: engine.pool.size())
+    metrics.register_gauge(f"{prefix}_checked_out", lambda: engine.pool.checkedout())
+    metrics.register_gauge(f"{prefix}_checked_in", lambda: engine.pool.checkedin())
+    metrics.register_gauge(f"{prefix}_overflow", lambda: max(engine.pool.overflow(), 0))
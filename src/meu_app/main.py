@@ -2,7 +2,15 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 
-from src.api.routes import users, ingredients, recipes
+from src.api.routes import users, ingredients, recipes, ai_generator
+from src.core.metrics import metrics
+from src.core.pagination import NEXT_CURSOR_HEADER
+from src.database.connection import async_engine
+from src.services.admission_service import admission_service
+from src.services.ai_service import ai_service
+from src.services.recipe_cache_service import recipe_cache_service
+from src.services.image_service import ImageService
+from src.services.storage_service import StorageService
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -20,17 +28,34 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 @app.on_event("startup")
 async def startup_event():
     """Evento executado na inicialização do servidor"""
     logger.info("🚀 API Recipe Generator está iniciando...")
+    app.state.image_service = ImageService() if ImageService.is_available() else None
+    app.state.storage_service = StorageService(image_service=app.state.image_service)
     logger.info("✅ Servidor pronto para receber requisições")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Evento executado no encerramento do servidor"""
+    await app.state.storage_service.aclose()
+    if app.state.image_service is not None:
+        app.state.image_service.shutdown()
+    await ai_service.aclose()
+    recipe_cache_service.close()
+    admission_service.close()
+    if async_engine is not None:
+        await async_engine.dispose()
+    logger.info("👋 Conexões e caches encerrados")
+
 app.include_router(users.router)
 app.include_router(ingredients.router)
 app.include_router(recipes.router)
+app.include_router(ai_generator.router)
 
 
 @app.get("/")
@@ -40,4 +65,9 @@ def root():
 @app.get("/health")
 def health_check():
     """Endpoint de health check simples"""
-    return {"status": "ok", "message": "API is healthy"}
\ No newline at end of file
+    return {"status": "ok", "message": "API is healthy"}
+
+@app.get("/metrics")
+def get_metrics():
+    """Métricas internas do processo (cache, IA, etc.)"""
+    return metrics.snapshot()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, DateTime
+from sqlalchemy import Column, String, ForeignKey, DateTime, Float
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -12,8 +12,11 @@ class Ingredient(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String(100), nullable=False)
+    canonical_name = Column(String(100), nullable=True)  # Nome normalizado (src/core/normalization.py)
     quantity = Column(String(50), nullable=False)
     unit = Column(String(20), nullable=False)
+    amount = Column(Float, nullable=True)            # Quantidade convertida (src/core/quantities.py)
+    amount_unit = Column(String(10), nullable=True)  # Unidade canônica de amount: "g", "ml" ou "un"
     image_url = Column(String(500), nullable=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, Integer
+from sqlalchemy import Column, String, ForeignKey, Integer, Float
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from src.database.connection import Base
@@ -11,7 +11,10 @@ class RecipeIngredient(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     recipe_id = Column(UUID(as_uuid=True), ForeignKey("recipes.id", ondelete="CASCADE"), nullable=False)
     name = Column(String(255), nullable=False)
+    canonical_name = Column(String(255), nullable=True)  # Nome normalizado (src/core/normalization.py)
     quantity = Column(String(100), nullable=False)
+    amount = Column(Float, nullable=True)            # Quantidade convertida (src/core/quantities.py)
+    amount_unit = Column(String(10), nullable=True)  # Unidade canônica de amount: "g", "ml" ou "un"
     order = Column(Integer, nullable=False, default=0)
 
     # Relacionamento
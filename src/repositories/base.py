@@ -0,0 +1,39 @@
+from typing import Any, Type, Union
+import functools
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+
+class ThreadedRepository:
+    """
+    Adapta um repositório síncrono à interface dos repositórios assíncronos:
+    cada método é aguardável e executado no threadpool, sem bloquear o event loop.
+    Usado enquanto DB_ASYNC estiver desabilitado.
+    """
+
+    def __init__(self, repository: Any):
+        self._repository = repository
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._repository, name)
+        if not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        async def call(*args, **kwargs):
+            return await run_in_threadpool(attribute, *args, **kwargs)
+
+        return call
+
+
+def repository_for(db: Union[Session, AsyncSession], sync_repository: Type, async_repository: Type) -> Any:
+    """
+    Retorna o repositório adequado à sessão: a versão assíncrona para AsyncSession
+    ou a síncrona adaptada por ThreadedRepository. Em ambos os casos os métodos
+    são aguardados (await) pelos services.
+    """
+    if isinstance(db, AsyncSession):
+        return async_repository(db)
+    return ThreadedRepository(sync_repository(db))
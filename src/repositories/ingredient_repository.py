@@ -1,12 +1,110 @@
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, func, select, tuple_
+from sqlalchemy.engine import Row
+from datetime import datetime
+from typing import List, Optional, Tuple, Union
 from uuid import UUID
 
+from src.core.normalization import canonical_ingredient_name
+from src.core.quantities import ingredient_quantity_text, parse_quantity
 from src.models.ingredient import Ingredient
+from src.repositories.base import repository_for
+from src.repositories.search import text_match, text_rank
 from src.api.schemas.ingredient_schema import IngredientCreate, IngredientUpdate
 
 
+# Consultas compartilhadas pelas versões síncrona e assíncrona do repositório
+
+def _set_amount(db_ingredient: Ingredient) -> None:
+    """Converte quantidade e unidade informadas para valor numérico em unidade canônica"""
+    quantity = parse_quantity(ingredient_quantity_text(db_ingredient.quantity, db_ingredient.unit))
+    db_ingredient.amount = quantity.amount if quantity else None
+    db_ingredient.amount_unit = quantity.unit if quantity else None
+
+
+def _new_ingredient(ingredient_data: IngredientCreate, user_id: UUID, image_path: Optional[str]) -> Ingredient:
+    db_ingredient = Ingredient(
+        name=ingredient_data.name,
+        canonical_name=canonical_ingredient_name(ingredient_data.name),
+        quantity=ingredient_data.quantity,
+        unit=ingredient_data.unit,
+        image_url=image_path,
+        user_id=user_id
+    )
+    _set_amount(db_ingredient)
+    return db_ingredient
+
+
+def _apply_update(db_ingredient: Ingredient, ingredient_data: IngredientUpdate) -> None:
+    """
+    Atualiza apenas os campos fornecidos, mantendo o nome canônico e a
+    quantidade convertida em dia com o nome, a quantidade e a unidade
+    """
+    update_data = ingredient_data.model_dump(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(db_ingredient, field, value)
+    if update_data.get('name'):
+        db_ingredient.canonical_name = canonical_ingredient_name(update_data['name'])
+    if update_data.get('quantity') or update_data.get('unit'):
+        _set_amount(db_ingredient)
+
+
+def _by_id_query(ingredient_id: UUID, user_id: UUID):
+    return select(Ingredient).where(
+        Ingredient.id == ingredient_id,
+        Ingredient.user_id == user_id
+    )
+
+
+def _by_user_query(
+    user_id: UUID,
+    limit: Optional[int] = None,
+    after: Optional[Tuple[datetime, UUID]] = None
+):
+    """
+    Ingredientes de um usuário, do mais recente ao mais antigo.
+    
+    Paginação por cursor (keyset): com `after`, retorna apenas os itens
+    posteriores ao par (created_at, id) informado, usando o índice
+    (user_id, created_at DESC, id DESC).
+    """
+    query = select(Ingredient).where(Ingredient.user_id == user_id)
+    if after is not None:
+        query = query.where(tuple_(Ingredient.created_at, Ingredient.id) < tuple_(*after))
+
+    query = query.order_by(Ingredient.created_at.desc(), Ingredient.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def _names_by_user_query(user_id: UUID):
+    """
+    Nomes (original e canônico) e quantidades convertidas dos ingredientes de
+    um usuário (a despensa), sem carregar objetos ORM
+    """
+    return select(
+        Ingredient.name,
+        Ingredient.canonical_name,
+        Ingredient.amount,
+        Ingredient.amount_unit
+    ).where(Ingredient.user_id == user_id)
+
+
+def _search_by_user_query(user_id: UUID, q: str, limit: int, offset: int = 0):
+    """Ingredientes de um usuário que correspondem à busca, do mais relevante ao menos relevante"""
+    vector = func.f_search_vector(Ingredient.name)
+    return (
+        select(Ingredient)
+        .where(Ingredient.user_id == user_id, text_match(vector, Ingredient.name, q))
+        .order_by(desc(text_rank(vector, Ingredient.name, q)), desc(Ingredient.id))
+        .limit(limit)
+        .offset(offset)
+    )
+
+
 class IngredientRepository:
     """Repository para gerenciar operações de Ingredientes no banco de dados"""
     
@@ -16,13 +114,7 @@ class IngredientRepository:
     def create(self, ingredient_data: IngredientCreate, user_id: UUID, image_path: Optional[str] = None) -> Ingredient:
         """Cria um novo ingrediente no banco de dados"""
         try:
-            db_ingredient = Ingredient(
-                name=ingredient_data.name,
-                quantity=ingredient_data.quantity,
-                unit=ingredient_data.unit,
-                image_url=image_path,
-                user_id=user_id
-            )
+            db_ingredient = _new_ingredient(ingredient_data, user_id, image_path)
             self.db.add(db_ingredient)
             self.db.commit()
             self.db.refresh(db_ingredient)
@@ -33,16 +125,24 @@ class IngredientRepository:
     
     def get_by_id(self, ingredient_id: UUID, user_id: UUID) -> Optional[Ingredient]:
         """Busca um ingrediente por ID e verifica se pertence ao usuário"""
-        return self.db.query(Ingredient).filter(
-            Ingredient.id == ingredient_id,
-            Ingredient.user_id == user_id
-        ).first()
+        return self.db.execute(_by_id_query(ingredient_id, user_id)).scalars().first()
+    
+    def get_all_by_user(
+        self,
+        user_id: UUID,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, UUID]] = None
+    ) -> List[Ingredient]:
+        """Retorna os ingredientes de um usuário, do mais recente ao mais antigo (ver _by_user_query)"""
+        return self.db.execute(_by_user_query(user_id, limit, after)).scalars().all()
     
-    def get_all_by_user(self, user_id: UUID) -> List[Ingredient]:
-        """Retorna todos os ingredientes de um usuário"""
-        return self.db.query(Ingredient).filter(
-            Ingredient.user_id == user_id
-        ).order_by(Ingredient.created_at.desc()).all()
+    def list_names_by_user(self, user_id: UUID) -> List[Row]:
+        """Retorna nomes e quantidades (name, canonical_name, amount, amount_unit) dos ingredientes de um usuário"""
+        return self.db.execute(_names_by_user_query(user_id)).all()
+    
+    def search_by_user(self, user_id: UUID, q: str, limit: int, offset: int = 0) -> List[Ingredient]:
+        """Busca ingredientes do usuário por relevância (ver _search_by_user_query)"""
+        return self.db.execute(_search_by_user_query(user_id, q, limit, offset)).scalars().all()
     
     def update(
         self, 
@@ -56,10 +156,7 @@ class IngredientRepository:
         if not db_ingredient:
             return None
         
-        # Atualiza apenas os campos fornecidos
-        update_data = ingredient_data.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_ingredient, field, value)
+        _apply_update(db_ingredient, ingredient_data)
         
         try:
             self.db.commit()
@@ -83,3 +180,85 @@ class IngredientRepository:
         except Exception as e:
             self.db.rollback()
             raise e
+
+
+class AsyncIngredientRepository:
+    """Versão assíncrona (AsyncSession) de IngredientRepository"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def create(self, ingredient_data: IngredientCreate, user_id: UUID, image_path: Optional[str] = None) -> Ingredient:
+        """Cria um novo ingrediente no banco de dados"""
+        try:
+            db_ingredient = _new_ingredient(ingredient_data, user_id, image_path)
+            self.db.add(db_ingredient)
+            await self.db.commit()
+            await self.db.refresh(db_ingredient)
+            return db_ingredient
+        except IntegrityError as e:
+            await self.db.rollback()
+            raise e
+    
+    async def get_by_id(self, ingredient_id: UUID, user_id: UUID) -> Optional[Ingredient]:
+        """Busca um ingrediente por ID e verifica se pertence ao usuário"""
+        return (await self.db.execute(_by_id_query(ingredient_id, user_id))).scalars().first()
+    
+    async def get_all_by_user(
+        self,
+        user_id: UUID,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, UUID]] = None
+    ) -> List[Ingredient]:
+        """Retorna os ingredientes de um usuário, do mais recente ao mais antigo (ver _by_user_query)"""
+        return (await self.db.execute(_by_user_query(user_id, limit, after))).scalars().all()
+    
+    async def list_names_by_user(self, user_id: UUID) -> List[Row]:
+        """Retorna nomes e quantidades (name, canonical_name, amount, amount_unit) dos ingredientes de um usuário"""
+        return (await self.db.execute(_names_by_user_query(user_id))).all()
+    
+    async def search_by_user(self, user_id: UUID, q: str, limit: int, offset: int = 0) -> List[Ingredient]:
+        """Busca ingredientes do usuário por relevância (ver _search_by_user_query)"""
+        return (await self.db.execute(_search_by_user_query(user_id, q, limit, offset))).scalars().all()
+    
+    async def update(
+        self, 
+        ingredient_id: UUID, 
+        user_id: UUID, 
+        ingredient_data: IngredientUpdate
+    ) -> Optional[Ingredient]:
+        """Atualiza um ingrediente existente"""
+        db_ingredient = await self.get_by_id(ingredient_id, user_id)
+        
+        if not db_ingredient:
+            return None
+        
+        _apply_update(db_ingredient, ingredient_data)
+        
+        try:
+            await self.db.commit()
+            await self.db.refresh(db_ingredient)
+            return db_ingredient
+        except IntegrityError as e:
+            await self.db.rollback()
+            raise e
+    
+    async def delete(self, ingredient_id: UUID, user_id: UUID) -> bool:
+        """Remove um ingrediente do banco de dados"""
+        db_ingredient = await self.get_by_id(ingredient_id, user_id)
+        
+        if not db_ingredient:
+            return False
+        
+        try:
+            await self.db.delete(db_ingredient)
+            await self.db.commit()
+            return True
+        except Exception as e:
+            await self.db.rollback()
+            raise e
+
+
+def get_ingredient_repository(db: Union[Session, AsyncSession]):
+    """Repositório de ingredientes com métodos aguardáveis, conforme o tipo da sessão"""
+    return repository_for(db, IngredientRepository, AsyncIngredientRepository)
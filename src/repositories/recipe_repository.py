@@ -1,16 +1,218 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy.orm import Session, aliased, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, func, insert, select, tuple_, union_all
+from sqlalchemy.engine import Row
+from datetime import datetime
+from uuid import UUID
+from src.core.normalization import canonical_ingredient_name
+from src.core.quantities import parse_quantity
 from src.models.recipe import Recipe
 from src.models.recipe_ingredient import RecipeIngredient
-from typing import List, Optional
+from src.repositories.base import repository_for
+from src.repositories.search import text_match, text_rank
+from typing import List, Optional, Tuple, Union
 import json
+import uuid
+
+
+# Consultas compartilhadas pelas versões síncrona e assíncrona do repositório
+
+def _build_rows(user_id: str, recipes: List[dict]) -> Tuple[List[dict], List[dict]]:
+    """
+    Monta as linhas de receitas e ingredientes a inserir, com os UUIDs
+    gerados no cliente (sem ida ao banco para obter os ids).
+    
+    Args:
+        recipes: Lista de dicts com 'name', 'instructions', 'steps' e 'ingredients'
+            (lista de dicts com 'name', 'quantity', 'order')
+    """
+    recipe_rows = []
+    ingredient_rows = []
+    for recipe in recipes:
+        recipe_id = uuid.uuid4()
+        recipe_rows.append({
+            'id': recipe_id,
+            'user_id': UUID(str(user_id)),
+            'name': recipe['name'],
+            'instructions': recipe['instructions'],
+            'steps': recipe.get('steps')
+        })
+        for ing_data in recipe['ingredients']:
+            quantity = parse_quantity(ing_data['quantity'])
+            ingredient_rows.append({
+                'id': uuid.uuid4(),
+                'recipe_id': recipe_id,
+                'name': ing_data['name'],
+                'canonical_name': canonical_ingredient_name(ing_data['name']),
+                'quantity': ing_data['quantity'],
+                'amount': quantity.amount if quantity else None,
+                'amount_unit': quantity.unit if quantity else None,
+                'order': ing_data.get('order', 0)
+            })
+    return recipe_rows, ingredient_rows
+
+
+def _insert_recipes_query(recipe_rows: List[dict]):
+    """INSERT de várias receitas em um único comando, retornando a data de criação gerada pelo banco"""
+    return insert(Recipe).values(recipe_rows).returning(Recipe.id, Recipe.created_at)
+
+
+def _insert_ingredients_query(ingredient_rows: List[dict]):
+    """INSERT de todos os ingredientes em um único comando"""
+    return insert(RecipeIngredient).values(ingredient_rows)
+
+
+def _created_recipes(recipe_rows: List[dict], ingredient_rows: List[dict], created_at: dict) -> List[dict]:
+    """Monta as receitas criadas a partir dos dados inseridos, sem consultar o banco"""
+    ingredients_by_recipe = {row['id']: [] for row in recipe_rows}
+    for row in ingredient_rows:
+        ingredients_by_recipe[row['recipe_id']].append(row)
+
+    return [
+        {
+            **row,
+            'created_at': created_at[row['id']],
+            'updated_at': None,
+            'recipe_ingredients': ingredients_by_recipe[row['id']]
+        }
+        for row in recipe_rows
+    ]
+
+
+def _by_id_query(recipe_id: str, with_ingredients: bool = False):
+    """
+    Receita por ID. Com with_ingredients, os ingredientes são carregados
+    junto (selectinload), em uma única consulta adicional.
+    """
+    query = select(Recipe).where(Recipe.id == recipe_id)
+    if with_ingredients:
+        query = query.options(selectinload(Recipe.recipe_ingredients))
+    return query
+
+
+def _ingredients_count():
+    """
+    Contagem de ingredientes como subconsulta correlacionada: calculada só
+    para as receitas retornadas, sem agregar todas as receitas do usuário
+    """
+    return (
+        select(func.count(RecipeIngredient.id))
+        .where(RecipeIngredient.recipe_id == Recipe.id)
+        .correlate(Recipe)
+        .scalar_subquery()
+    )
+
+
+def _summaries_by_user_query(
+    user_id: str,
+    limit: Optional[int] = None,
+    after: Optional[Tuple[datetime, UUID]] = None
+):
+    """
+    id, nome, data de criação e quantidade de ingredientes das receitas
+    de um usuário, em uma única consulta (sem carregar objetos ORM).
+    
+    Paginação por cursor (keyset): com `after`, retorna apenas as receitas
+    posteriores ao par (created_at, id) informado, usando o índice
+    (user_id, created_at DESC, id DESC).
+    """
+    query = (
+        select(
+            Recipe.id,
+            Recipe.name,
+            Recipe.created_at,
+            _ingredients_count().label("ingredients_count")
+        )
+        .where(Recipe.user_id == user_id)
+    )
+    if after is not None:
+        query = query.where(tuple_(Recipe.created_at, Recipe.id) < tuple_(*after))
+
+    query = query.order_by(desc(Recipe.created_at), desc(Recipe.id))
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def _ingredient_names_by_user_query(user_id: str):
+    """
+    Pares (receita, ingrediente) de todas as receitas de um usuário: id e nome
+    da receita, nomes original e canônico e quantidade convertida do ingrediente
+    """
+    return (
+        select(
+            Recipe.id,
+            Recipe.name,
+            RecipeIngredient.name,
+            RecipeIngredient.canonical_name,
+            RecipeIngredient.amount,
+            RecipeIngredient.amount_unit
+        )
+        .join(RecipeIngredient, RecipeIngredient.recipe_id == Recipe.id)
+        .where(Recipe.user_id == user_id)
+    )
+
+
+def _search_by_user_query(user_id: str, q: str, limit: int, offset: int = 0):
+    """
+    Resumos das receitas de um usuário que correspondem à busca, da mais
+    relevante para a menos relevante. Encontra receitas pelo nome, pelos
+    passos ou pelos nomes dos ingredientes.
+    
+    Receitas e ingredientes correspondentes são buscados em consultas
+    separadas, cada uma com seus índices GIN, já com a relevância calculada;
+    a relevância da receita soma a sua e a dos ingredientes (com metade do peso).
+    """
+    recipe_vector = func.f_search_vector(Recipe.name, Recipe.steps)
+    ingredient_vector = func.f_search_vector(RecipeIngredient.name)
+
+    owner = aliased(Recipe)
+    matches = union_all(
+        select(
+            Recipe.id.label("recipe_id"),
+            text_rank(recipe_vector, Recipe.name, q).label("rank")
+        ).where(
+            Recipe.user_id == user_id,
+            text_match(recipe_vector, Recipe.name, q)
+        ),
+        select(
+            RecipeIngredient.recipe_id,
+            (text_rank(ingredient_vector, RecipeIngredient.name, q) * 0.5).label("rank")
+        )
+        .join(owner, owner.id == RecipeIngredient.recipe_id)
+        .where(
+            owner.user_id == user_id,
+            text_match(ingredient_vector, RecipeIngredient.name, q)
+        )
+    ).subquery()
+
+    ranked = (
+        select(matches.c.recipe_id, func.sum(matches.c.rank).label("rank"))
+        .group_by(matches.c.recipe_id)
+        .subquery()
+    )
+
+    return (
+        select(
+            Recipe.id,
+            Recipe.name,
+            Recipe.created_at,
+            _ingredients_count().label("ingredients_count"),
+            ranked.c.rank
+        )
+        .join(ranked, ranked.c.recipe_id == Recipe.id)
+        .order_by(desc(ranked.c.rank), desc(Recipe.id))
+        .limit(limit)
+        .offset(offset)
+    )
 
 
 class RecipeRepository:
     def __init__(self, db: Session):
         self.db = db
 
-    def create(self, user_id: str, name: str, instructions: str, ingredients: List[dict]) -> Recipe:
+    def create(self, user_id: str, name: str, instructions: str, ingredients: List[dict],
+               steps: Optional[List[dict]] = None) -> dict:
         """
         Cria uma nova receita com seus ingredientes.
         
@@ -19,42 +221,51 @@ class RecipeRepository:
             name: Nome da receita
             instructions: JSON string com os passos da receita
             ingredients: Lista de dicts com 'name', 'quantity', 'order'
+            steps: Passos estruturados (lista de dicts com 'numero', 'descricao')
         """
-        # Cria a receita
-        recipe = Recipe(
-            user_id=user_id,
-            name=name,
-            instructions=instructions
-        )
-        self.db.add(recipe)
-        self.db.flush()  # Garante que o recipe.id seja gerado
-
-        # Cria os ingredientes da receita
-        for ing_data in ingredients:
-            recipe_ingredient = RecipeIngredient(
-                recipe_id=recipe.id,
-                name=ing_data['name'],
-                quantity=ing_data['quantity'],
-                order=ing_data.get('order', 0)
-            )
-            self.db.add(recipe_ingredient)
-
-        self.db.commit()
-        self.db.refresh(recipe)
-        return recipe
+        recipe = {'name': name, 'instructions': instructions, 'steps': steps, 'ingredients': ingredients}
+        return self.create_many(user_id, [recipe])[0]
 
-    def get_by_id(self, recipe_id: str) -> Optional[Recipe]:
-        """Busca uma receita por ID."""
-        return self.db.query(Recipe).filter(Recipe.id == recipe_id).first()
-
-    def get_by_user_id(self, user_id: str) -> List[Recipe]:
-        """Lista todas as receitas de um usuário."""
-        return (
-            self.db.query(Recipe)
-            .filter(Recipe.user_id == user_id)
-            .order_by(desc(Recipe.created_at))
-            .all()
-        )
+    def create_many(self, user_id: str, recipes: List[dict]) -> List[dict]:
+        """
+        Cria várias receitas em uma única transação, com dois INSERTs em lote
+        (receitas e ingredientes), e retorna os dados inseridos.
+        
+        Args:
+            user_id: ID do usuário
+            recipes: Lista de dicts com 'name', 'instructions', 'steps' e 'ingredients'
+        """
+        recipe_rows, ingredient_rows = _build_rows(user_id, recipes)
+        try:
+            created_at = dict(self.db.execute(_insert_recipes_query(recipe_rows)).all())
+            if ingredient_rows:
+                self.db.execute(_insert_ingredients_query(ingredient_rows))
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return _created_recipes(recipe_rows, ingredient_rows, created_at)
+
+    def get_by_id(self, recipe_id: str, with_ingredients: bool = False) -> Optional[Recipe]:
+        """Busca uma receita por ID (ver _by_id_query)."""
+        return self.db.execute(_by_id_query(recipe_id, with_ingredients)).scalars().first()
+
+    def list_summaries_by_user_id(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, UUID]] = None
+    ) -> List[Row]:
+        """Lista os resumos das receitas de um usuário (ver _summaries_by_user_query)."""
+        return self.db.execute(_summaries_by_user_query(user_id, limit, after)).all()
+
+    def list_ingredient_names_by_user_id(self, user_id: str) -> List[Row]:
+        """Lista os ingredientes de todas as receitas de um usuário (ver _ingredient_names_by_user_query)."""
+        return self.db.execute(_ingredient_names_by_user_query(user_id)).all()
+
+    def search_summaries_by_user_id(self, user_id: str, q: str, limit: int, offset: int = 0) -> List[Row]:
+        """Busca receitas do usuário por relevância (ver _search_by_user_query)."""
+        return self.db.execute(_search_by_user_query(user_id, q, limit, offset)).all()
 
     def delete(self, recipe_id: str) -> bool:
         """Deleta uma receita."""
@@ -77,3 +288,77 @@ class RecipeRepository:
             self.db.commit()
             self.db.refresh(recipe)
         return recipe
+
+
+class AsyncRecipeRepository:
+    """Versão assíncrona (AsyncSession) de RecipeRepository"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create(self, user_id: str, name: str, instructions: str, ingredients: List[dict],
+                     steps: Optional[List[dict]] = None) -> dict:
+        """Cria uma nova receita com seus ingredientes (ver RecipeRepository.create)."""
+        recipe = {'name': name, 'instructions': instructions, 'steps': steps, 'ingredients': ingredients}
+        return (await self.create_many(user_id, [recipe]))[0]
+
+    async def create_many(self, user_id: str, recipes: List[dict]) -> List[dict]:
+        """Cria várias receitas em uma única transação (ver RecipeRepository.create_many)."""
+        recipe_rows, ingredient_rows = _build_rows(user_id, recipes)
+        try:
+            created_at = dict((await self.db.execute(_insert_recipes_query(recipe_rows))).all())
+            if ingredient_rows:
+                await self.db.execute(_insert_ingredients_query(ingredient_rows))
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        return _created_recipes(recipe_rows, ingredient_rows, created_at)
+
+    async def get_by_id(self, recipe_id: str, with_ingredients: bool = False) -> Optional[Recipe]:
+        """Busca uma receita por ID (ver _by_id_query)."""
+        return (await self.db.execute(_by_id_query(recipe_id, with_ingredients))).scalars().first()
+
+    async def list_summaries_by_user_id(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, UUID]] = None
+    ) -> List[Row]:
+        """Lista os resumos das receitas de um usuário (ver _summaries_by_user_query)."""
+        return (await self.db.execute(_summaries_by_user_query(user_id, limit, after))).all()
+
+    async def list_ingredient_names_by_user_id(self, user_id: str) -> List[Row]:
+        """Lista os ingredientes de todas as receitas de um usuário (ver _ingredient_names_by_user_query)."""
+        return (await self.db.execute(_ingredient_names_by_user_query(user_id))).all()
+
+    async def search_summaries_by_user_id(self, user_id: str, q: str, limit: int, offset: int = 0) -> List[Row]:
+        """Busca receitas do usuário por relevância (ver _search_by_user_query)."""
+        return (await self.db.execute(_search_by_user_query(user_id, q, limit, offset))).all()
+
+    async def delete(self, recipe_id: str) -> bool:
+        """Deleta uma receita."""
+        recipe = await self.get_by_id(recipe_id)
+        if recipe:
+            await self.db.delete(recipe)
+            await self.db.commit()
+            return True
+        return False
+
+    async def update(self, recipe_id: str, name: Optional[str] = None,
+                     instructions: Optional[str] = None) -> Optional[Recipe]:
+        """Atualiza uma receita."""
+        recipe = await self.get_by_id(recipe_id)
+        if recipe:
+            if name:
+                recipe.name = name
+            if instructions:
+                recipe.instructions = instructions
+            await self.db.commit()
+            await self.db.refresh(recipe)
+        return recipe
+
+
+def get_recipe_repository(db: Union[Session, AsyncSession]):
+    """Repositório de receitas com métodos aguardáveis, conforme o tipo da sessão"""
+    return repository_for(db, RecipeRepository, AsyncRecipeRepository)
@@ -0,0 +1,33 @@
+from sqlalchemy import func, literal_column, or_
+
+# Busca textual em português, sem acentos. A configuração e as funções
+# f_search_vector/f_unaccent são criadas na migração d9e4b6c2a8f1, junto
+# com os índices GIN sobre as mesmas expressões.
+SEARCH_CONFIG = literal_column("'portuguese_unaccent'::regconfig")
+
+
+def search_query(q: str):
+    """tsquery da busca, na sintaxe de buscadores web (ex.: "arroz doce", "frango -batata")"""
+    return func.websearch_to_tsquery(SEARCH_CONFIG, q)
+
+
+def normalized(text):
+    """Texto em minúsculas e sem acentos, como nos índices de trigramas"""
+    return func.f_unaccent(func.lower(text))
+
+
+def text_match(vector, name_column, q: str):
+    """
+    Condição de busca: texto completo sobre o tsvector (índice GIN) ou
+    similaridade de trigramas com o nome, tolerante a erros de digitação
+    (índice GIN pg_trgm, operador <% de word_similarity).
+    """
+    return or_(
+        vector.op("@@")(search_query(q)),
+        normalized(q).op("<%")(normalized(name_column))
+    )
+
+
+def text_rank(vector, name_column, q: str):
+    """Relevância: rank do texto completo somado à similaridade do nome"""
+    return func.ts_rank(vector, search_query(q)) + func.word_similarity(normalized(q), normalized(name_column))
@@ -1,20 +1,38 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from typing import Union
 from src.models.user import User
+from src.repositories.base import repository_for
 from uuid import UUID
 
 
+# Consultas compartilhadas pelas versões síncrona e assíncrona do repositório
+
+def _by_username_query(username: str):
+    return select(User).where(User.username == username)
+
+
+def _by_email_query(email: str):
+    return select(User).where(User.email == email)
+
+
+def _by_id_query(user_id: UUID):
+    return select(User).where(User.id == user_id)
+
+
 class UserRepository:
     def __init__(self, db: Session):
         self.db = db
 
     def get_by_username(self, username: str):
-        return self.db.query(User).filter(User.username == username).first()
+        return self.db.execute(_by_username_query(username)).scalars().first()
 
     def get_by_email(self, email: str):
-        return self.db.query(User).filter(User.email == email).first()
+        return self.db.execute(_by_email_query(email)).scalars().first()
 
     def get_by_id(self, user_id: UUID):
-        return self.db.query(User).filter(User.id == user_id).first()
+        return self.db.execute(_by_id_query(user_id)).scalars().first()
 
     def create(self, user_data: dict):
         user = User(**user_data)
@@ -22,3 +40,29 @@ class UserRepository:
         self.db.commit()
         self.db.refresh(user)
         return user
+
+
+class AsyncUserRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_by_username(self, username: str):
+        return (await self.db.execute(_by_username_query(username))).scalars().first()
+
+    async def get_by_email(self, email: str):
+        return (await self.db.execute(_by_email_query(email))).scalars().first()
+
+    async def get_by_id(self, user_id: UUID):
+        return (await self.db.execute(_by_id_query(user_id))).scalars().first()
+
+    async def create(self, user_data: dict):
+        user = User(**user_data)
+        self.db.add(user)
+        await self.db.commit()
+        await self.db.refresh(user)
+        return user
+
+
+def get_user_repository(db: Union[Session, AsyncSession]):
+    """Repositório de usuários com métodos aguardáveis, conforme o tipo da sessão"""
+    return repository_for(db, UserRepository, AsyncUserRepository)
@@ -0,0 +1,344 @@
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, List, Optional, Tuple
+import asyncio
+import heapq
+import itertools
+import math
+import sqlite3
+import threading
+import time
+
+from src.core.cache import TTLCache
+from src.core.config import settings
+from src.core.metrics import metrics
+
+
+# Prioridades na fila de espera (menor é atendida antes)
+PRIORITY_FIRST = 0   # Primeira geração do usuário para a lista de ingredientes
+PRIORITY_REPEAT = 1  # Nova geração de uma lista que o usuário já gerou
+
+# Chave do balde global, compartilhado por todos os usuários
+GLOBAL_BUCKET = "__global__"
+
+
+class RateLimitExceeded(Exception):
+    """Usuário excedeu seu limite de gerações (HTTP 429)"""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Limite de gerações excedido, tente novamente mais tarde")
+        self.retry_after = retry_after
+
+
+class ServiceOverloaded(Exception):
+    """Capacidade de geração esgotada no momento (HTTP 503)"""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Serviço de geração sobrecarregado, tente novamente mais tarde")
+        self.retry_after = retry_after
+
+
+def retry_after_header(seconds: float) -> dict:
+    """Cabeçalho Retry-After (segundos inteiros, arredondados para cima)"""
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
+
+
+class RateLimitBackend(ABC):
+    """Interface de armazenamento dos baldes de tokens (token buckets)"""
+
+    @abstractmethod
+    def take(self, key: str, rate: float, capacity: float) -> float:
+        """
+        Consome um token do balde `key`, reposto a `rate` tokens por segundo até
+        `capacity`. Retorna 0 se havia token, ou os segundos até haver um.
+        """
+
+    @abstractmethod
+    def refund(self, key: str, rate: float, capacity: float) -> None:
+        """Devolve ao balde `key` um token consumido por uma requisição que não foi atendida"""
+
+    def close(self) -> None:
+        """Libera recursos do backend"""
+
+
+def _refill(tokens: float, updated_at: float, now: float, rate: float, capacity: float) -> float:
+    return min(capacity, tokens + (now - updated_at) * rate)
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Baldes em memória do processo; baldes cheios há tempo suficiente são descartados (LRU/TTL)"""
+
+    def __init__(self, max_entries: int):
+        self.buckets = TTLCache(max_entries=max_entries, ttl=3600)
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, capacity: float) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self.buckets.get(key) or (capacity, now)
+            tokens = _refill(tokens, updated_at, now, rate, capacity)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            # Depois de (capacity / rate) segundos o balde estaria cheio: equivale a não existir
+            self.buckets.set(key, (tokens, now), ttl=capacity / rate)
+            return wait
+
+    def refund(self, key: str, rate: float, capacity: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                # Balde descartado: já estaria cheio
+                return
+            tokens = min(capacity, _refill(bucket[0], bucket[1], now, rate, capacity) + 1)
+            self.buckets.set(key, (tokens, now), ttl=capacity / rate)
+
+
+class SQLiteRateLimitBackend(RateLimitBackend):
+    """
+    Baldes compartilhados em arquivo SQLite, visíveis para todos os workers da máquina.
+    Serve de referência para backends compartilhados (ex.: Redis) e para testes.
+    """
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    def take(self, key: str, rate: float, capacity: float) -> float:
+        now = time.time()
+        with self._lock:
+            # BEGIN IMMEDIATE: leitura e escrita atômicas entre processos
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, updated_at FROM rate_limit_buckets WHERE key = ?", (key,)
+                ).fetchone()
+                tokens = capacity if row is None else _refill(row[0], row[1], now, rate, capacity)
+                wait = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / rate
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                    (key, tokens, now)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return wait
+
+    def refund(self, key: str, rate: float, capacity: float) -> None:
+        now = time.time()
+        with self._lock:
+            # Um único UPDATE: atômico entre processos sem transação explícita
+            self._conn.execute(
+                "UPDATE rate_limit_buckets "
+                "SET tokens = MIN(?, tokens + (? - updated_at) * ? + 1), updated_at = ? WHERE key = ?",
+                (capacity, now, rate, now, key)
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class AdmissionSlot:
+    """Vaga de geração concedida; release() é idempotente"""
+
+    def __init__(self, service: "AdmissionService"):
+        self._service = service
+        self._started = time.monotonic()
+        self._released = False
+
+    def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._service._release(time.monotonic() - self._started)
+
+
+class AdmissionService:
+    """
+    Controle de admissão das gerações com IA.
+
+    - Por usuário: balde de tokens (AI_USER_RATE_PER_MINUTE, rajadas de até
+      AI_USER_BURST); excedido, a requisição é recusada com 429. O token é
+      devolvido quando a geração não chega à LLM (refund_user).
+    - Global: balde de tokens das gerações que chegam à LLM (AI_GLOBAL_RATE_PER_MINUTE),
+      para não esgotar o limite do provedor, e no máximo AI_MAX_ACTIVE_GENERATIONS
+      gerações simultâneas no processo. As demais aguardam em uma fila limitada
+      (AI_ADMISSION_QUEUE_SIZE) por até AI_ADMISSION_QUEUE_TIMEOUT segundos, com
+      prioridade para as primeiras gerações de cada lista sobre as repetidas;
+      fila cheia, balde vazio ou espera esgotada são recusados com 503 (quem
+      desiste da fila devolve o token do balde global).
+
+    Os baldes ficam no backend (por processo ou compartilhado); a fila e as vagas
+    são sempre do processo.
+    """
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        max_active: int,
+        queue_size: int,
+        queue_timeout: float,
+        enabled: bool = True
+    ):
+        self.backend = backend
+        self.max_active = max(1, max_active)
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.enabled = enabled
+        self.active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._average_duration = 5.0  # Média móvel da duração das gerações (segundos)
+        # Listas de ingredientes já geradas por usuário, para priorizar as inéditas
+        self._generated = TTLCache(max_entries=settings.RATE_LIMIT_MAX_ENTRIES, ttl=settings.RECIPE_CACHE_TTL)
+        metrics.register_gauge("admission_queue_depth", lambda: len(self._waiters))
+        metrics.register_gauge("admission_active_generations", lambda: self.active)
+
+    def check_user(self, user_id: str) -> None:
+        """Consome um token do balde do usuário; sem token, RateLimitExceeded"""
+        if not self.enabled:
+            return
+        wait = self.backend.take(f"user:{user_id}", **self._user_bucket())
+        if wait > 0:
+            metrics.increment("admission_rejected_user_rate")
+            raise RateLimitExceeded(retry_after=wait)
+
+    def refund_user(self, user_id: str) -> None:
+        """
+        Devolve o token consumido em check_user() por uma requisição cuja geração
+        não chegou à LLM (atendida pelo cache, pela geração de outra requisição
+        ou recusada com 503)
+        """
+        if not self.enabled:
+            return
+        self.backend.refund(f"user:{user_id}", **self._user_bucket())
+
+    def priority(self, user_id: str, key: str) -> int:
+        """Prioridade da geração: inédita para o usuário ou repetida"""
+        if self._generated.get((user_id, key)) is not None:
+            return PRIORITY_REPEAT
+        return PRIORITY_FIRST
+
+    def mark_generated(self, user_id: str, key: str) -> None:
+        """
+        Registra a lista de ingredientes como já gerada pelo usuário. Chamado só
+        depois de uma geração bem-sucedida: quem recebeu 503 e tenta de novo
+        mantém a prioridade da primeira geração.
+        """
+        self._generated.set((user_id, key), True)
+
+    def _estimated_wait(self) -> float:
+        """Estimativa da espera até uma vaga, para o Retry-After"""
+        return self._average_duration * (len(self._waiters) + 1) / self.max_active
+
+    async def acquire(self, priority: int = PRIORITY_FIRST) -> AdmissionSlot:
+        """Obtém uma vaga de geração, aguardando na fila se necessário"""
+        if not self.enabled:
+            self.active += 1
+            return AdmissionSlot(self)
+
+        has_slot = self.active < self.max_active and not self._waiters
+        if not has_slot and len(self._waiters) >= self.queue_size:
+            metrics.increment("admission_rejected_queue_full")
+            raise ServiceOverloaded(retry_after=self._estimated_wait())
+
+        wait = self.backend.take(GLOBAL_BUCKET, **self._global_bucket())
+        if wait > 0:
+            metrics.increment("admission_rejected_global_rate")
+            raise ServiceOverloaded(retry_after=wait)
+
+        if has_slot:
+            self.active += 1
+            metrics.increment("admission_admitted")
+            return AdmissionSlot(self)
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._sequence), future)
+        heapq.heappush(self._waiters, entry)
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            # Nenhuma geração chega à LLM: o token do balde global é devolvido
+            self.backend.refund(GLOBAL_BUCKET, **self._global_bucket())
+            if future.done():
+                # A vaga foi concedida junto com o timeout/cancelamento: devolve
+                self._release(None)
+            else:
+                future.cancel()
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            if isinstance(e, asyncio.TimeoutError):
+                metrics.increment("admission_rejected_queue_timeout")
+                raise ServiceOverloaded(retry_after=self._estimated_wait())
+            raise
+
+        metrics.increment("admission_admitted")
+        metrics.observe("admission_wait_seconds", time.monotonic() - started)
+        return AdmissionSlot(self)
+
+    @staticmethod
+    def _user_bucket() -> dict:
+        return {"rate": settings.AI_USER_RATE_PER_MINUTE / 60, "capacity": settings.AI_USER_BURST}
+
+    @staticmethod
+    def _global_bucket() -> dict:
+        return {"rate": settings.AI_GLOBAL_RATE_PER_MINUTE / 60, "capacity": settings.AI_GLOBAL_BURST}
+
+    def _release(self, duration: Optional[float]) -> None:
+        """Devolve uma vaga, passando-a ao próximo da fila (por prioridade e ordem de chegada)"""
+        if duration is not None:
+            self._average_duration = 0.2 * duration + 0.8 * self._average_duration
+        self.active -= 1
+        while self._waiters and self.active < self.max_active:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self.active += 1
+                future.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_FIRST) -> AsyncIterator[AdmissionSlot]:
+        """Executa o bloco com uma vaga de geração"""
+        admission = await self.acquire(priority)
+        try:
+            yield admission
+        finally:
+            admission.release()
+
+    def close(self) -> None:
+        self.backend.close()
+
+
+def create_admission_service() -> AdmissionService:
+    """Cria o controle de admissão conforme as configurações"""
+    if settings.RATE_LIMIT_BACKEND == "sqlite":
+        backend = SQLiteRateLimitBackend(settings.RATE_LIMIT_SQLITE_PATH)
+    else:
+        backend = InMemoryRateLimitBackend(settings.RATE_LIMIT_MAX_ENTRIES)
+    return AdmissionService(
+        backend,
+        max_active=settings.AI_MAX_ACTIVE_GENERATIONS,
+        queue_size=settings.AI_ADMISSION_QUEUE_SIZE,
+        queue_timeout=settings.AI_ADMISSION_QUEUE_TIMEOUT,
+        enabled=settings.RATE_LIMIT_ENABLED
+    )
+
+
+# Instância única do serviço
+admission_service = create_admission_service()
@@ -1,27 +1,99 @@
-from groq import Groq
 from src.core.config import settings
-from src.api.schemas.recipe_schema import GeneratedRecipe, RecipeIngredientGenerated, RecipeStep
-import json
-from typing import List
+from src.core.metrics import metrics
+from src.core.normalization import fold_text
+from src.core.retry import Deadline, RetryPolicy
+from src.api.schemas.recipe_schema import GeneratedRecipe
+from src.services.llm_providers import ProviderRateLimitError, ProviderUnavailableError, create_providers
+from src.services.llm_router import ProviderRouter
+from src.services.recipe_parser import JsonObjectScanner, RecipeParseError, parse_generated_recipe, repair_json
+from contextlib import aclosing
+import asyncio
+import logging
+import re
+from typing import AsyncIterator, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Estilos atribuídos a cada geração paralela para garantir variedade entre as receitas
+RECIPE_STYLES = [
+    "culinária brasileira caseira",
+    "culinária italiana",
+    "culinária asiática, preparada na wok ou salteada",
+    "prato assado no forno",
+    "sopa, caldo ou ensopado",
+    "salada ou prato frio",
+    "culinária mexicana",
+    "prato grelhado ou na chapa",
+    "culinária mediterrânea ou árabe",
+    "omelete, torta ou fritada",
+]
+
+# Estratégias de geração de várias receitas: uma chamada à LLM por receita
+# (em paralelo) ou todas as receitas em uma única chamada
+STRATEGY_PARALLEL = "paralela"
+STRATEGY_BATCH = "lote"
+STRATEGIES = (STRATEGY_PARALLEL, STRATEGY_BATCH)
+
+# Limite de tokens da resposta por receita (multiplicado pelo número de receitas no lote)
+MAX_TOKENS_PER_RECIPE = 1000
+
+# Formato JSON pedido à LLM, usado na geração e nos pedidos de correção
+RECIPE_JSON_FORMAT = """{
+  "nome": "Nome da Receita",
+  "listaIngredientes": [
+    {"nome": "Nome do ingrediente", "quantidade": "quantidade com unidade"},
+    ...
+  ],
+  "passos": [
+    {"numero": 1, "descricao": "Descrição detalhada do primeiro passo"},
+    {"numero": 2, "descricao": "Descrição detalhada do segundo passo"},
+    ...
+  ]
+}"""
+
+# Falhas transitórias da LLM (limite de requisições, timeouts, erros 5xx e de conexão),
+# que justificam uma nova tentativa
+TRANSIENT_ERRORS = (ProviderRateLimitError, ProviderUnavailableError, asyncio.TimeoutError)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Espera pedida pelo provedor (cabeçalho Retry-After), se houver."""
+    return getattr(error, "retry_after", None)
+
+
+def normalize_recipe_name(name: str) -> str:
+    """Normaliza o nome de uma receita para comparação (minúsculas, sem acentos e pontuação)."""
+    folded = re.sub(r"[^a-z0-9 ]", " ", fold_text(name))
+    return " ".join(folded.split())
 
 
 class AIService:
-    def __init__(self):
-        if not settings.GROQ_API_KEY:
-            raise ValueError("GROQ_API_KEY não configurada no arquivo .env")
-        self.client = Groq(api_key=settings.GROQ_API_KEY)
+    def __init__(self, router: Optional[ProviderRouter] = None):
+        # Provedores de LLM (AI_PROVIDERS); sem nenhum configurado, o serviço é criado
+        # mesmo assim e as gerações falham com uma mensagem clara
+        self.router = router or ProviderRouter(create_providers(), hedge_enabled=settings.AI_HEDGE_ENABLED)
+        self.retry_policy = RetryPolicy(
+            max_attempts=settings.AI_MAX_ATTEMPTS,
+            base_delay=settings.AI_RETRY_BASE_DELAY,
+            max_delay=settings.AI_RETRY_MAX_DELAY
+        )
 
-    async def generate_recipe(self, ingredients: List[dict], exclude_recipes: List[str] = None) -> GeneratedRecipe:
-        """
-        Gera uma receita usando Groq (Llama 3.3) baseado nos ingredientes fornecidos.
-        
-        Args:
-            ingredients: Lista de dicts com formato [{"Ingrediente": "Tomate", "qtd": "2 unidades"}]
-            exclude_recipes: Lista de nomes de receitas que NÃO devem ser geradas novamente
-        
-        Returns:
-            GeneratedRecipe com nome, lista de ingredientes e passos
-        """
+    @property
+    def configured(self) -> bool:
+        """Se há ao menos um provedor de LLM configurado."""
+        return bool(self.router.providers)
+
+    async def aclose(self):
+        """Fecha os pools de conexões HTTP dos provedores."""
+        await self.router.aclose()
+
+    def _build_prompt(
+        self,
+        ingredients: List[dict],
+        exclude_recipes: Optional[List[str]] = None,
+        style: Optional[str] = None
+    ) -> str:
+        """Monta o prompt de geração de uma receita."""
         # Formata a lista de ingredientes para o prompt
         ingredients_text = "\n".join([
             f"- {ing['Ingrediente']}: {ing['qtd']}" 
@@ -33,8 +105,12 @@ class AIService:
         if exclude_recipes:
             exclusion_text = f"\n\nIMPORTANTE: NÃO crie nenhuma das seguintes receitas:\n" + "\n".join([f"- {recipe}" for recipe in exclude_recipes])
 
-        # Prompt para o Groq
-        prompt = f"""Você é um chef especializado em criar receitas deliciosas.
+        # Adiciona o estilo culinário, usado para diversificar gerações paralelas
+        if style:
+            exclusion_text += f"\n\nESTILO: a receita deve ser do tipo \"{style}\"."
+
+        # Prompt para a LLM
+        return f"""Você é um chef especializado em criar receitas deliciosas.
 
 Com base nos seguintes ingredientes disponíveis, crie UMA receita completa e saborosa:
 
@@ -42,18 +118,7 @@ Com base nos seguintes ingredientes disponíveis, crie UMA receita completa e sa
 
 IMPORTANTE: Retorne APENAS um objeto JSON válido sem nenhum texto adicional, seguindo exatamente este formato:
 
-{{
-  "nome": "Nome da Receita",
-  "listaIngredientes": [
-    {{"nome": "Nome do ingrediente", "quantidade": "quantidade com unidade"}},
-    ...
-  ],
-  "passos": [
-    {{"numero": 1, "descricao": "Descrição detalhada do primeiro passo"}},
-    {{"numero": 2, "descricao": "Descrição detalhada do segundo passo"}},
-    ...
-  ]
-}}
+{RECIPE_JSON_FORMAT}
 
 Regras:
 1. Use TODOS os ingredientes fornecidos
@@ -62,94 +127,569 @@ Regras:
 4. A receita deve ser realista e fácil de seguir
 5. Retorne APENAS o JSON, sem markdown, sem explicações, sem código blocks"""
 
-        try:
-            # Chama a API da Groq
-            response = self.client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Você é um assistente que retorna apenas JSON válido, sem formatação markdown."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.7,
-                max_tokens=1000
+    def _build_batch_prompt(
+        self,
+        ingredients: List[dict],
+        count: int,
+        exclude_recipes: Optional[List[str]] = None
+    ) -> str:
+        """Monta o prompt de geração de `count` receitas distintas em uma única resposta."""
+        ingredients_text = "\n".join([
+            f"- {ing['Ingrediente']}: {ing['qtd']}"
+            for ing in ingredients
+        ])
+
+        exclusion_text = ""
+        if exclude_recipes:
+            exclusion_text = f"\n\nIMPORTANTE: NÃO crie nenhuma das seguintes receitas:\n" + "\n".join([f"- {recipe}" for recipe in exclude_recipes])
+
+        # Um estilo por receita, como nas gerações paralelas, para garantir variedade
+        offset = len(exclude_recipes or [])
+        styles_text = "\n".join([
+            f"{i}. {RECIPE_STYLES[(offset + i - 1) % len(RECIPE_STYLES)]}"
+            for i in range(1, count + 1)
+        ])
+
+        return f"""Você é um chef especializado em criar receitas deliciosas.
+
+Com base nos seguintes ingredientes disponíveis, crie {count} receitas completas, saborosas e diferentes entre si:
+
+{ingredients_text}{exclusion_text}
+
+ESTILOS: a receita 1 deve ser do tipo do estilo 1, a receita 2 do estilo 2, e assim por diante:
+{styles_text}
+
+IMPORTANTE: Retorne APENAS um array JSON válido com {count} objetos, sem nenhum texto adicional, cada objeto seguindo exatamente este formato:
+
+{RECIPE_JSON_FORMAT}
+
+Regras:
+1. Use TODOS os ingredientes fornecidos em cada receita
+2. Pode sugerir ingredientes básicos adicionais (sal, pimenta, óleo, água) se necessário
+3. Crie entre 5-8 passos detalhados e claros em cada receita
+4. As receitas devem ter nomes diferentes, ser realistas e fáceis de seguir
+5. Retorne APENAS o array JSON, sem markdown, sem explicações, sem código blocks"""
+
+    def _build_repair_prompt(self, content: str, error: str) -> str:
+        """Monta o pedido de correção de uma resposta com JSON inválido ou incompleto."""
+        return f"""A resposta abaixo deveria ser uma receita em JSON, mas está inválida ou incompleta ({error}).
+
+{content}
+
+Corrija-a e retorne APENAS o objeto JSON completo, mantendo a mesma receita, exatamente neste formato:
+
+{RECIPE_JSON_FORMAT}"""
+
+    def _build_messages(self, prompt: str) -> List[dict]:
+        """Monta as mensagens enviadas à LLM."""
+        return [
+            {
+                "role": "system",
+                "content": "Você é um assistente que retorna apenas JSON válido, sem formatação markdown."
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+
+    def _stream(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = MAX_TOKENS_PER_RECIPE,
+        timeout: float = settings.AI_REQUEST_TIMEOUT
+    ) -> AsyncIterator[str]:
+        """Chama a LLM em streaming, emitindo cada trecho de texto assim que chega."""
+        return self.router.stream(self._build_messages(prompt), temperature, max_tokens, timeout)
+
+    async def _complete(
+        self,
+        prompt: str,
+        on_token: Optional[Callable[[str], None]] = None,
+        temperature: float = 0.7,
+        timeout: float = settings.AI_REQUEST_TIMEOUT
+    ) -> str:
+        """
+        Chama a LLM sem bloquear o event loop e retorna o texto da resposta.
+        Se on_token for informado, a resposta é recebida em streaming e cada
+        trecho de texto é repassado ao callback assim que chega.
+
+        Sem streaming, a resposta é pedida no modo JSON (AI_JSON_MODE).
+        """
+        if on_token is None:
+            return await self.router.complete(
+                self._build_messages(prompt),
+                temperature,
+                MAX_TOKENS_PER_RECIPE,
+                timeout,
+                json_mode=settings.AI_JSON_MODE
             )
 
-            # Extrai o conteúdo da resposta
-            content = response.choices[0].message.content.strip()
-            
-            # Remove markdown code blocks se existirem
-            if content.startswith("```json"):
-                content = content[7:]
-            elif content.startswith("```"):
-                content = content[3:]
-            if content.endswith("```"):
-                content = content[:-3]
-            content = content.strip()
-
-            # Parse do JSON
-            recipe_data = json.loads(content)
-
-            # Converte para o schema Pydantic
-            recipe = GeneratedRecipe(
-                nome=recipe_data["nome"],
-                listaIngredientes=[
-                    RecipeIngredientGenerated(
-                        nome=ing["nome"],
-                        quantidade=ing["quantidade"]
-                    ) for ing in recipe_data["listaIngredientes"]
-                ],
-                passos=[
-                    RecipeStep(
-                        numero=step["numero"],
-                        descricao=step["descricao"]
-                    ) for step in recipe_data["passos"]
-                ]
+        chunks = []
+        async with aclosing(self._stream(prompt, temperature=temperature, timeout=timeout)) as stream:
+            async for delta in stream:
+                chunks.append(delta)
+                on_token(delta)
+        return "".join(chunks)
+
+    def _parse_recipe(self, content: str) -> GeneratedRecipe:
+        """Converte o texto retornado pela LLM em uma GeneratedRecipe."""
+        return parse_generated_recipe(content)
+
+    async def _generate_once(
+        self,
+        prompt: str,
+        deadline: Deadline,
+        on_token: Optional[Callable[[str], None]] = None
+    ) -> GeneratedRecipe:
+        """
+        Uma tentativa de geração. Se a resposta tiver JSON inválido ou incompleto,
+        ela é enviada de volta à LLM para correção (mais barato que gerar outra receita).
+        """
+        timeout = deadline.timeout(settings.AI_REQUEST_TIMEOUT)
+        # wait_for limita também o tempo total do streaming, não só cada leitura
+        content = await asyncio.wait_for(self._complete(prompt, on_token=on_token, timeout=timeout), timeout)
+        try:
+            return self._parse_recipe(content)
+        except RecipeParseError as e:
+            if not settings.AI_REPAIR_ENABLED or "{" not in content or deadline.expired():
+                raise
+            metrics.increment("ai_repairs")
+            timeout = deadline.timeout(settings.AI_REQUEST_TIMEOUT)
+            repaired = await asyncio.wait_for(
+                self._complete(self._build_repair_prompt(content, str(e)), temperature=0, timeout=timeout),
+                timeout
             )
+            recipe = self._parse_recipe(repaired)
+            metrics.increment("ai_repair_successes")
+            return recipe
 
+    async def generate_recipe(
+        self,
+        ingredients: List[dict],
+        exclude_recipes: List[str] = None,
+        style: Optional[str] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+        deadline: Optional[Deadline] = None
+    ) -> GeneratedRecipe:
+        """
+        Gera uma receita usando a LLM (provedores de AI_PROVIDERS) baseado nos ingredientes fornecidos.
+
+        Falhas transitórias (429, timeouts, erros 5xx) e respostas que não puderam
+        ser corrigidas são tentadas novamente, até AI_MAX_ATTEMPTS vezes, com backoff
+        exponencial e jitter (respeitando o Retry-After do provedor), desde que a
+        espera caiba no orçamento de tempo restante.
+        
+        Args:
+            ingredients: Lista de dicts com formato [{"Ingrediente": "Tomate", "qtd": "2 unidades"}]
+            exclude_recipes: Lista de nomes de receitas que NÃO devem ser geradas novamente
+            style: Estilo culinário que a receita deve seguir (opcional)
+            on_token: Callback chamado com cada trecho de texto recebido (opcional);
+                a cada nova tentativa, o texto recomeça
+            deadline: Orçamento de tempo compartilhado (padrão: AI_GENERATION_DEADLINE)
+        
+        Returns:
+            GeneratedRecipe com nome, lista de ingredientes e passos
+        """
+        prompt = self._build_prompt(ingredients, exclude_recipes, style)
+        deadline = deadline or Deadline(settings.AI_GENERATION_DEADLINE)
+
+        attempt = 0
+        while True:
+            if deadline.expired():
+                raise Exception("Erro ao gerar receita com IA: tempo limite da geração esgotado")
+            try:
+                return await self._generate_once(prompt, deadline, on_token=on_token)
+            except Exception as e:
+                delay = self.retry_policy.delay(attempt, _retry_after(e))
+                retryable = isinstance(e, TRANSIENT_ERRORS + (RecipeParseError,))
+                if not retryable or not self.retry_policy.should_retry(attempt, delay, deadline):
+                    if isinstance(e, ValueError):
+                        raise
+                    raise Exception(f"Erro ao gerar receita com IA: {str(e) or type(e).__name__}")
+
+                metrics.increment("ai_retries")
+                if isinstance(e, ProviderRateLimitError):
+                    metrics.increment("ai_rate_limited")
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def _generate_batch(
+        self,
+        ingredients: List[dict],
+        count: int,
+        deadline: Deadline,
+        on_token: Optional[Callable[[int, int, str], None]] = None
+    ) -> AsyncIterator[GeneratedRecipe]:
+        """
+        Gera as receitas em uma única chamada à LLM, que responde com um array JSON.
+
+        A resposta é lida em streaming e cada receita é emitida assim que seu objeto
+        fecha, sem esperar pelas demais; um objeto cortado no fim da resposta é
+        reparado e aproveitado, se válido. Receitas que ainda faltarem (inválidas
+        ou repetidas) são pedidas em uma nova chamada (só as que faltam, excluindo
+        as já obtidas), até AI_DEDUP_MAX_ROUNDS vezes. Falhas transitórias são
+        contadas à parte e seguem a retry_policy (AI_MAX_ATTEMPTS falhas seguidas).
+        Tudo dentro do orçamento de tempo `deadline`.
+
+        on_token, se informado, recebe (índice da receita em andamento, chamada, trecho).
+        """
+        accepted_names = []
+        seen_names = set()
+        call = 0      # Chamadas feitas à LLM
+        rounds = 0    # Respostas completas que não trouxeram todas as receitas
+        failures = 0  # Falhas transitórias seguidas
+
+        def new_recipe(text: str) -> Optional[GeneratedRecipe]:
+            """Receita válida e ainda não obtida no texto, ou None"""
+            try:
+                recipe = self._parse_recipe(text)
+            except RecipeParseError:
+                return None
+            name_key = normalize_recipe_name(recipe.nome)
+            if name_key in seen_names:
+                return None
+            seen_names.add(name_key)
+            accepted_names.append(recipe.nome)
             return recipe
 
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Erro ao processar resposta da IA: {str(e)}. Resposta: {content}")
-        except Exception as e:
-            raise Exception(f"Erro ao gerar receita com IA: {str(e)}")
+        while len(accepted_names) < count and not deadline.expired():
+            missing = count - len(accepted_names)
+            prompt = self._build_batch_prompt(ingredients, missing, list(accepted_names) or None)
+            scanner = JsonObjectScanner()
+            error = None
+            try:
+                async with aclosing(self._stream(
+                    prompt,
+                    max_tokens=MAX_TOKENS_PER_RECIPE * missing,
+                    timeout=deadline.remaining()
+                )) as stream:
+                    while True:
+                        # Limita o tempo total da chamada ao orçamento restante
+                        try:
+                            delta = await asyncio.wait_for(stream.__anext__(), deadline.remaining())
+                        except StopAsyncIteration:
+                            break
+                        if len(accepted_names) >= count:
+                            # Só resta o fim do array e o consumo de tokens (último trecho)
+                            continue
+                        if on_token is not None:
+                            on_token(len(accepted_names), call, delta)
+
+                        for text in scanner.feed(delta):
+                            recipe = new_recipe(text)
+                            if recipe is not None:
+                                yield recipe
+                                if len(accepted_names) >= count:
+                                    break
+            except TRANSIENT_ERRORS as e:
+                error = e
+            call += 1
 
-    async def generate_multiple_recipes(self, ingredients: List[dict], count: int = 5) -> List[GeneratedRecipe]:
+            # Objeto cortado pelo limite de tokens, por uma falha ou pelo fim do
+            # orçamento: reparado antes de pedir de novo as receitas que faltam
+            pending = scanner.pending()
+            if pending is not None and len(accepted_names) < count:
+                recipe = new_recipe(repair_json(pending))
+                if recipe is not None:
+                    metrics.increment("ai_batch_truncated_recovered")
+                    yield recipe
+
+            if len(accepted_names) >= count:
+                break
+
+            if error is None:
+                failures = 0
+                rounds += 1
+                if rounds > settings.AI_DEDUP_MAX_ROUNDS:
+                    break
+                delay = 0
+            else:
+                logger.warning("Erro ao gerar receitas em lote: %s", str(error) or type(error).__name__)
+                delay = self.retry_policy.delay(failures, _retry_after(error))
+                if not self.retry_policy.should_retry(failures, delay, deadline):
+                    break
+                failures += 1
+                metrics.increment("ai_retries")
+                if isinstance(error, ProviderRateLimitError):
+                    metrics.increment("ai_rate_limited")
+            await asyncio.sleep(delay)
+
+    async def generate_multiple_recipes(
+        self,
+        ingredients: List[dict],
+        count: int = 5,
+        concurrent: bool = True,
+        strategy: Optional[str] = None
+    ) -> List[GeneratedRecipe]:
         """
-        Gera múltiplas receitas diferentes usando requisições sequenciais à LLM.
-        Cada receita subsequente exclui as anteriores para garantir variedade.
+        Gera múltiplas receitas diferentes.
+
+        Na estratégia "paralela" (padrão de AI_GENERATION_STRATEGY), cada receita é
+        uma chamada à LLM. No modo concorrente (padrão), as requisições à LLM são feitas em paralelo,
+        limitadas por AI_MAX_CONCURRENCY. Cada requisição recebe um estilo culinário
+        distinto e, ao final, receitas com nomes repetidos ou que falharam são geradas novamente.
+        No modo sequencial, cada receita exclui as anteriores para garantir variedade.
+
+        Na estratégia "lote", todas as receitas são pedidas em uma única chamada,
+        sem repetir o prompt a cada receita (menos tokens de entrada e uma só ida e volta).
+        Um erro não transitório da chamada é repassado a quem chamou se nenhuma
+        receita chegou; depois da primeira, as já recebidas são o resultado parcial.
+
+        Todas as chamadas, incluindo novas tentativas, compartilham o orçamento
+        AI_GENERATION_DEADLINE. Se ele se esgotar antes, a lista retornada tem
+        menos que `count` receitas (resultado parcial).
         
         Args:
             ingredients: Lista de dicts com formato [{"Ingrediente": "Tomate", "qtd": "2 unidades"}]
             count: Número de receitas a gerar (padrão: 5)
+            concurrent: Se True, gera as receitas em paralelo (estratégia "paralela")
+            strategy: "paralela" ou "lote" (padrão: AI_GENERATION_STRATEGY)
         
         Returns:
             List[GeneratedRecipe]: Lista com as receitas geradas
         """
+        deadline = Deadline(settings.AI_GENERATION_DEADLINE)
+        if (strategy or settings.AI_GENERATION_STRATEGY) == STRATEGY_BATCH:
+            recipes = []
+            try:
+                async with aclosing(self._generate_batch(ingredients, count, deadline)) as batch:
+                    async for recipe in batch:
+                        recipes.append(recipe)
+            except Exception:
+                if not recipes:
+                    raise
+                # Receitas já recebidas são devolvidas como resultado parcial
+                logger.exception("Erro ao gerar receitas em lote após %d de %d receitas", len(recipes), count)
+        elif concurrent:
+            recipes = await self._generate_concurrent(ingredients, count, deadline)
+        else:
+            recipes = await self._generate_sequential(ingredients, count, deadline)
+
+        if len(recipes) < count:
+            metrics.increment("ai_partial_generations")
+        return recipes
+
+    async def _generate_sequential(self, ingredients: List[dict], count: int, deadline: Deadline) -> List[GeneratedRecipe]:
+        """Gera as receitas uma por vez, excluindo as anteriores a cada requisição."""
         recipes = []
         exclude_list = []
         
         for i in range(count):
+            if deadline.expired():
+                break
             try:
                 # Gera receita com restrições das anteriores
-                recipe = await self.generate_recipe(ingredients, exclude_recipes=exclude_list if exclude_list else None)
+                recipe = await self.generate_recipe(
+                    ingredients,
+                    exclude_recipes=exclude_list if exclude_list else None,
+                    deadline=deadline
+                )
                 recipes.append(recipe)
                 
                 # Adiciona o nome da receita à lista de exclusão
                 exclude_list.append(recipe.nome)
                 
             except Exception as e:
-                print(f"Erro ao gerar receita {i+1}/{count}: {str(e)}")
+                logger.warning("Erro ao gerar receita %d/%d: %s", i + 1, count, e)
                 # Continua tentando gerar as próximas mesmo se uma falhar
                 continue
         
         return recipes
 
+    async def _generate_concurrent(self, ingredients: List[dict], count: int, deadline: Deadline) -> List[GeneratedRecipe]:
+        """
+        Gera as receitas em paralelo, cada uma com um estilo distinto.
+        Apenas as receitas com nome repetido ou que falharam são solicitadas
+        novamente, excluindo os nomes já obtidos.
+        """
+        semaphore = asyncio.Semaphore(max(1, settings.AI_MAX_CONCURRENCY))
+
+        async def generate_slot(slot: int, exclude_list: Optional[List[str]]) -> GeneratedRecipe:
+            async with semaphore:
+                return await self.generate_recipe(
+                    ingredients,
+                    exclude_recipes=exclude_list,
+                    style=RECIPE_STYLES[slot % len(RECIPE_STYLES)],
+                    deadline=deadline
+                )
+
+        recipes = []
+        seen_names = set()
+        slots = list(range(count))
+
+        for round_number in range(settings.AI_DEDUP_MAX_ROUNDS + 1):
+            exclude_list = [recipe.nome for recipe in recipes] or None
+            results = await asyncio.gather(
+                *(generate_slot(slot + round_number * count, exclude_list) for slot in slots),
+                return_exceptions=True
+            )
+
+            retry_slots = []
+            for slot, result in zip(slots, results):
+                if isinstance(result, Exception):
+                    logger.warning("Erro ao gerar receita %d/%d: %s", slot + 1, count, result)
+                    retry_slots.append(slot)
+                    continue
+
+                name_key = normalize_recipe_name(result.nome)
+                if name_key in seen_names:
+                    retry_slots.append(slot)
+                    continue
+
+                seen_names.add(name_key)
+                recipes.append(result)
+
+            if not retry_slots or deadline.expired():
+                break
+            slots = retry_slots
+
+        return recipes
+
+    async def stream_recipes(
+        self,
+        ingredients: List[dict],
+        count: int = 5,
+        include_tokens: bool = False,
+        strategy: Optional[str] = None
+    ) -> AsyncIterator[dict]:
+        """
+        Gera receitas em paralelo e emite eventos à medida que cada uma fica pronta.
+        Na estratégia "lote" (ver generate_multiple_recipes), cada receita é emitida
+        assim que seu objeto fecha na resposta única da LLM.
+
+        Eventos emitidos:
+            {"tipo": "token", "indice": i, "tentativa": t, "conteudo": "..."}  (apenas com include_tokens)
+            {"tipo": "receita", "indice": i, "receita": GeneratedRecipe}
+            {"tipo": "erro", "indice": i, "detalhe": "..."}
+            {"tipo": "fim", "total": n, "parcial": bool}
+
+        Receitas com nome repetido ou que falharam não são emitidas: o slot é
+        gerado novamente (nova tentativa) enquanto houver rodadas e orçamento de
+        tempo (AI_GENERATION_DEADLINE); só então é emitido o erro. "parcial"
+        indica que foram emitidas menos que `count` receitas. Ao encerrar o
+        gerador, por exemplo quando o cliente desconecta, as chamadas à LLM
+        ainda pendentes são canceladas.
+        """
+        deadline = Deadline(settings.AI_GENERATION_DEADLINE)
+        if (strategy or settings.AI_GENERATION_STRATEGY) == STRATEGY_BATCH:
+            async with aclosing(self._stream_batch_events(ingredients, count, include_tokens, deadline)) as events:
+                async for event in events:
+                    yield event
+            return
+
+        semaphore = asyncio.Semaphore(max(1, settings.AI_MAX_CONCURRENCY))
+        queue: asyncio.Queue = asyncio.Queue()
+        tasks = set()
+        seen_names = set()
+        accepted_names = []
+
+        async def generate_slot(index: int, attempt: int, exclude_list: Optional[List[str]]):
+            on_token = None
+            if include_tokens:
+                on_token = lambda text: queue.put_nowait(("token", index, attempt, text))
+            try:
+                async with semaphore:
+                    recipe = await self.generate_recipe(
+                        ingredients,
+                        exclude_recipes=exclude_list,
+                        style=RECIPE_STYLES[(index + attempt * count) % len(RECIPE_STYLES)],
+                        on_token=on_token,
+                        deadline=deadline
+                    )
+                queue.put_nowait(("receita", index, attempt, recipe))
+            except Exception as e:
+                queue.put_nowait(("erro", index, attempt, e))
+
+        def start_slot(index: int, attempt: int):
+            task = asyncio.create_task(generate_slot(index, attempt, list(accepted_names) or None))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        for index in range(count):
+            start_slot(index, 0)
+
+        pending = count
+        try:
+            while pending:
+                kind, index, attempt, payload = await queue.get()
+
+                if kind == "token":
+                    yield {"tipo": "token", "indice": index, "tentativa": attempt, "conteudo": payload}
+                    continue
+
+                if kind == "erro":
+                    logger.warning("Erro ao gerar receita %d/%d: %s", index + 1, count, payload)
+                    if attempt < settings.AI_DEDUP_MAX_ROUNDS and not deadline.expired():
+                        start_slot(index, attempt + 1)
+                        continue
+                    pending -= 1
+                    yield {"tipo": "erro", "indice": index, "detalhe": str(payload)}
+                    continue
+
+                name_key = normalize_recipe_name(payload.nome)
+                if name_key in seen_names:
+                    if attempt < settings.AI_DEDUP_MAX_ROUNDS and not deadline.expired():
+                        start_slot(index, attempt + 1)
+                        continue
+                    pending -= 1
+                    yield {"tipo": "erro", "indice": index, "detalhe": f"Receita repetida: {payload.nome}"}
+                    continue
+
+                seen_names.add(name_key)
+                accepted_names.append(payload.nome)
+                pending -= 1
+                yield {"tipo": "receita", "indice": index, "receita": payload}
+
+            if len(accepted_names) < count:
+                metrics.increment("ai_partial_generations")
+            yield {"tipo": "fim", "total": len(accepted_names), "parcial": len(accepted_names) < count}
+        finally:
+            for task in list(tasks):
+                task.cancel()
+
+    async def _stream_batch_events(
+        self,
+        ingredients: List[dict],
+        count: int,
+        include_tokens: bool,
+        deadline: Deadline
+    ) -> AsyncIterator[dict]:
+        """Eventos de stream_recipes na estratégia "lote"."""
+        queue: asyncio.Queue = asyncio.Queue()
+        on_token = None
+        if include_tokens:
+            on_token = lambda index, attempt, text: queue.put_nowait(
+                {"tipo": "token", "indice": index, "tentativa": attempt, "conteudo": text}
+            )
+
+        async def generate():
+            total = 0
+            try:
+                async with aclosing(self._generate_batch(ingredients, count, deadline, on_token)) as batch:
+                    async for recipe in batch:
+                        queue.put_nowait({"tipo": "receita", "indice": total, "receita": recipe})
+                        total += 1
+            except Exception as e:
+                logger.exception("Erro ao gerar receitas em lote")
+                queue.put_nowait({"tipo": "erro", "indice": total, "detalhe": str(e)})
+            if total < count:
+                metrics.increment("ai_partial_generations")
+            queue.put_nowait({"tipo": "fim", "total": total, "parcial": total < count})
+
+        # Os tokens são emitidos pelo callback durante a leitura da resposta,
+        # intercalados com as receitas na ordem em que chegam
+        task = asyncio.create_task(generate())
+        try:
+            while True:
+                event = await queue.get()
+                yield event
+                if event["tipo"] == "fim":
+                    break
+        finally:
+            task.cancel()
+
 
 # Instância única do serviço
 ai_service = AIService()
@@ -0,0 +1,229 @@
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import heapq
+import threading
+
+from src.core.cache import TTLCache
+from src.core.config import settings
+from src.core.metrics import metrics
+from src.core.normalization import canonical_ingredient_name
+from src.core.quantities import Quantity, sum_quantities
+from src.core.singleflight import SingleFlight
+
+
+# Ingrediente como (nome original, nome canônico, quantidade convertida, unidade canônica),
+# com None nos campos ainda não preenchidos ou não reconhecidos
+IngredientRow = Tuple[str, Optional[str], Optional[float], Optional[str]]
+
+
+def ingredient_key(row: IngredientRow) -> str:
+    """Chave do ingrediente no índice: o nome canônico, calculado se ainda não armazenado"""
+    return row[1] or canonical_ingredient_name(row[0])
+
+
+def ingredient_quantity(row: IngredientRow) -> Optional[Quantity]:
+    """Quantidade convertida do ingrediente, se reconhecida"""
+    amount, unit = row[2], row[3]
+    return Quantity(amount, unit) if amount is not None and unit else None
+
+
+@dataclass(frozen=True)
+class IndexedRecipe:
+    """Receita no índice: ingredientes normalizados, nomes originais (para exibir os faltantes) e quantidades"""
+    id: str
+    name: str
+    ingredients: Dict[str, str]  # nome canônico -> nome original
+    quantities: Dict[str, Quantity]  # nome canônico -> quantidade (apenas as reconhecidas)
+
+
+@dataclass(frozen=True)
+class CookableMatch:
+    recipe: IndexedRecipe
+    coverage: float
+    missing: List[str]
+    insufficient: List[str]
+
+
+class CookableIndex:
+    """
+    Índice invertido das receitas de um usuário: nome canônico do
+    ingrediente -> ids das receitas que o usam.
+
+    A pontuação percorre apenas as listas dos itens da despensa, contando
+    quantos ingredientes de cada receita estão cobertos (interseção de conjuntos),
+    sem examinar as receitas que não usam nenhum deles.
+    """
+
+    def __init__(self):
+        self.recipes: Dict[str, IndexedRecipe] = {}
+        self.postings: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, recipe_id: str, name: str, ingredient_rows: Iterable[IngredientRow]) -> None:
+        """Adiciona (ou substitui) uma receita no índice"""
+        ingredients, quantities = {}, {}
+        for row in ingredient_rows:
+            key = ingredient_key(row)
+            if not key:
+                continue
+            ingredients.setdefault(key, row[0])
+            quantity = ingredient_quantity(row)
+            if quantity is None:
+                continue
+            previous = quantities.get(key)
+            if previous is None:
+                quantities[key] = quantity
+            elif previous.unit == quantity.unit:
+                # Ingrediente repetido na receita: soma as quantidades
+                quantities[key] = Quantity(previous.amount + quantity.amount, quantity.unit)
+        if not ingredients:
+            return
+
+        with self._lock:
+            self._remove(recipe_id)
+            self.recipes[recipe_id] = IndexedRecipe(recipe_id, name, ingredients, quantities)
+            for key in ingredients:
+                self.postings.setdefault(key, set()).add(recipe_id)
+
+    def remove(self, recipe_id: str) -> None:
+        """Remove uma receita do índice, se presente"""
+        with self._lock:
+            self._remove(recipe_id)
+
+    def _remove(self, recipe_id: str) -> None:
+        recipe = self.recipes.pop(recipe_id, None)
+        if recipe is None:
+            return
+        for key in recipe.ingredients:
+            ids = self.postings.get(key)
+            if ids is not None:
+                ids.discard(recipe_id)
+                if not ids:
+                    del self.postings[key]
+
+    def match(self, pantry: Iterable[IngredientRow], limit: int, min_coverage: float = 0.0) -> List[CookableMatch]:
+        """
+        Até `limit` receitas que usam ao menos um item da despensa, ordenadas
+        pela fração dos ingredientes cobertos e, em seguida, pelo número de
+        itens faltantes. Os faltantes são listados apenas para as selecionadas,
+        assim como os presentes em quantidade menor que a pedida pela receita
+        (comparados apenas quando ambas as quantidades estão na mesma unidade).
+        """
+        pantry = [(ingredient_key(row), ingredient_quantity(row)) for row in pantry]
+        available = {key for key, _ in pantry if key}
+        totals = sum_quantities(pantry)
+        with self._lock:
+            covered: Dict[str, int] = {}
+            for key in available:
+                for recipe_id in self.postings.get(key, ()):
+                    covered[recipe_id] = covered.get(recipe_id, 0) + 1
+
+            candidates = []
+            for recipe_id, count in covered.items():
+                recipe = self.recipes[recipe_id]
+                total = len(recipe.ingredients)
+                if count / total >= min_coverage:
+                    candidates.append((-count / total, total - count, recipe.name, recipe_id))
+
+            selected = [
+                (self.recipes[recipe_id], -negative_coverage)
+                for negative_coverage, _, _, recipe_id in heapq.nsmallest(limit, candidates)
+            ]
+
+        return [
+            CookableMatch(
+                recipe=recipe,
+                coverage=coverage,
+                missing=[
+                    original for key, original in recipe.ingredients.items()
+                    if key not in available
+                ],
+                insufficient=[
+                    recipe.ingredients[key] for key, needed in recipe.quantities.items()
+                    if key in available and totals.get((key, needed.unit), needed.amount) < needed.amount
+                ]
+            )
+            for recipe, coverage in selected
+        ]
+
+    def __len__(self) -> int:
+        return len(self.recipes)
+
+
+# Linhas (recipe_id, nome da receita, nome do ingrediente, nome canônico, quantidade, unidade)
+# usadas para construir o índice
+IndexRows = Iterable[Tuple[object, str, str, Optional[str], Optional[float], Optional[str]]]
+
+
+class CookableService:
+    """
+    Índices de "o que dá para cozinhar", um por usuário, mantidos em memória.
+
+    O índice é construído na primeira consulta do usuário e atualizado a cada
+    receita salva ou removida neste processo; a validade (TTL) limita a
+    defasagem em relação a alterações feitas por outros processos.
+    """
+
+    def __init__(self, max_users: int, ttl: float):
+        self.indexes = TTLCache(max_entries=max_users, ttl=ttl)
+        self.in_flight = SingleFlight()
+        # Usuários alterados durante a construção do índice (descartado ao terminar)
+        self._stale: Set[str] = set()
+        metrics.register_gauge("cookable_indexes", lambda: len(self.indexes))
+
+    async def get_index(self, user_id: str, load: Callable[[], Awaitable[IndexRows]]) -> CookableIndex:
+        """Índice do usuário, construído com load() se ainda não estiver em memória"""
+        index = self.indexes.get(user_id)
+        if index is not None:
+            return index
+
+        async def build() -> CookableIndex:
+            self._stale.discard(user_id)
+            rows = await load()
+            index = CookableIndex()
+            ingredients_by_recipe: Dict[str, Tuple[str, List[IngredientRow]]] = {}
+            for recipe_id, recipe_name, *ingredient_row in rows:
+                ingredients_by_recipe.setdefault(str(recipe_id), (recipe_name, []))[1].append(
+                    tuple(ingredient_row)
+                )
+            for recipe_id, (recipe_name, ingredient_rows) in ingredients_by_recipe.items():
+                index.add(recipe_id, recipe_name, ingredient_rows)
+
+            metrics.increment("cookable_index_builds")
+            if user_id not in self._stale:
+                self.indexes.set(user_id, index)
+            return index
+
+        return await self.in_flight.do(user_id, build)
+
+    def add_recipes(self, user_id: str, recipes: List[dict]) -> None:
+        """Atualiza o índice do usuário (se em memória) com receitas salvas"""
+        if user_id in self.in_flight:
+            self._stale.add(user_id)
+        index = self.indexes.get(user_id)
+        if index is None:
+            return
+        for recipe in recipes:
+            index.add(
+                str(recipe['id']),
+                recipe['name'],
+                [
+                    (ing['name'], ing.get('canonical_name'), ing.get('amount'), ing.get('amount_unit'))
+                    for ing in recipe['recipe_ingredients']
+                ]
+            )
+
+    def remove_recipe(self, user_id: str, recipe_id: str) -> None:
+        """Remove uma receita do índice do usuário (se em memória)"""
+        if user_id in self.in_flight:
+            self._stale.add(user_id)
+        index = self.indexes.get(user_id)
+        if index is not None:
+            index.remove(str(recipe_id))
+
+
+# Instância única do serviço
+cookable_service = CookableService(
+    max_users=settings.COOKABLE_INDEX_MAX_USERS,
+    ttl=settings.COOKABLE_INDEX_TTL
+)
@@ -0,0 +1,142 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+import asyncio
+import io
+import multiprocessing
+import warnings
+
+from src.core.config import settings
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow é opcional: sem ele, as imagens são salvas como enviadas
+    Image = None
+
+try:
+    from pillow_heif import register_heif_opener
+    register_heif_opener()
+except ImportError:  # Sem pillow-heif, imagens HEIC são salvas como enviadas
+    pass
+
+
+# Tamanhos (lado maior, em pixels) das miniaturas geradas para cada imagem
+THUMBNAIL_SIZES = {
+    "sm": 160,
+    "md": 480,
+}
+
+# Nome do arquivo da imagem principal dentro da pasta de cada imagem processada
+FULL_IMAGE_NAME = "full"
+
+
+class ImageTooLargeError(ValueError):
+    """Imagem com mais pixels que IMAGE_MAX_PIXELS (possível bomba de descompressão)"""
+
+
+def thumbnail_paths(image_path: str) -> Dict[str, str]:
+    """
+    Retorna os caminhos das miniaturas de uma imagem processada
+    (ex.: "ingredients/<uuid>/full.webp" -> {"sm": "ingredients/<uuid>/sm.webp", ...}).
+    Imagens antigas, salvas sem processamento, não têm miniaturas.
+    """
+    suffix = f"/{FULL_IMAGE_NAME}.webp"
+    if not image_path.endswith(suffix):
+        return {}
+    base = image_path[:-len(suffix)]
+    return {name: f"{base}/{name}.webp" for name in THUMBNAIL_SIZES}
+
+
+def _encode_webp(image, max_dimension: int, quality: int) -> bytes:
+    resized = image.copy()
+    resized.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+    buffer = io.BytesIO()
+    # Sem o parâmetro exif, os metadados (localização, câmera etc.) não são gravados
+    resized.save(buffer, "WEBP", quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def process_image(path: str, max_dimension: int, quality: int, max_pixels: int) -> Dict[str, bytes]:
+    """
+    Reduz, remove metadados EXIF e converte a imagem para WebP,
+    gerando também as miniaturas de THUMBNAIL_SIZES.
+    Executado em um processo separado (ver ImageService), lendo a imagem
+    do arquivo temporário em `path`.
+
+    Imagens com mais de `max_pixels` pixels são recusadas antes de serem
+    decodificadas: poucos MB comprimidos podem ocupar GBs depois de decodificados.
+
+    Returns:
+        Dict[str, bytes]: conteúdo WebP de cada variante ("full", "sm", "md")
+
+    Raises:
+        ImageTooLargeError: se a imagem tiver mais de `max_pixels` pixels
+    """
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    with open(path, "rb") as fp, warnings.catch_warnings():
+        # Acima de MAX_IMAGE_PIXELS o Pillow apenas avisa (até o dobro): trata o aviso como erro.
+        # A verificação é feita em Image.open, que lê só o cabeçalho, antes de decodificar
+        warnings.simplefilter("error", Image.DecompressionBombWarning)
+        try:
+            image = Image.open(fp)
+        except (Image.DecompressionBombError, Image.DecompressionBombWarning) as e:
+            raise ImageTooLargeError(str(e))
+
+        with image:
+            # Decodifica JPEGs grandes já em resolução reduzida
+            image.draft("RGB", (max_dimension, max_dimension))
+            # Aplica a rotação indicada no EXIF antes de descartá-lo
+            image = ImageOps.exif_transpose(image)
+            has_alpha = image.mode in ("RGBA", "LA") or "transparency" in image.info
+            image = image.convert("RGBA" if has_alpha else "RGB")
+
+            variants = {FULL_IMAGE_NAME: _encode_webp(image, max_dimension, quality)}
+            for name, size in THUMBNAIL_SIZES.items():
+                variants[name] = _encode_webp(image, size, quality)
+            return variants
+
+
+class ImageService:
+    """
+    Service para processamento de imagens em um pool de processos,
+    para não bloquear o event loop com trabalho de CPU.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or settings.IMAGE_PROCESS_WORKERS
+        self.executor = self._create_executor()
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+    @staticmethod
+    def is_available() -> bool:
+        """Indica se o processamento está habilitado e o Pillow está instalado"""
+        return settings.IMAGE_PROCESSING_ENABLED and Image is not None
+
+    async def process(self, path: str) -> Dict[str, bytes]:
+        """Processa a imagem salva em `path` em um processo do pool (ver process_image)"""
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        try:
+            return await loop.run_in_executor(
+                executor,
+                process_image,
+                path,
+                settings.IMAGE_MAX_DIMENSION,
+                settings.IMAGE_WEBP_QUALITY,
+                settings.IMAGE_MAX_PIXELS
+            )
+        except BrokenProcessPool:
+            # Um processo morreu (ex.: falta de memória): recria o pool para as próximas imagens
+            if self.executor is executor:
+                self.executor = self._create_executor()
+                executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    def shutdown(self) -> None:
+        """Encerra o pool de processos"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
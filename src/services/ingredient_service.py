@@ -1,9 +1,19 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional, Tuple, Union
 from uuid import UUID
 from fastapi import HTTPException, status, UploadFile
 
-from src.repositories.ingredient_repository import IngredientRepository
+from src.core.pagination import (
+    clamp_page_size,
+    decode_cursor,
+    decode_offset_cursor,
+    encode_cursor,
+    encode_offset_cursor
+)
+from src.repositories.ingredient_repository import get_ingredient_repository
+from src.services.image_service import thumbnail_paths
 from src.services.storage_service import StorageService
 from src.api.schemas.ingredient_schema import (
     IngredientCreate, 
@@ -14,9 +24,39 @@ from src.api.schemas.ingredient_schema import (
 
 class IngredientService:
     
-    def __init__(self, db: Session):
-        self.repository = IngredientRepository(db)
-        self.storage_service = StorageService()
+    def __init__(self, db: Union[Session, AsyncSession], storage_service: StorageService):
+        self.repository = get_ingredient_repository(db)
+        self.storage_service = storage_service
+
+    async def _build_responses(self, ingredients: list) -> List[IngredientResponse]:
+        """
+        Converte ingredientes em respostas, resolvendo as URLs das imagens
+        e miniaturas de todos eles de uma só vez
+        """
+        paths = []
+        for ing in ingredients:
+            if ing.image_url:
+                paths.append(ing.image_url)
+                paths.extend(thumbnail_paths(ing.image_url).values())
+        if self.storage_service.signed_urls:
+            # A assinatura das URLs é uma chamada HTTP síncrona ao Supabase
+            image_urls = await run_in_threadpool(self.storage_service.get_image_urls, paths)
+        else:
+            image_urls = self.storage_service.get_image_urls(paths)
+
+        responses = []
+        for ing in ingredients:
+            response = IngredientResponse.model_validate(ing)
+            if ing.image_url:
+                response.image_url = image_urls.get(ing.image_url)
+                response.thumbnails = {
+                    size: image_urls[path]
+                    for size, path in thumbnail_paths(ing.image_url).items()
+                    if path in image_urls
+                }
+            responses.append(response)
+
+        return responses
     
     async def create_ingredient(
         self, 
@@ -38,13 +78,8 @@ class IngredientService:
                 )
         
         try:
-            ingredient = self.repository.create(ingredient_data, user_id, image_path)
-            response = IngredientResponse.model_validate(ingredient)
-            
-            if ingredient.image_url:
-                response.image_url = self.storage_service.get_public_url(ingredient.image_url)
-            
-            return response
+            ingredient = await self.repository.create(ingredient_data, user_id, image_path)
+            return (await self._build_responses([ingredient]))[0]
         except Exception as e:
             if image_path:
                 await self.storage_service.delete_image(image_path)
@@ -53,8 +88,8 @@ class IngredientService:
                 detail=f"Erro ao criar ingrediente: {str(e)}"
             )
     
-    def get_ingredient(self, ingredient_id: UUID, user_id: UUID) -> IngredientResponse:
-        ingredient = self.repository.get_by_id(ingredient_id, user_id)
+    async def get_ingredient(self, ingredient_id: UUID, user_id: UUID) -> IngredientResponse:
+        ingredient = await self.repository.get_by_id(ingredient_id, user_id)
         
         if not ingredient:
             raise HTTPException(
@@ -62,24 +97,59 @@ class IngredientService:
                 detail="Ingrediente não encontrado"
             )
         
-        response = IngredientResponse.model_validate(ingredient)
-        
-        if ingredient.image_url:
-            response.image_url = self.storage_service.get_public_url(ingredient.image_url)
-        
-        return response
+        return (await self._build_responses([ingredient]))[0]
     
-    def list_user_ingredients(self, user_id: UUID) -> List[IngredientResponse]:
-        ingredients = self.repository.get_all_by_user(user_id)
-        responses = []
-        
-        for ing in ingredients:
-            response = IngredientResponse.model_validate(ing)
-            if ing.image_url:
-                response.image_url = self.storage_service.get_public_url(ing.image_url)
-            responses.append(response)
-        
-        return responses
+    async def list_user_ingredients(
+        self,
+        user_id: UUID,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[IngredientResponse], Optional[str]]:
+        """Retorna uma página de ingredientes e o cursor da próxima página (None se for a última)"""
+        page_size = clamp_page_size(limit)
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+
+        # Busca um item a mais para saber se existe próxima página
+        ingredients = await self.repository.get_all_by_user(user_id, limit=page_size + 1, after=after)
+        next_cursor = None
+        if len(ingredients) > page_size:
+            ingredients = ingredients[:page_size]
+            last = ingredients[-1]
+            next_cursor = encode_cursor(last.created_at, last.id)
+
+        return await self._build_responses(ingredients), next_cursor
+    
+    async def search_user_ingredients(
+        self,
+        user_id: UUID,
+        q: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[IngredientResponse], Optional[str]]:
+        """Busca ingredientes do usuário por relevância; retorna uma página e o cursor da próxima"""
+        page_size = clamp_page_size(limit)
+        try:
+            offset = decode_offset_cursor(cursor) if cursor else 0
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+
+        # Busca um item a mais para saber se existe próxima página
+        ingredients = await self.repository.search_by_user(user_id, q, limit=page_size + 1, offset=offset)
+        next_cursor = None
+        if len(ingredients) > page_size:
+            ingredients = ingredients[:page_size]
+            next_cursor = encode_offset_cursor(offset + page_size)
+
+        return await self._build_responses(ingredients), next_cursor
     
     async def update_ingredient(
         self, 
@@ -88,7 +158,7 @@ class IngredientService:
         ingredient_data: IngredientUpdate,
         image_file: Optional[UploadFile] = None
     ) -> IngredientResponse:
-        existing = self.repository.get_by_id(ingredient_id, user_id)
+        existing = await self.repository.get_by_id(ingredient_id, user_id)
         if not existing:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -110,7 +180,7 @@ class IngredientService:
                     detail=f"Erro ao processar imagem: {str(e)}"
                 )
         
-        ingredient = self.repository.update(ingredient_id, user_id, ingredient_data)
+        ingredient = await self.repository.update(ingredient_id, user_id, ingredient_data)
         
         if not ingredient:
             if new_image_path:
@@ -123,15 +193,10 @@ class IngredientService:
         if new_image_path and old_image_path:
             await self.storage_service.delete_image(old_image_path)
         
-        response = IngredientResponse.model_validate(ingredient)
-        
-        if ingredient.image_url:
-            response.image_url = self.storage_service.get_public_url(ingredient.image_url)
-        
-        return response
+        return (await self._build_responses([ingredient]))[0]
     
     async def delete_ingredient(self, ingredient_id: UUID, user_id: UUID) -> dict:
-        ingredient = self.repository.get_by_id(ingredient_id, user_id)
+        ingredient = await self.repository.get_by_id(ingredient_id, user_id)
         
         if not ingredient:
             raise HTTPException(
@@ -141,7 +206,7 @@ class IngredientService:
         
         image_path = ingredient.image_url
         
-        success = self.repository.delete(ingredient_id, user_id)
+        success = await self.repository.delete(ingredient_id, user_id)
         
         if not success:
             raise HTTPException(
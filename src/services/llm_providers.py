@@ -0,0 +1,380 @@
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Iterable, List, Optional
+import asyncio
+import json
+import re
+import time
+
+from groq import (
+    APIConnectionError,
+    APIError,
+    AsyncGroq,
+    BadRequestError,
+    DefaultAsyncHttpxClient,
+    InternalServerError,
+    RateLimitError
+)
+import httpx
+
+from src.core.config import settings
+from src.core.metrics import metrics
+from src.core.retry import parse_retry_after
+
+
+class ProviderError(Exception):
+    """Falha de um provedor de LLM"""
+
+
+class ProviderRateLimitError(ProviderError):
+    """Provedor recusou a chamada por limite de requisições (429)"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ProviderUnavailableError(ProviderError):
+    """Provedor fora do ar, com erro interno (5xx) ou sem conexão"""
+
+
+def record_usage(usage: Any) -> None:
+    """Soma os tokens consumidos por uma chamada às métricas ai_prompt_tokens e ai_completion_tokens."""
+    if usage is None:
+        return
+    if isinstance(usage, dict):
+        prompt_tokens, completion_tokens = usage.get("prompt_tokens"), usage.get("completion_tokens")
+    else:
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        completion_tokens = getattr(usage, "completion_tokens", None)
+    metrics.increment("ai_prompt_tokens", prompt_tokens or 0)
+    metrics.increment("ai_completion_tokens", completion_tokens or 0)
+
+
+class LLMProvider(ABC):
+    """Interface de um provedor de LLM (API de chat completions)"""
+
+    name: str
+
+    @abstractmethod
+    async def complete(
+        self,
+        messages: List[dict],
+        temperature: float,
+        max_tokens: int,
+        timeout: float,
+        json_mode: bool = False
+    ) -> str:
+        """Retorna o texto da resposta. json_mode pede saída em JSON, se o provedor suportar."""
+
+    @abstractmethod
+    def stream(
+        self,
+        messages: List[dict],
+        temperature: float,
+        max_tokens: int,
+        timeout: float
+    ) -> AsyncIterator[str]:
+        """Emite os trechos de texto da resposta assim que chegam"""
+
+    async def aclose(self) -> None:
+        """Libera recursos do provedor (ex.: pool de conexões)"""
+
+
+def _failed_generation(error: BadRequestError) -> Optional[str]:
+    """Texto gerado que a Groq rejeitou no modo JSON (json_validate_failed), se disponível."""
+    body = error.body if isinstance(error.body, dict) else {}
+    body = body.get("error", body) if isinstance(body.get("error"), dict) else body
+    if body.get("code") != "json_validate_failed":
+        return None
+    return body.get("failed_generation") or None
+
+
+@contextmanager
+def _groq_errors():
+    """Converte os erros do SDK da Groq nos erros de provedor"""
+    try:
+        yield
+    except RateLimitError as e:
+        raise ProviderRateLimitError(str(e), retry_after=parse_retry_after(e.response.headers.get("retry-after"))) from e
+    except (InternalServerError, APIConnectionError) as e:
+        # APITimeoutError é um APIConnectionError
+        raise ProviderUnavailableError(str(e)) from e
+    except APIError as e:
+        raise ProviderError(str(e)) from e
+
+
+class GroqProvider(LLMProvider):
+    """Groq (SDK oficial), com pool de conexões HTTP compartilhado (keep-alive)"""
+
+    def __init__(self, api_key: str, model: str, name: str = "groq"):
+        self.name = name
+        self.model = model
+        self.http_client = DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=settings.AI_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.AI_HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=60
+            ),
+            timeout=httpx.Timeout(settings.AI_REQUEST_TIMEOUT, connect=5.0)
+        )
+        # Novas tentativas ficam a cargo do AIService (o cliente não repete chamadas)
+        self.client = AsyncGroq(
+            api_key=api_key,
+            http_client=self.http_client,
+            timeout=settings.AI_REQUEST_TIMEOUT,
+            max_retries=0
+        )
+
+    async def complete(self, messages, temperature, max_tokens, timeout, json_mode=False) -> str:
+        """
+        Sem streaming, a Groq aceita o modo JSON; se ela rejeitar a resposta por
+        JSON inválido, o texto gerado é aproveitado mesmo assim, já que o parser
+        repara os defeitos mais comuns.
+        """
+        request_args = dict(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout
+        )
+        if json_mode:
+            request_args["response_format"] = {"type": "json_object"}
+        with _groq_errors():
+            try:
+                response = await self.client.chat.completions.create(**request_args)
+            except BadRequestError as e:
+                content = _failed_generation(e)
+                if content is None:
+                    raise
+                return content
+        record_usage(getattr(response, "usage", None))
+        return response.choices[0].message.content
+
+    async def stream(self, messages, temperature, max_tokens, timeout) -> AsyncIterator[str]:
+        with _groq_errors():
+            stream = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                timeout=timeout,
+                stream=True
+            )
+            async for chunk in stream:
+                # O último trecho traz o consumo de tokens da chamada
+                x_groq = getattr(chunk, "x_groq", None)
+                if x_groq is not None:
+                    record_usage(getattr(x_groq, "usage", None))
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+
+    async def aclose(self) -> None:
+        await self.client.close()
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """
+    Qualquer API compatível com a de chat completions da OpenAI (OpenAI, OpenRouter,
+    Together, vLLM, Ollama...), chamada diretamente via HTTP
+    """
+
+    def __init__(self, base_url: str, api_key: str, model: str, name: str = "openai"):
+        self.name = name
+        self.model = model
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.http_client = httpx.AsyncClient(
+            headers={"Authorization": f"Bearer {api_key}"},
+            limits=httpx.Limits(
+                max_connections=settings.AI_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.AI_HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=60
+            ),
+            timeout=httpx.Timeout(settings.AI_REQUEST_TIMEOUT, connect=5.0)
+        )
+
+    def _payload(self, messages, temperature, max_tokens) -> dict:
+        return {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+
+    @staticmethod
+    def _raise_for_status(response: httpx.Response) -> None:
+        if response.status_code == 429:
+            raise ProviderRateLimitError(
+                f"429: {response.text[:200]}",
+                retry_after=parse_retry_after(response.headers.get("retry-after"))
+            )
+        if response.status_code >= 500:
+            raise ProviderUnavailableError(f"{response.status_code}: {response.text[:200]}")
+        if response.status_code >= 400:
+            raise ProviderError(f"{response.status_code}: {response.text[:200]}")
+
+    @contextmanager
+    def _transport_errors(self):
+        try:
+            yield
+        except httpx.TransportError as e:
+            # Inclui timeouts e falhas de conexão
+            raise ProviderUnavailableError(str(e) or type(e).__name__) from e
+
+    async def complete(self, messages, temperature, max_tokens, timeout, json_mode=False) -> str:
+        payload = self._payload(messages, temperature, max_tokens)
+        if json_mode:
+            payload["response_format"] = {"type": "json_object"}
+        with self._transport_errors():
+            response = await self.http_client.post(self.url, json=payload, timeout=timeout)
+        self._raise_for_status(response)
+        data = response.json()
+        record_usage(data.get("usage"))
+        return data["choices"][0]["message"]["content"]
+
+    async def stream(self, messages, temperature, max_tokens, timeout) -> AsyncIterator[str]:
+        payload = self._payload(messages, temperature, max_tokens)
+        payload["stream"] = True
+        payload["stream_options"] = {"include_usage": True}
+        with self._transport_errors():
+            async with self.http_client.stream("POST", self.url, json=payload, timeout=timeout) as response:
+                if response.status_code >= 400:
+                    await response.aread()
+                    self._raise_for_status(response)
+                # Server-Sent Events: "data: {...}" por trecho, terminando em "data: [DONE]"
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    record_usage(chunk.get("usage"))
+                    for choice in chunk.get("choices") or ():
+                        delta = (choice.get("delta") or {}).get("content")
+                        if delta:
+                            yield delta
+
+    async def aclose(self) -> None:
+        await self.http_client.aclose()
+
+
+_INGREDIENT_LINE = re.compile(r"^- (.+?): (.+)$", re.MULTILINE)
+_BATCH_COUNT = re.compile(r"crie (\d+) receitas")
+
+
+def _truncate(text: str) -> str:
+    """Corta a resposta antes dos passos da primeira receita, como uma resposta interrompida"""
+    return text[:text.index('"passos"')]
+
+
+class FakeProvider(LLMProvider):
+    """
+    Provedor local e determinístico, para testes e benchmarks: não acessa a rede
+    e responde com receitas montadas a partir dos ingredientes do prompt
+    (um array, se o prompt pedir várias receitas).
+
+    latency e tokens_per_second simulam o tempo até o primeiro token e a vazão
+    da resposta; failures é um roteiro de falhas aplicado às próximas chamadas,
+    em ordem: "429", "500", "timeout" (não responde dentro do timeout),
+    "invalid" (JSON cortado antes dos passos) ou "ok".
+    """
+
+    def __init__(
+        self,
+        name: str = "fake",
+        latency: float = 0.0,
+        tokens_per_second: float = 0.0,
+        failures: Iterable[str] = ()
+    ):
+        self.name = name
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.failures = list(failures)
+        self.calls = 0
+        self.recipes = 0
+
+    def _respond(self, messages: List[dict]) -> str:
+        prompt = messages[-1]["content"]
+        ingredients = _INGREDIENT_LINE.findall(prompt) or [("Ingrediente", "a gosto")]
+        batch = _BATCH_COUNT.search(prompt)
+        recipes = []
+        for _ in range(int(batch.group(1)) if batch else 1):
+            self.recipes += 1
+            recipes.append({
+                "nome": f"Receita {self.recipes} de {ingredients[0][0]}",
+                "listaIngredientes": [{"nome": name, "quantidade": quantity} for name, quantity in ingredients],
+                "passos": [
+                    {"numero": 1, "descricao": f"Prepare {', '.join(name for name, _ in ingredients)}."},
+                    {"numero": 2, "descricao": "Cozinhe em fogo médio até o ponto desejado."},
+                    {"numero": 3, "descricao": "Acerte o sal e sirva."}
+                ]
+            })
+        return json.dumps(recipes if batch else recipes[0], ensure_ascii=False)
+
+    async def _before_response(self, prompt_text: str, timeout: float) -> Optional[str]:
+        """Aplica o roteiro de falhas e a latência inicial; retorna a falha "invalid", se for o caso"""
+        self.calls += 1
+        failure = self.failures.pop(0) if self.failures else "ok"
+        if failure == "429":
+            raise ProviderRateLimitError("429: limite de requisições do provedor fake", retry_after=None)
+        if failure == "500":
+            raise ProviderUnavailableError("500: erro simulado do provedor fake")
+        if failure == "timeout":
+            await asyncio.sleep(timeout)
+            raise ProviderUnavailableError("timeout simulado do provedor fake")
+        record_usage({"prompt_tokens": len(prompt_text) // 4})
+        await asyncio.sleep(self.latency)
+        return failure
+
+    def _output_delay(self, text: str) -> float:
+        return len(text) / 4 / self.tokens_per_second if self.tokens_per_second else 0.0
+
+    async def complete(self, messages, temperature, max_tokens, timeout, json_mode=False) -> str:
+        failure = await self._before_response("".join(m["content"] for m in messages), timeout)
+        text = self._respond(messages)
+        if failure == "invalid":
+            text = _truncate(text)
+        await asyncio.sleep(self._output_delay(text))
+        record_usage({"completion_tokens": len(text) // 4})
+        return text
+
+    async def stream(self, messages, temperature, max_tokens, timeout) -> AsyncIterator[str]:
+        failure = await self._before_response("".join(m["content"] for m in messages), timeout)
+        text = self._respond(messages)
+        if failure == "invalid":
+            text = _truncate(text)
+        started = time.perf_counter()
+        for start in range(0, len(text), 16):
+            # Ritmo pela vazão acumulada: o atraso de cada asyncio.sleep não se soma a cada trecho
+            await asyncio.sleep(max(0.0, started + self._output_delay(text[:start + 16]) - time.perf_counter()))
+            yield text[start:start + 16]
+        record_usage({"completion_tokens": len(text) // 4})
+
+
+def create_providers() -> List[LLMProvider]:
+    """
+    Cria os provedores listados em AI_PROVIDERS, na ordem de preferência.
+    Provedores sem chave de API configurada são ignorados.
+    """
+    providers = []
+    for name in (name.strip().lower() for name in settings.AI_PROVIDERS.split(",")):
+        if name == "groq":
+            if settings.GROQ_API_KEY:
+                providers.append(GroqProvider(settings.GROQ_API_KEY, settings.AI_GROQ_MODEL))
+        elif name == "openai":
+            if settings.OPENAI_API_KEY:
+                providers.append(OpenAICompatibleProvider(
+                    settings.OPENAI_BASE_URL, settings.OPENAI_API_KEY, settings.OPENAI_MODEL
+                ))
+        elif name == "fake":
+            providers.append(FakeProvider(latency=settings.AI_FAKE_LATENCY))
+        elif name:
+            print(f"Provedor de IA desconhecido em AI_PROVIDERS: {name}")
+    if not providers:
+        print("Nenhum provedor de IA configurado: defina GROQ_API_KEY ou OPENAI_API_KEY (ver AI_PROVIDERS)")
+    return providers
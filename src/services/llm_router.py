@@ -0,0 +1,221 @@
+from collections import deque
+from typing import AsyncIterator, Dict, List, Optional
+import asyncio
+import time
+
+from src.core.config import settings
+from src.core.metrics import metrics
+from src.services.llm_providers import (
+    LLMProvider,
+    ProviderError,
+    ProviderRateLimitError,
+    ProviderUnavailableError
+)
+
+
+# Observações mínimas para usar o p95 medido como atraso do hedge
+MIN_LATENCY_SAMPLES = 20
+
+
+class ProviderStats:
+    """Latências recentes e janela de pausa (cooldown) de um provedor"""
+
+    def __init__(self, window: int = 100, alpha: float = 0.2):
+        self.latencies: deque = deque(maxlen=window)
+        self.alpha = alpha
+        self.ewma: Optional[float] = None  # Média móvel exponencial da latência
+        self.cooldown_until = 0.0
+
+    def observe(self, latency: float) -> None:
+        self.latencies.append(latency)
+        self.ewma = latency if self.ewma is None else self.alpha * latency + (1 - self.alpha) * self.ewma
+
+    def p95(self) -> Optional[float]:
+        if len(self.latencies) < MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def cool_down(self, seconds: float) -> None:
+        self.cooldown_until = max(self.cooldown_until, time.monotonic() + seconds)
+
+    def cooling(self) -> bool:
+        return self.cooldown_until > time.monotonic()
+
+
+class ProviderRouter:
+    """
+    Distribui as chamadas entre os provedores de LLM configurados.
+
+    - Roteamento por latência: provedores disponíveis são tentados em ordem
+      crescente de latência média recente; os ainda sem medição vêm depois, na
+      ordem configurada.
+    - Failover: um provedor que falha (429, 5xx, sem conexão, timeout) dá lugar
+      imediatamente ao próximo; após 429 ou 5xx ele fica em pausa pelo Retry-After
+      ou por AI_PROVIDER_COOLDOWN, e só volta a ser tentado antes se não houver outro.
+    - Hedge: se a resposta do primeiro provedor demora mais que o seu p95
+      (AI_HEDGE_DELAY enquanto não há medições suficientes), a mesma chamada
+      é feita ao próximo provedor e vale a primeira resposta; a outra é cancelada.
+
+    Respostas em streaming não usam hedge (os trechos já repassados não podem ser
+    trocados); o failover ocorre apenas antes do primeiro trecho.
+    """
+
+    def __init__(self, providers: List[LLMProvider], hedge_enabled: bool = True):
+        self.providers = providers
+        self.hedge_enabled = hedge_enabled
+        self.stats: Dict[str, ProviderStats] = {provider.name: ProviderStats() for provider in providers}
+        for provider in providers:
+            metrics.register_gauge(
+                f"ai_provider_latency_ewma_{provider.name}",
+                lambda stats=self.stats[provider.name]: stats.ewma or 0.0
+            )
+
+    def _order(self) -> List[LLMProvider]:
+        """
+        Provedores na ordem de tentativa: disponíveis com latência medida, da menor
+        para a maior; depois os ainda sem medição, na ordem configurada; em pausa,
+        só se não houver outro
+        """
+        def key(item):
+            index, provider = item
+            ewma = self.stats[provider.name].ewma
+            return (ewma is None, ewma or 0.0, index)
+
+        ranked = sorted(enumerate(self.providers), key=key)
+        available = [provider for _, provider in ranked if not self.stats[provider.name].cooling()]
+        if available:
+            return available
+        return sorted(self.providers, key=lambda provider: self.stats[provider.name].cooldown_until)
+
+    def _hedge_delay(self, provider: LLMProvider) -> float:
+        return self.stats[provider.name].p95() or settings.AI_HEDGE_DELAY
+
+    def _record_failure(self, provider: LLMProvider, error: BaseException, elapsed: float) -> None:
+        """Registra a falha e, se for o caso, põe o provedor em pausa"""
+        metrics.increment(f"ai_provider_errors_{provider.name}")
+        stats = self.stats[provider.name]
+        if isinstance(error, ProviderRateLimitError):
+            stats.cool_down(error.retry_after or settings.AI_PROVIDER_COOLDOWN)
+        elif isinstance(error, ProviderUnavailableError):
+            stats.cool_down(settings.AI_PROVIDER_COOLDOWN)
+        elif isinstance(error, asyncio.TimeoutError):
+            # Provedor lento: a latência registrada o leva para o fim da fila
+            stats.observe(elapsed)
+
+    async def _call(self, provider: LLMProvider, messages, temperature, max_tokens, timeout, json_mode) -> str:
+        started = time.perf_counter()
+        try:
+            content = await asyncio.wait_for(
+                provider.complete(messages, temperature, max_tokens, timeout, json_mode=json_mode),
+                timeout
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._record_failure(provider, e, time.perf_counter() - started)
+            raise
+        latency = time.perf_counter() - started
+        self.stats[provider.name].observe(latency)
+        metrics.observe(f"ai_provider_latency_seconds_{provider.name}", latency)
+        return content
+
+    def _require_providers(self) -> List[LLMProvider]:
+        order = self._order()
+        if not order:
+            raise ProviderError(
+                "Nenhum provedor de IA configurado: defina GROQ_API_KEY ou OPENAI_API_KEY (ver AI_PROVIDERS)"
+            )
+        return order
+
+    async def complete(
+        self,
+        messages: List[dict],
+        temperature: float,
+        max_tokens: int,
+        timeout: float,
+        json_mode: bool = False
+    ) -> str:
+        """Texto da resposta do primeiro provedor a responder com sucesso"""
+        candidates = self._require_providers()
+        running: Dict[asyncio.Task, LLMProvider] = {}
+        errors: List[BaseException] = []
+
+        def launch() -> None:
+            provider = candidates.pop(0)
+            task = asyncio.ensure_future(self._call(provider, messages, temperature, max_tokens, timeout, json_mode))
+            running[task] = provider
+
+        launch()
+        primary = next(iter(running.values()))
+        try:
+            while running:
+                hedge_delay = None
+                if self.hedge_enabled and candidates and len(running) == 1:
+                    hedge_delay = self._hedge_delay(next(iter(running.values())))
+                done, _ = await asyncio.wait(running, timeout=hedge_delay, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # Demorou mais que o p95: dispara a mesma chamada no próximo provedor
+                    metrics.increment("ai_hedged_requests")
+                    launch()
+                    continue
+
+                for task in done:
+                    provider = running.pop(task)
+                    if task.exception() is None:
+                        if provider is not primary:
+                            metrics.increment("ai_hedge_wins" if running else "ai_failovers")
+                        return task.result()
+                    errors.append(task.exception())
+
+                if not running and candidates:
+                    launch()
+        finally:
+            for task, provider in running.items():
+                # Perdeu o hedge ou a geração foi cancelada (ex.: cliente desconectou): o tempo
+                # até o cancelamento não é uma latência medida e não entra nas estatísticas
+                task.cancel()
+                metrics.increment(f"ai_provider_cancelled_{provider.name}")
+
+        # Prefere uma falha transitória, que o AIService pode tentar novamente
+        transient = (ProviderRateLimitError, ProviderUnavailableError, asyncio.TimeoutError)
+        raise next((error for error in errors if isinstance(error, transient)), errors[-1])
+
+    async def stream(
+        self,
+        messages: List[dict],
+        temperature: float,
+        max_tokens: int,
+        timeout: float
+    ) -> AsyncIterator[str]:
+        """Trechos da resposta do primeiro provedor que começar a responder"""
+        error: Optional[BaseException] = None
+        for index, provider in enumerate(self._require_providers()):
+            if index:
+                metrics.increment("ai_failovers")
+            started = time.perf_counter()
+            stream = provider.stream(messages, temperature, max_tokens, timeout)
+            first_chunk = True
+            try:
+                async for delta in stream:
+                    if first_chunk:
+                        first_chunk = False
+                        metrics.observe(
+                            f"ai_provider_first_token_seconds_{provider.name}",
+                            time.perf_counter() - started
+                        )
+                    yield delta
+                return
+            except ProviderError as e:
+                self._record_failure(provider, e, time.perf_counter() - started)
+                if not first_chunk:
+                    raise
+                error = e
+            finally:
+                await stream.aclose()
+        raise error
+
+    async def aclose(self) -> None:
+        for provider in self.providers:
+            await provider.aclose()
@@ -0,0 +1,222 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Awaitable, Callable, List, Optional
+import hashlib
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+
+from src.core.cache import TTLCache
+from src.core.config import settings
+from src.core.metrics import metrics
+from src.core.normalization import canonical_ingredient_name, fold_text
+from src.core.singleflight import SingleFlight
+from src.api.schemas.recipe_schema import GeneratedRecipe
+
+
+# Versão do formato da chave; altere para invalidar entradas antigas
+CACHE_KEY_VERSION = "v2"
+
+
+def _bucket_quantity(quantity: str) -> str:
+    """
+    Agrupa quantidades próximas em uma mesma faixa (escala logarítmica),
+    de forma que "2 unidades" e "3 unidades" gerem a mesma chave.
+    """
+    text = fold_text(quantity)
+    match = re.match(r"^(\d+)\s*/\s*(\d+)|^(\d+(?:[.,]\d+)?)", text)
+    if not match:
+        return text
+
+    if match.group(1):
+        denominator = int(match.group(2)) or 1
+        value = int(match.group(1)) / denominator
+    else:
+        value = float(match.group(3).replace(",", "."))
+
+    unit = text[match.end():].strip()
+    bucket = math.floor(math.log2(value)) if value > 0 else "0"
+    return f"{bucket}:{unit}"
+
+
+def build_cache_key(ingredients: List[dict], count: int) -> str:
+    """
+    Gera a chave canônica de uma lista de ingredientes:
+    nomes canônicos, quantidades agrupadas em faixas e ordem irrelevante.
+    """
+    normalized = sorted(
+        (canonical_ingredient_name(ing.get("Ingrediente", "")), _bucket_quantity(ing.get("qtd", "")))
+        for ing in ingredients
+    )
+    payload = json.dumps([CACHE_KEY_VERSION, count, normalized], separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CacheBackend(ABC):
+    """Interface de armazenamento do cache de receitas geradas"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Retorna o valor serializado ou None se ausente/expirado"""
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: float) -> None:
+        """Armazena o valor serializado por ttl segundos"""
+
+    def close(self) -> None:
+        """Libera recursos do backend"""
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """Backend em memória do processo, com TTL e descarte LRU"""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.cache = TTLCache(max_entries=max_entries, ttl=ttl)
+
+    def get(self, key: str) -> Optional[str]:
+        return self.cache.get(key)
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        self.cache.set(key, value, ttl)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Backend compartilhado em arquivo SQLite, visível para todos os workers da máquina.
+    Serve de referência para backends compartilhados (ex.: Redis) e para testes.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        self.max_entries = max_entries
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS recipe_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM recipe_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute("DELETE FROM recipe_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE recipe_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO recipe_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl, now)
+            )
+            # Remove expirados e descarta os menos acessados acima do limite
+            self._conn.execute("DELETE FROM recipe_cache WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "DELETE FROM recipe_cache WHERE key IN ("
+                "SELECT key FROM recipe_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RecipeCacheService:
+    """Cache das receitas geradas pela IA, indexado pela lista de ingredientes normalizada"""
+
+    def __init__(self, backend: CacheBackend, ttl: float, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.in_flight = SingleFlight()
+        metrics.register_gauge("recipe_cache_hit_ratio", self.hit_ratio)
+        metrics.register_gauge("recipe_generations_in_flight", self.in_flight.in_flight)
+
+    def hit_ratio(self) -> float:
+        """Proporção de acertos sobre o total de consultas"""
+        hits = metrics.get("recipe_cache_hits")
+        total = hits + metrics.get("recipe_cache_misses")
+        return hits / total if total else 0.0
+
+    def get(self, ingredients: List[dict], count: int) -> Optional[List[GeneratedRecipe]]:
+        """Busca receitas já geradas para a lista de ingredientes"""
+        if not self.enabled:
+            return None
+
+        try:
+            cached = self.backend.get(build_cache_key(ingredients, count))
+        except Exception as e:
+            print(f"Erro ao consultar cache de receitas: {str(e)}")
+            cached = None
+
+        if cached is None:
+            metrics.increment("recipe_cache_misses")
+            return None
+
+        metrics.increment("recipe_cache_hits")
+        return [GeneratedRecipe.model_validate(item) for item in json.loads(cached)]
+
+    def set(self, ingredients: List[dict], count: int, recipes: List[GeneratedRecipe]) -> None:
+        """Armazena as receitas geradas; resultados parciais não são armazenados"""
+        if not self.enabled or len(recipes) < count:
+            return
+
+        value = json.dumps([recipe.model_dump() for recipe in recipes], ensure_ascii=False)
+        try:
+            self.backend.set(build_cache_key(ingredients, count), value, self.ttl)
+        except Exception as e:
+            print(f"Erro ao gravar cache de receitas: {str(e)}")
+
+    async def get_or_generate(
+        self,
+        ingredients: List[dict],
+        count: int,
+        generate: Callable[[], Awaitable[List[GeneratedRecipe]]]
+    ) -> List[GeneratedRecipe]:
+        """
+        Retorna as receitas do cache ou as gera e armazena.
+        Requisições idênticas simultâneas compartilham uma única geração.
+        """
+        cached = self.get(ingredients, count)
+        if cached is not None:
+            return cached
+
+        async def generate_and_store() -> List[GeneratedRecipe]:
+            recipes = await generate()
+            self.set(ingredients, count, recipes)
+            return recipes
+
+        key = build_cache_key(ingredients, count)
+        if key in self.in_flight:
+            metrics.increment("recipe_generations_coalesced")
+        return await self.in_flight.do(key, generate_and_store)
+
+    def close(self) -> None:
+        self.backend.close()
+
+
+def create_recipe_cache_service() -> RecipeCacheService:
+    """Cria o cache de receitas conforme as configurações"""
+    if settings.RECIPE_CACHE_BACKEND == "sqlite":
+        backend = SQLiteCacheBackend(settings.RECIPE_CACHE_SQLITE_PATH, settings.RECIPE_CACHE_MAX_ENTRIES)
+    else:
+        backend = InMemoryCacheBackend(settings.RECIPE_CACHE_MAX_ENTRIES, settings.RECIPE_CACHE_TTL)
+    return RecipeCacheService(backend, ttl=settings.RECIPE_CACHE_TTL, enabled=settings.RECIPE_CACHE_ENABLED)
+
+
+# Instância única do serviço
+recipe_cache_service = create_recipe_cache_service()
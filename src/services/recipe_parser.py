@@ -0,0 +1,242 @@
+from typing import Any, Iterator, List, Optional, Tuple
+import ast
+import json
+import re
+
+from pydantic import ValidationError
+
+from src.core.metrics import metrics
+from src.api.schemas.recipe_schema import GeneratedRecipe
+
+
+class RecipeParseError(ValueError):
+    """Resposta da LLM sem um objeto JSON de receita válido"""
+
+
+class JsonObjectScanner:
+    """
+    Localiza objetos JSON balanceados em um texto recebido em partes (streaming),
+    ignorando texto ao redor (explicações, blocos ```json) e chaves dentro de strings.
+
+    Emite cada objeto de nível mais externo assim que ele fecha; objetos dentro
+    de um array externo ("[{...}, {...}]") são emitidos um a um.
+    """
+
+    def __init__(self):
+        self._stack: List[str] = []   # "{" e "[" abertos
+        self._start: Optional[int] = None  # Profundidade em que começou o objeto atual
+        self._buffer: List[str] = []
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text: str) -> List[str]:
+        """Processa mais um trecho do texto e retorna os objetos completados por ele"""
+        objects = []
+        for char in text:
+            if self._start is not None:
+                self._buffer.append(char)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = bool(self._stack)
+            elif char in "{[":
+                if char == "{" and self._start is None:
+                    self._start = len(self._stack)
+                    self._buffer = [char]
+                self._stack.append(char)
+            elif char in "}]" and self._stack:
+                self._stack.pop()
+                if self._start is not None and len(self._stack) == self._start:
+                    objects.append("".join(self._buffer))
+                    self._start = None
+                    self._buffer = []
+        return objects
+
+    def pending(self) -> Optional[str]:
+        """Objeto iniciado e ainda não fechado (ex.: resposta truncada), se houver"""
+        return "".join(self._buffer) if self._start is not None else None
+
+
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+_PENDING_SEPARATOR = re.compile(r"\s*[,:]?\s*$")
+# Em um objeto, string logo após "{" ou "," é uma chave (ainda sem valor)
+_PENDING_KEY = re.compile(r'(?<=[{,])\s*"(?:[^"\\]|\\.)*"\s*:?\s*$')
+# Escape cortado no fim de uma string aberta ("x\", "x\u00")
+_PENDING_ESCAPE = re.compile(r'(?<!\\)((?:\\\\)*)\\(?:u[0-9a-fA-F]{0,3})?$')
+# Literal no fim do texto (true, null, número...), talvez cortado ("tr", "4.")
+_PENDING_LITERAL = re.compile(r"[A-Za-z0-9.+\-]+$")
+_COMPLETE_LITERAL = re.compile(r"true|false|null|-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?")
+
+
+def _outside_strings(text: str, transform) -> str:
+    """Aplica transform apenas aos trechos fora de strings JSON"""
+    parts = re.split(r'("(?:[^"\\]|\\.)*")', text)
+    return "".join(part if i % 2 else transform(part) for i, part in enumerate(parts))
+
+
+def _close_truncated(text: str) -> str:
+    """
+    Completa um objeto JSON truncado: fecha a string aberta (sem o escape cortado),
+    descarta o último membro incompleto (literal cortado, chave sem valor, vírgula
+    pendente) e fecha arrays e objetos
+    """
+    stack, in_string, escaped = [], False, False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append(char)
+        elif char in "}]" and stack:
+            stack.pop()
+    if not stack:
+        return text
+
+    if in_string:
+        text = _PENDING_ESCAPE.sub(r"\1", text) + '"'
+    else:
+        literal = _PENDING_LITERAL.search(text)
+        if literal and not _COMPLETE_LITERAL.fullmatch(literal.group()):
+            text = text[:literal.start()]
+    while True:
+        trimmed = _PENDING_SEPARATOR.sub("", text)
+        if stack[-1] == "{":
+            trimmed = _PENDING_KEY.sub("", trimmed)
+        if trimmed == text:
+            break
+        text = trimmed
+    return text + "".join("}" if opener == "{" else "]" for opener in reversed(stack))
+
+
+def repair_json(text: str) -> str:
+    """Corrige defeitos comuns: vírgulas antes de } ou ] e objetos/arrays truncados"""
+    return _outside_strings(_close_truncated(text), lambda part: _TRAILING_COMMA.sub(r"\1", part))
+
+
+def json_candidates(text: str) -> List[str]:
+    """Objetos JSON balanceados do texto, em ordem, seguidos do objeto truncado no final (se houver)"""
+    scanner = JsonObjectScanner()
+    candidates = scanner.feed(text)
+    pending = scanner.pending()
+    if pending is not None:
+        candidates.append(pending)
+    return candidates
+
+
+def _decode(candidate: str) -> Tuple[Any, bool]:
+    """
+    Decodifica um candidato: JSON estrito; senão, JSON reparado; por fim,
+    literal Python (aspas simples). Retorna o valor e se foi preciso reparar.
+    """
+    try:
+        return json.loads(candidate), False
+    except json.JSONDecodeError:
+        pass
+    repaired = repair_json(candidate)
+    try:
+        return json.loads(repaired), True
+    except json.JSONDecodeError:
+        pass
+    try:
+        return ast.literal_eval(repaired), True
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        raise RecipeParseError("JSON inválido")
+
+
+def _json_objects(text: str) -> Iterator[Tuple[dict, bool]]:
+    """Objetos JSON decodificáveis (ou reparáveis) do texto, em ordem, e se foi preciso reparar"""
+    for candidate in json_candidates(text):
+        try:
+            data, repaired = _decode(candidate)
+        except RecipeParseError:
+            continue
+        if isinstance(data, dict):
+            yield data, repaired
+
+
+def _no_json_object(text: str) -> RecipeParseError:
+    metrics.increment("ai_parse_failures")
+    return RecipeParseError(f"Nenhum objeto JSON válido na resposta da IA. Resposta: {text[:500]}")
+
+
+def parse_json_object(text: str) -> Any:
+    """
+    Decodifica o primeiro objeto JSON válido (ou reparável) do texto.
+    Registra nas métricas se o objeto foi lido diretamente, reparado ou descartado.
+    """
+    for data, repaired in _json_objects(text):
+        metrics.increment("ai_parse_repaired" if repaired else "ai_parse_ok")
+        return data
+    raise _no_json_object(text)
+
+
+def _complete_items(items: Any, required: tuple) -> Any:
+    """Descarta itens incompletos de uma lista (ex.: o último, cortado por truncamento)"""
+    if not isinstance(items, list):
+        return items
+    return [item for item in items if not isinstance(item, dict) or all(key in item for key in required)]
+
+
+def validate_recipe(data: Any) -> GeneratedRecipe:
+    """Valida o objeto decodificado diretamente contra GeneratedRecipe"""
+    if isinstance(data, dict):
+        if isinstance(data.get("passos"), list):
+            # Passos como texto simples ("Corte...") são numerados na ordem
+            data["passos"] = [
+                {"numero": i, "descricao": step} if isinstance(step, str) else step
+                for i, step in enumerate(data["passos"], start=1)
+            ]
+        data["listaIngredientes"] = _complete_items(data.get("listaIngredientes"), ("nome", "quantidade"))
+        data["passos"] = _complete_items(data.get("passos"), ("numero", "descricao"))
+    try:
+        return GeneratedRecipe.model_validate(data)
+    except ValidationError as e:
+        metrics.increment("ai_validation_failures")
+        raise RecipeParseError(f"Receita gerada pela IA fora do formato esperado: {e.errors()[0]['msg']}")
+
+
+def parse_generated_recipe(text: str) -> GeneratedRecipe:
+    """
+    Converte o texto retornado pela LLM em uma GeneratedRecipe: o primeiro objeto
+    do texto que for uma receita válida (um exemplo ou fragmento antes dela é ignorado)
+    """
+    first_error: Optional[Tuple[bool, RecipeParseError]] = None
+    for data, repaired in _json_objects(text):
+        try:
+            recipe = validate_recipe(data)
+        except RecipeParseError as e:
+            first_error = first_error or (repaired, e)
+            continue
+        metrics.increment("ai_parse_repaired" if repaired else "ai_parse_ok")
+        return recipe
+
+    if first_error is None:
+        raise _no_json_object(text)
+    # JSON válido, mas nenhuma receita: falha de validação, não de parse
+    repaired, error = first_error
+    metrics.increment("ai_parse_repaired" if repaired else "ai_parse_ok")
+    raise error
+
+
+def parse_failure_ratio() -> float:
+    """Proporção de respostas da LLM descartadas por JSON inválido"""
+    failures = metrics.get("ai_parse_failures")
+    total = failures + metrics.get("ai_parse_ok") + metrics.get("ai_parse_repaired")
+    return failures / total if total else 0.0
+
+
+metrics.register_gauge("ai_parse_failure_ratio", parse_failure_ratio)
@@ -1,66 +1,79 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from src.repositories.recipe_repository import RecipeRepository
+from src.repositories.ingredient_repository import get_ingredient_repository
+from src.repositories.recipe_repository import get_recipe_repository
+from src.services.cookable_service import cookable_service
 from src.api.schemas.recipe_schema import (
     RecipeCreate, 
     RecipeResponse, 
     RecipeListResponse,
+    RecipeSearchResult,
+    CookableRecipe,
     RecipeIngredientCreate
 )
-from typing import List
+from src.core.pagination import (
+    clamp_page_size,
+    decode_cursor,
+    decode_offset_cursor,
+    encode_cursor,
+    encode_offset_cursor
+)
+from typing import List, Optional, Tuple, Union
 import json
 
 
 class RecipeService:
-    def __init__(self, db: Session):
-        self.repository = RecipeRepository(db)
+    def __init__(self, db: Union[Session, AsyncSession]):
+        self.repository = get_recipe_repository(db)
+        self.ingredient_repository = get_ingredient_repository(db)
 
-    def create_recipe(self, user_id: str, recipe_data: RecipeCreate) -> RecipeResponse:
+    async def create_recipe(self, user_id: str, recipe_data: RecipeCreate) -> RecipeResponse:
         """Cria uma nova receita para o usuário."""
-        # Converte os passos para JSON string
-        instructions_json = recipe_data.instructions
-        
-        # Converte ingredientes para formato do repository
-        ingredients = [
+        return (await self.create_recipes(user_id, [recipe_data]))[0]
+
+    async def create_recipes(self, user_id: str, recipes_data: List[RecipeCreate]) -> List[RecipeResponse]:
+        """
+        Cria várias receitas para o usuário em uma única transação.
+        As respostas são montadas com os dados inseridos, sem novas consultas.
+        """
+        # Converte as receitas e ingredientes para formato do repository
+        recipes = [
             {
-                'name': ing.name,
-                'quantity': ing.quantity,
-                'order': ing.order
+                'name': recipe_data.name,
+                'instructions': recipe_data.instructions,
+                'steps': [step.model_dump() for step in recipe_data.steps],
+                'ingredients': [
+                    {
+                        'name': ing.name,
+                        'quantity': ing.quantity,
+                        'order': ing.order
+                    }
+                    for ing in recipe_data.ingredients
+                ]
             }
-            for ing in recipe_data.ingredients
+            for recipe_data in recipes_data
         ]
 
-        recipe = self.repository.create(
-            user_id=user_id,
-            name=recipe_data.name,
-            instructions=instructions_json,
-            ingredients=ingredients
-        )
+        created = await self.repository.create_many(user_id=user_id, recipes=recipes)
+        cookable_service.add_recipes(user_id, created)
 
         # Converter UUIDs para strings antes de validar
-        recipe_dict = {
-            'id': str(recipe.id),
-            'user_id': str(recipe.user_id),
-            'name': recipe.name,
-            'instructions': recipe.instructions,
-            'created_at': recipe.created_at,
-            'updated_at': recipe.updated_at,
-            'recipe_ingredients': [
-                {
-                    'id': str(ing.id),
-                    'recipe_id': str(ing.recipe_id),
-                    'name': ing.name,
-                    'quantity': ing.quantity,
-                    'order': ing.order
-                }
-                for ing in recipe.recipe_ingredients
-            ]
-        }
-
-        return RecipeResponse.model_validate(recipe_dict)
+        return [
+            RecipeResponse.model_validate({
+                **recipe,
+                'id': str(recipe['id']),
+                'user_id': str(recipe['user_id']),
+                'recipe_ingredients': [
+                    {**ing, 'id': str(ing['id']), 'recipe_id': str(ing['recipe_id'])}
+                    for ing in recipe['recipe_ingredients']
+                ]
+            })
+            for recipe in created
+        ]
 
-    def get_recipe(self, recipe_id: str, user_id: str) -> RecipeResponse:
+    async def get_recipe(self, recipe_id: str, user_id: str) -> RecipeResponse:
         """Busca uma receita específica."""
-        recipe = self.repository.get_by_id(recipe_id)
+        recipe = await self.repository.get_by_id(recipe_id, with_ingredients=True)
         
         if not recipe:
             raise ValueError("Receita não encontrada")
@@ -74,6 +87,7 @@ class RecipeService:
             'user_id': str(recipe.user_id),
             'name': recipe.name,
             'instructions': recipe.instructions,
+            'steps': recipe.steps or [],
             'created_at': recipe.created_at,
             'updated_at': recipe.updated_at,
             'recipe_ingredients': [
@@ -81,7 +95,10 @@ class RecipeService:
                     'id': str(ing.id),
                     'recipe_id': str(ing.recipe_id),
                     'name': ing.name,
+                    'canonical_name': ing.canonical_name,
                     'quantity': ing.quantity,
+                    'amount': ing.amount,
+                    'amount_unit': ing.amount_unit,
                     'order': ing.order
                 }
                 for ing in recipe.recipe_ingredients
@@ -90,23 +107,101 @@ class RecipeService:
         
         return RecipeResponse.model_validate(recipe_dict)
 
-    def list_user_recipes(self, user_id: str) -> List[RecipeListResponse]:
-        """Lista todas as receitas do usuário."""
-        recipes = self.repository.get_by_user_id(user_id)
+    async def list_user_recipes(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[RecipeListResponse], Optional[str]]:
+        """
+        Lista uma página das receitas do usuário.
+        Retorna também o cursor da próxima página (None se for a última).
+        """
+        page_size = clamp_page_size(limit)
+        after = decode_cursor(cursor) if cursor else None
+
+        # Busca um item a mais para saber se existe próxima página
+        recipes = await self.repository.list_summaries_by_user_id(user_id, limit=page_size + 1, after=after)
+        next_cursor = None
+        if len(recipes) > page_size:
+            recipes = recipes[:page_size]
+            next_cursor = encode_cursor(recipes[-1].created_at, recipes[-1].id)
         
         return [
             RecipeListResponse(
                 id=str(recipe.id),
                 name=recipe.name,
                 created_at=recipe.created_at,
-                ingredients_count=len(recipe.recipe_ingredients)
+                ingredients_count=recipe.ingredients_count
             )
             for recipe in recipes
+        ], next_cursor
+
+    async def search_recipes(
+        self,
+        user_id: str,
+        q: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[RecipeSearchResult], Optional[str]]:
+        """
+        Busca receitas do usuário pelo nome, passos ou ingredientes,
+        ordenadas por relevância. Retorna também o cursor da próxima página.
+        """
+        page_size = clamp_page_size(limit)
+        offset = decode_offset_cursor(cursor) if cursor else 0
+
+        # Busca um item a mais para saber se existe próxima página
+        recipes = await self.repository.search_summaries_by_user_id(
+            user_id, q, limit=page_size + 1, offset=offset
+        )
+        next_cursor = None
+        if len(recipes) > page_size:
+            recipes = recipes[:page_size]
+            next_cursor = encode_offset_cursor(offset + page_size)
+
+        return [
+            RecipeSearchResult(
+                id=str(recipe.id),
+                name=recipe.name,
+                created_at=recipe.created_at,
+                ingredients_count=recipe.ingredients_count,
+                rank=recipe.rank
+            )
+            for recipe in recipes
+        ], next_cursor
+
+    async def list_cookable_recipes(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        min_coverage: float = 0.0
+    ) -> List[CookableRecipe]:
+        """
+        Receitas salvas do usuário que usam itens da despensa, das mais
+        completas às menos completas, com os ingredientes que faltam em cada uma.
+        """
+        index = await cookable_service.get_index(
+            user_id,
+            lambda: self.repository.list_ingredient_names_by_user_id(user_id)
+        )
+        pantry = await self.ingredient_repository.list_names_by_user(user_id)
+
+        return [
+            CookableRecipe(
+                id=match.recipe.id,
+                name=match.recipe.name,
+                coverage=match.coverage,
+                ingredients_count=len(match.recipe.ingredients),
+                missing_ingredients=match.missing,
+                insufficient_ingredients=match.insufficient
+            )
+            for match in index.match(pantry, clamp_page_size(limit), min_coverage)
         ]
 
-    def delete_recipe(self, recipe_id: str, user_id: str) -> bool:
+    async def delete_recipe(self, recipe_id: str, user_id: str) -> bool:
         """Deleta uma receita do usuário."""
-        recipe = self.repository.get_by_id(recipe_id)
+        recipe = await self.repository.get_by_id(recipe_id)
         
         if not recipe:
             raise ValueError("Receita não encontrada")
@@ -114,4 +209,6 @@ class RecipeService:
         if str(recipe.user_id) != user_id:
             raise PermissionError("Você não tem permissão para deletar esta receita")
         
-        return self.repository.delete(recipe_id)
+        deleted = await self.repository.delete(recipe_id)
+        cookable_service.remove_recipe(user_id, recipe_id)
+        return deleted
@@ -1,21 +1,115 @@
-from supabase import create_client, Client
-from fastapi import UploadFile, HTTPException, status
-from typing import Optional
+from supabase import create_client, Client, ClientOptions
+from fastapi import Request, UploadFile, HTTPException, status
+from typing import AsyncIterator, Dict, List, Optional, Union
+from urllib.parse import quote
+import asyncio
+import httpx
+import os
+import tempfile
 import uuid
 from pathlib import Path
 
+from src.core.cache import TTLCache
 from src.core.config import settings
+from src.services.image_service import FULL_IMAGE_NAME, ImageService, ImageTooLargeError, thumbnail_paths
+
+
+# Assinaturas (magic bytes) das imagens aceitas: tipo MIME e extensão salvos no storage
+HEIF_BRANDS = {b"heic", b"heix", b"hevc", b"hevx", b"heim", b"heis", b"mif1", b"msf1"}
+
+# Caracteres não escapados nos caminhos das URLs públicas (os mesmos do SDK)
+URL_PATH_SAFE = "/!$&'()*+,;=:@"
+
+
+def sniff_image_type(header: bytes) -> Optional[tuple]:
+    """
+    Identifica o tipo da imagem pelos bytes iniciais do arquivo
+    
+    Returns:
+        tuple: (content-type, extensão) ou None se não for um formato aceito
+    """
+    if header.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg", ".jpg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png", ".png"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp", ".webp"
+    if header[4:8] == b"ftyp" and header[8:12] in HEIF_BRANDS:
+        return "image/heic", ".heic"
+    return None
 
 
 class StorageService:
-    """Service para gerenciar uploads de arquivos no Supabase Storage"""
+    """
+    Service para gerenciar uploads de arquivos no Supabase Storage.
+
+    Deve existir uma única instância por processo (criada na inicialização do
+    servidor e obtida via get_storage_service), para que o cliente do Supabase
+    e suas conexões HTTP (keep-alive) sejam reaproveitados entre requisições.
+    """
     
-    def __init__(self):
+    def __init__(
+        self,
+        http_client: Optional[httpx.Client] = None,
+        image_service: Optional[ImageService] = None
+    ):
+        # Processamento de imagens (WebP + miniaturas); None para salvar como enviadas
+        self.image_service = image_service
+
+        # Cliente HTTP com pool de conexões compartilhado por todas as requisições
+        self.http_client = http_client or httpx.Client(
+            limits=httpx.Limits(
+                max_connections=settings.STORAGE_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.STORAGE_HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=60
+            ),
+            timeout=httpx.Timeout(settings.STORAGE_HTTP_TIMEOUT, connect=5.0)
+        )
         self.supabase: Client = create_client(
             settings.SUPABASE_URL,
-            settings.SUPABASE_KEY
+            settings.SUPABASE_KEY,
+            options=ClientOptions(
+                httpx_client=self.http_client,
+                auto_refresh_token=False,
+                persist_session=False
+            )
         )
         self.bucket_name = settings.SUPABASE_BUCKET_NAME
+
+        # Cliente assíncrono usado nos uploads em streaming (API REST do Storage)
+        self.async_http_client = httpx.AsyncClient(
+            headers={
+                "Authorization": f"Bearer {settings.SUPABASE_KEY}",
+                "apikey": settings.SUPABASE_KEY
+            },
+            limits=httpx.Limits(
+                max_connections=settings.STORAGE_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.STORAGE_HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=60
+            ),
+            timeout=httpx.Timeout(settings.STORAGE_HTTP_TIMEOUT, connect=5.0)
+        )
+        self.object_url_prefix = (
+            f"{settings.SUPABASE_URL.rstrip('/')}/storage/v1/object/{quote(self.bucket_name)}/"
+        )
+
+        # URLs públicas são função pura de SUPABASE_URL, bucket e caminho do arquivo
+        self.public_url_prefix = (
+            f"{settings.SUPABASE_URL.rstrip('/')}/storage/v1/object/public/{quote(self.bucket_name)}/"
+        )
+
+        # URLs assinadas são reaproveitadas até faltar 20% do prazo para expirarem
+        self.signed_urls = settings.STORAGE_SIGNED_URLS
+        self.signed_url_expires_in = settings.STORAGE_SIGNED_URL_EXPIRES_IN
+        self.signed_url_cache = TTLCache(
+            max_entries=settings.STORAGE_SIGNED_URL_CACHE_SIZE,
+            ttl=self.signed_url_expires_in * 0.8
+        )
+
+    async def aclose(self) -> None:
+        """Fecha os pools de conexões HTTP com o Supabase"""
+        self.http_client.close()
+        await self.async_http_client.aclose()
     
     async def upload_image(
         self, 
@@ -25,6 +119,14 @@ class StorageService:
         """
         Faz upload de uma imagem para o Supabase Storage
         
+        O tipo é validado pelos bytes iniciais do arquivo (e não pelo cabeçalho
+        enviado pelo cliente) e a leitura é interrompida assim que o tamanho
+        máximo é ultrapassado. O arquivo nunca é mantido inteiro em memória:
+        é lido em blocos de STORAGE_UPLOAD_CHUNK_SIZE e, com o ImageService
+        disponível, gravado em um arquivo temporário, processado (WebP e
+        miniaturas) em outro processo e salvo com suas miniaturas; caso
+        contrário, é enviado em streaming direto para o storage.
+        
         Args:
             file: Arquivo enviado pelo usuário
             folder: Pasta dentro do bucket (default: ingredients)
@@ -35,70 +137,202 @@ class StorageService:
         Raises:
             HTTPException: Se houver erro no upload
         """
-        # Validar tipo de arquivo
-        allowed_types = ["image/jpeg", "image/jpg", "image/png", "image/webp", "image/heic", "image/heif"]
-        if file.content_type not in allowed_types:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Tipo de arquivo não permitido. Use: {', '.join(allowed_types)}"
-            )
-        
-        # Validar tamanho (máximo 5MB)
-        file_size = 0
-        content = await file.read()
-        file_size = len(content)
-        
-        if file_size > 5 * 1024 * 1024:  # 5MB
+        # Rejeita sem ler o conteúdo quando o tamanho já é conhecido
+        if file.size is not None and file.size > settings.STORAGE_UPLOAD_MAX_BYTES:
+            raise self._too_large_error()
+
+        # Validar tipo de arquivo pelos bytes iniciais
+        first_chunk = await file.read(settings.STORAGE_UPLOAD_CHUNK_SIZE)
+        image_type = sniff_image_type(first_chunk)
+        if image_type is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Arquivo muito grande. Tamanho máximo: 5MB"
+                detail="Tipo de arquivo não permitido. Use: JPEG, PNG, WebP ou HEIC"
             )
-        
-        # Resetar o ponteiro do arquivo
-        await file.seek(0)
-        
-        # Gerar nome único para o arquivo
-        file_extension = Path(file.filename).suffix
-        unique_filename = f"{folder}/{uuid.uuid4()}{file_extension}"
-        
+        content_type, file_extension = image_type
+
         try:
-            # Upload para o Supabase
-            response = self.supabase.storage.from_(self.bucket_name).upload(
-                path=unique_filename,
-                file=content,
-                file_options={"content-type": file.content_type}
-            )
-            
+            if self.image_service is not None:
+                return await self._upload_processed(file, first_chunk, content_type, file_extension, folder)
+
+            # Gerar nome único para o arquivo
+            unique_filename = f"{folder}/{uuid.uuid4()}{file_extension}"
+
+            # Upload para o Supabase em streaming
+            await self._upload_object(unique_filename, self._file_chunks(file, first_chunk), content_type)
             return unique_filename
             
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Erro ao fazer upload da imagem: {str(e)}"
             )
+
+    async def _upload_processed(
+        self,
+        file: UploadFile,
+        first_chunk: bytes,
+        content_type: str,
+        file_extension: str,
+        folder: str
+    ) -> str:
+        """
+        Processa a imagem (WebP + miniaturas) e envia todas as variantes.
+
+        O arquivo é gravado em disco bloco a bloco (limitado a STORAGE_UPLOAD_MAX_BYTES)
+        e o processo do ImageService o lê de lá: neste processo, a memória por upload
+        continua limitada a um bloco mais as variantes WebP geradas (reduzidas a
+        IMAGE_MAX_DIMENSION). Se o formato não puder ser processado, envia o
+        arquivo original, também em streaming.
+        """
+        fd, spool_path = tempfile.mkstemp(prefix="upload-", suffix=file_extension)
+        try:
+            with os.fdopen(fd, "wb") as spool:
+                async for chunk in self._file_chunks(file, first_chunk):
+                    await asyncio.to_thread(spool.write, chunk)
+
+            try:
+                variants = await self.image_service.process(spool_path)
+            except ImageTooLargeError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Imagem com resolução grande demais"
+                )
+            except Exception as e:
+                print(f"Erro ao processar imagem, enviando original: {str(e)}")
+                unique_filename = f"{folder}/{uuid.uuid4()}{file_extension}"
+                await self._upload_object(unique_filename, self._spooled_chunks(spool_path), content_type)
+                return unique_filename
+        finally:
+            os.remove(spool_path)
+
+        # Cada imagem processada fica em sua própria pasta: full.webp, sm.webp, md.webp
+        base_path = f"{folder}/{uuid.uuid4()}"
+        paths = {name: f"{base_path}/{name}.webp" for name in variants}
+        try:
+            await asyncio.gather(*(
+                self._upload_object(paths[name], data, "image/webp")
+                for name, data in variants.items()
+            ))
+        except Exception:
+            # Remove as variantes que chegaram a ser enviadas
+            await self.delete_image(paths[FULL_IMAGE_NAME])
+            raise
+
+        return paths[FULL_IMAGE_NAME]
+
+    @staticmethod
+    async def _spooled_chunks(path: str) -> AsyncIterator[bytes]:
+        """Lê em blocos o arquivo temporário de um upload"""
+        with open(path, "rb") as spool:
+            while chunk := await asyncio.to_thread(spool.read, settings.STORAGE_UPLOAD_CHUNK_SIZE):
+                yield chunk
+
+    async def _file_chunks(self, file: UploadFile, first_chunk: bytes) -> AsyncIterator[bytes]:
+        """Lê o arquivo em blocos, validando o tamanho à medida que é lido"""
+        max_bytes = settings.STORAGE_UPLOAD_MAX_BYTES
+        total = len(first_chunk)
+        chunk = first_chunk
+        while chunk:
+            if total > max_bytes:
+                raise self._too_large_error()
+            yield chunk
+            chunk = await file.read(settings.STORAGE_UPLOAD_CHUNK_SIZE)
+            total += len(chunk)
+
+    async def _upload_object(self, path: str, content: Union[bytes, AsyncIterator[bytes]], content_type: str) -> None:
+        """Envia um objeto para o bucket pela API REST do Storage"""
+        response = await self.async_http_client.post(
+            f"{self.object_url_prefix}{quote(path)}",
+            content=content,
+            headers={
+                "content-type": content_type,
+                "cache-control": "max-age=3600",
+                "x-upsert": "false"
+            }
+        )
+        response.raise_for_status()
+
+    @staticmethod
+    def _too_large_error() -> HTTPException:
+        max_mb = settings.STORAGE_UPLOAD_MAX_BYTES // (1024 * 1024)
+        return HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Arquivo muito grande. Tamanho máximo: {max_mb}MB"
+        )
     
     def get_public_url(self, file_path: str) -> str:
         """
-        Gera a URL pública de um arquivo no Supabase Storage
-        
+        Gera a URL pública de um arquivo no Supabase Storage, localmente
+        (sem passar pelo SDK)
+
+        Como no SDK, os caracteres permitidos em um caminho de URL (RFC 3986)
+        ficam como estão; "#" e "?" são escapados (o SDK corta o caminho neles)
+
         Args:
             file_path: Caminho do arquivo no storage
             
         Returns:
             str: URL pública do arquivo
         """
-        try:
-            response = self.supabase.storage.from_(self.bucket_name).get_public_url(file_path)
-            return response
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Erro ao gerar URL pública: {str(e)}"
-            )
+        return self.public_url_prefix + quote(file_path.lstrip("/"), safe=URL_PATH_SAFE)
+
+    def get_image_url(self, file_path: str) -> Optional[str]:
+        """
+        Retorna a URL de acesso a uma imagem: pública ou assinada,
+        conforme STORAGE_SIGNED_URLS
+        """
+        return self.get_image_urls([file_path]).get(file_path)
+
+    def get_image_urls(self, file_paths: List[str]) -> Dict[str, str]:
+        """
+        Retorna as URLs de acesso de várias imagens de uma vez.
+        No modo assinado, as URLs ainda não cacheadas são assinadas em uma
+        única chamada ao Supabase.
+        
+        Args:
+            file_paths: Caminhos dos arquivos no storage
+            
+        Returns:
+            Dict[str, str]: URL de cada caminho
+        """
+        if not self.signed_urls:
+            return {path: self.get_public_url(path) for path in file_paths}
+
+        urls = {}
+        missing = []
+        for path in file_paths:
+            cached = self.signed_url_cache.get(path)
+            if cached is None:
+                missing.append(path)
+            else:
+                urls[path] = cached
+
+        if missing:
+            try:
+                signed = self.supabase.storage.from_(self.bucket_name).create_signed_urls(
+                    list(dict.fromkeys(missing)),
+                    self.signed_url_expires_in
+                )
+            except Exception as e:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Erro ao gerar URL assinada: {str(e)}"
+                )
+
+            for item in signed:
+                if item.get("error"):
+                    continue
+                urls[item["path"]] = item["signedURL"]
+                self.signed_url_cache.set(item["path"], item["signedURL"])
+
+        return urls
     
     async def delete_image(self, file_path: str) -> bool:
         """
-        Remove uma imagem do Supabase Storage
+        Remove uma imagem do Supabase Storage, junto com suas miniaturas
         
         Args:
             file_path: Caminho do arquivo no storage
@@ -107,8 +341,14 @@ class StorageService:
             bool: True se removido com sucesso
         """
         try:
-            self.supabase.storage.from_(self.bucket_name).remove([file_path])
+            paths = [file_path, *thumbnail_paths(file_path).values()]
+            self.supabase.storage.from_(self.bucket_name).remove(paths)
             return True
         except Exception as e:
             print(f"Erro ao deletar imagem: {str(e)}")
             return False
+
+
+def get_storage_service(request: Request) -> StorageService:
+    """Dependency que retorna a instância compartilhada do StorageService"""
+    return request.app.state.storage_service
@@ -1,34 +1,33 @@
 from fastapi import HTTPException, status
 from uuid import UUID
-from src.repositories.user_repository import UserRepository
 from src.api.schemas.user_schema import UserCreate, UserLogin
 from src.core.security import create_access_token
 
 
 class UserService:
-    def __init__(self, user_repository: UserRepository):
+    def __init__(self, user_repository):
         self.user_repository = user_repository
 
-    def register_user(self, user_data: UserCreate):
-        existing_user = self.user_repository.get_by_username(user_data.username)
+    async def register_user(self, user_data: UserCreate):
+        existing_user = await self.user_repository.get_by_username(user_data.username)
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="Username already exists"
             )
 
-        existing_email = self.user_repository.get_by_email(user_data.email)
+        existing_email = await self.user_repository.get_by_email(user_data.email)
         if existing_email:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="Email already exists"
             )
 
-        user = self.user_repository.create(user_data.model_dump())
+        user = await self.user_repository.create(user_data.model_dump())
         return user
 
-    def login_user(self, login_data: UserLogin):
-        user = self.user_repository.get_by_username(login_data.username)
+    async def login_user(self, login_data: UserLogin):
+        user = await self.user_repository.get_by_username(login_data.username)
         
         if not user or user.password != login_data.password:
             raise HTTPException(
@@ -39,14 +38,15 @@ class UserService:
         token_data = {
             "sub": str(user.id),
             "username": user.username,
-            "email": user.email
+            "email": user.email,
+            "full_name": user.full_name
         }
         access_token = create_access_token(data=token_data)
         
         return {"access_token": access_token, "token_type": "bearer"}
 
-    def get_user_by_id(self, user_id: UUID):
-        user = self.user_repository.get_by_id(user_id)
+    async def get_user_by_id(self, user_id: UUID):
+        user = await self.user_repository.get_by_id(user_id)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
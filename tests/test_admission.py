@@ -0,0 +1,212 @@
+"""
+Controle de admissão das gerações: prioridade das listas já geradas e
+devolução dos tokens (do usuário e do balde global) por quem não chega à LLM.
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from src.core.config import settings
+from src.core.metrics import metrics
+from src.core.security import create_access_token
+from src.models import User
+from src.services.admission_service import (
+    GLOBAL_BUCKET,
+    PRIORITY_FIRST,
+    PRIORITY_REPEAT,
+    AdmissionService,
+    InMemoryRateLimitBackend,
+    ServiceOverloaded,
+    SQLiteRateLimitBackend,
+    admission_service
+)
+from src.services.ai_service import ai_service
+from src.services.llm_providers import FakeProvider
+from src.services.llm_router import ProviderRouter
+from src.services.recipe_cache_service import build_cache_key
+
+
+INGREDIENTS = [{"Ingrediente": "Tomate", "qtd": "2 unidades"}, {"Ingrediente": "Ovo", "qtd": "3 unidades"}]
+
+
+@pytest.fixture
+def small_global_bucket(monkeypatch):
+    """Balde global de 2 tokens, praticamente sem reposição durante o teste"""
+    monkeypatch.setattr(settings, "AI_GLOBAL_BURST", 2)
+    monkeypatch.setattr(settings, "AI_GLOBAL_RATE_PER_MINUTE", 0.001)
+
+
+@pytest.fixture
+def single_user_token(monkeypatch):
+    """Balde de 1 token por usuário, praticamente sem reposição durante o teste"""
+    monkeypatch.setattr(settings, "AI_USER_BURST", 1)
+    monkeypatch.setattr(settings, "AI_USER_RATE_PER_MINUTE", 0.001)
+
+
+def _service(**options) -> AdmissionService:
+    options = {"max_active": 1, "queue_size": 4, "queue_timeout": 0.05, **options}
+    return AdmissionService(InMemoryRateLimitBackend(100), **options)
+
+
+def test_priority_is_demoted_only_after_generation():
+    service = _service()
+
+    assert service.priority("u1", "tomate") == PRIORITY_FIRST
+    # Consultar a prioridade não conta como geração (ex.: 503 antes de gerar)
+    assert service.priority("u1", "tomate") == PRIORITY_FIRST
+
+    service.mark_generated("u1", "tomate")
+    assert service.priority("u1", "tomate") == PRIORITY_REPEAT
+    assert service.priority("u2", "tomate") == PRIORITY_FIRST
+
+
+@pytest.mark.usefixtures("small_global_bucket")
+def test_queue_timeout_refunds_global_token():
+    service = _service()
+
+    async def scenario():
+        slot = await service.acquire()
+        with pytest.raises(ServiceOverloaded):
+            await service.acquire()
+        slot.release()
+        # Restam os 2 tokens menos o da geração admitida
+        (await service.acquire()).release()
+        with pytest.raises(ServiceOverloaded):
+            await service.acquire()
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.usefixtures("small_global_bucket")
+def test_cancelled_waiter_refunds_global_token():
+    service = _service(queue_timeout=5.0)
+
+    async def scenario():
+        slot = await service.acquire()
+        waiter = asyncio.ensure_future(service.acquire())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert service.active == 1
+        slot.release()
+        (await service.acquire()).release()
+
+    asyncio.run(scenario())
+
+
+def test_sqlite_backend_refund(tmp_path):
+    backend = SQLiteRateLimitBackend(str(tmp_path / "buckets.sqlite3"))
+    bucket = {"rate": 0.001, "capacity": 2}
+
+    assert backend.take(GLOBAL_BUCKET, **bucket) == 0
+    assert backend.take(GLOBAL_BUCKET, **bucket) == 0
+    assert backend.take(GLOBAL_BUCKET, **bucket) > 0
+
+    backend.refund(GLOBAL_BUCKET, **bucket)
+    assert backend.take(GLOBAL_BUCKET, **bucket) == 0
+
+    # A devolução nunca passa da capacidade
+    for _ in range(5):
+        backend.refund(GLOBAL_BUCKET, **bucket)
+    assert [backend.take(GLOBAL_BUCKET, **bucket) == 0 for _ in range(3)] == [True, True, False]
+    backend.close()
+
+
+def _generate(client, headers, ingredients):
+    return client.post("/recipes/generate", json={"listaIngredientes": ingredients}, headers=headers)
+
+
+def _user_tokens(user_id) -> int:
+    """Tokens disponíveis no balde do usuário (consumidos para contar e devolvidos em seguida)"""
+    bucket = {"rate": settings.AI_USER_RATE_PER_MINUTE / 60, "capacity": settings.AI_USER_BURST}
+    taken = 0
+    while taken <= settings.AI_USER_BURST and admission_service.backend.take(f"user:{user_id}", **bucket) == 0:
+        taken += 1
+    for _ in range(taken):
+        admission_service.backend.refund(f"user:{user_id}", **bucket)
+    return taken
+
+
+# Cada rota com uma lista própria, fora do cache de receitas dos outros testes
+@pytest.mark.usefixtures("single_user_token")
+@pytest.mark.parametrize("url, ingredient", [("/recipes/generate", "Chuchu"), ("/recipes/generate/stream", "Jiló")])
+def test_overloaded_generation_refunds_user_token(client, auth_headers, monkeypatch, url, ingredient):
+    async def overloaded(priority=PRIORITY_FIRST):
+        raise ServiceOverloaded(retry_after=1.0)
+
+    body = {"listaIngredientes": [{"Ingrediente": ingredient, "qtd": "1 unidade"}]}
+    with monkeypatch.context() as patch:
+        patch.setattr(admission_service, "acquire", overloaded)
+        # Sem a devolução, a segunda já seria recusada com 429
+        assert [client.post(url, json=body, headers=auth_headers).status_code for _ in range(3)] == [503] * 3
+
+    assert client.post(url, json=body, headers=auth_headers).status_code == 200
+    # A geração que chegou à LLM consumiu o único token
+    assert client.post(url, json={"listaIngredientes": INGREDIENTS}, headers=auth_headers).status_code == 429
+
+
+@pytest.mark.usefixtures("single_user_token")
+@pytest.mark.parametrize("url, ingredient", [("/recipes/generate", "Quiabo"), ("/recipes/generate/stream", "Maxixe")])
+def test_cached_generation_refunds_user_token(client, auth_headers, user, url, ingredient):
+    body = {"listaIngredientes": [{"Ingrediente": ingredient, "qtd": "1 unidade"}]}
+    assert client.post("/recipes/generate", json=body, headers=auth_headers).status_code == 200
+    assert _user_tokens(user.id) == 0
+    # Devolve o token consumido pela geração, para as requisições respondidas pelo cache
+    admission_service.refund_user(str(user.id))
+
+    assert [client.post(url, json=body, headers=auth_headers).status_code for _ in range(3)] == [200] * 3
+    assert _user_tokens(user.id) == 1
+
+
+def test_overloaded_generation_keeps_first_priority(client, auth_headers, user, monkeypatch):
+    async def overloaded(priority=PRIORITY_FIRST):
+        raise ServiceOverloaded(retry_after=1.0)
+
+    # Lista usada só neste teste, fora do cache de receitas
+    ingredients = [{"Ingrediente": "Abóbora", "qtd": "1 unidade"}, {"Ingrediente": "Gengibre", "qtd": "1 colher"}]
+    key = build_cache_key(ingredients, 5)
+    with monkeypatch.context() as patch:
+        patch.setattr(admission_service, "acquire", overloaded)
+        assert _generate(client, auth_headers, ingredients).status_code == 503
+    assert admission_service.priority(str(user.id), key) == PRIORITY_FIRST
+
+    assert _generate(client, auth_headers, ingredients).status_code == 200
+    assert admission_service.priority(str(user.id), key) == PRIORITY_REPEAT
+
+
+def test_coalesced_requests_are_all_recorded(client, auth_headers, session_factory, user, monkeypatch):
+    other = User(username="sous", email="sous@example.com", password="x", full_name="Sous Chef")
+    db = session_factory()
+    db.add(other)
+    db.commit()
+    db.refresh(other)
+    db.close()
+    other_headers = {"Authorization": "Bearer " + create_access_token({"sub": str(other.id)})}
+    # Geração lenta: a segunda requisição chega enquanto a primeira ainda gera
+    monkeypatch.setattr(ai_service, "router", ProviderRouter([FakeProvider(latency=0.3)], hedge_enabled=False))
+    ingredients = [{"Ingrediente": "Berinjela", "qtd": "1 unidade"}, {"Ingrediente": "Alho", "qtd": "2 dentes"}]
+    key = build_cache_key(ingredients, 5)
+    coalesced = metrics.get("recipe_generations_coalesced")
+
+    async def concurrent_requests():
+        # Um único event loop, como no servidor: a segunda requisição aguarda a geração da primeira
+        transport = httpx.ASGITransport(app=client.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as http:
+            body = {"listaIngredientes": ingredients}
+            first = asyncio.ensure_future(http.post("/recipes/generate", json=body, headers=auth_headers))
+            await asyncio.sleep(0.1)
+            second = await http.post("/recipes/generate", json=body, headers=other_headers)
+            return await first, second
+
+    responses = asyncio.run(concurrent_requests())
+
+    assert [response.status_code for response in responses] == [200, 200]
+    assert metrics.get("recipe_generations_coalesced") == coalesced + 1
+    # Quem aguardou a geração do outro também fica registrado
+    assert admission_service.priority(str(user.id), key) == PRIORITY_REPEAT
+    assert admission_service.priority(str(other.id), key) == PRIORITY_REPEAT
+    # Só a requisição que chegou à LLM consome o limite do usuário
+    assert _user_tokens(user.id) == settings.AI_USER_BURST - 1
+    assert _user_tokens(other.id) == settings.AI_USER_BURST
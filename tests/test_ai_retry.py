@@ -0,0 +1,233 @@
+"""
+Novas tentativas, correção de JSON e orçamento de tempo das gerações,
+com falhas injetadas pelo FakeProvider (429, 500, timeout e JSON inválido).
+"""
+import asyncio
+import time
+
+import pytest
+
+from src.core.config import settings
+from src.core.metrics import metrics
+from src.core.retry import Deadline, RetryPolicy, parse_retry_after
+from src.services.ai_service import STRATEGY_BATCH, STRATEGY_PARALLEL, AIService
+from src.services.llm_providers import FakeProvider, ProviderError
+from src.services.llm_router import ProviderRouter
+
+
+INGREDIENTS = [{"Ingrediente": "Tomate", "qtd": "2 unidades"}, {"Ingrediente": "Ovo", "qtd": "3 unidades"}]
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    """Esperas curtas entre tentativas, para os testes não dependerem do backoff real"""
+    monkeypatch.setattr(settings, "AI_RETRY_BASE_DELAY", 0.01)
+    monkeypatch.setattr(settings, "AI_RETRY_MAX_DELAY", 0.05)
+    monkeypatch.setattr(settings, "AI_REQUEST_TIMEOUT", 0.2)
+    monkeypatch.setattr(settings, "AI_GENERATION_DEADLINE", 5.0)
+
+
+def _service(*failures: str, latency: float = 0.0):
+    provider = FakeProvider(latency=latency, failures=failures)
+    return AIService(router=ProviderRouter([provider], hedge_enabled=False)), provider
+
+
+def _increase(name: str, action):
+    before = metrics.get(name)
+    result = action()
+    return result, metrics.get(name) - before
+
+
+@pytest.mark.parametrize("failure", ["429", "500", "timeout"])
+def test_transient_failure_is_retried(failure):
+    service, provider = _service(failure)
+
+    recipe, retries = _increase("ai_retries", lambda: asyncio.run(service.generate_recipe(INGREDIENTS)))
+
+    assert recipe.nome.startswith("Receita")
+    assert provider.calls == 2
+    assert retries == 1
+
+
+def test_rate_limit_is_counted():
+    service, provider = _service("429", "429")
+
+    _, rate_limited = _increase("ai_rate_limited", lambda: asyncio.run(service.generate_recipe(INGREDIENTS)))
+
+    assert provider.calls == 3
+    assert rate_limited == 2
+
+
+def test_invalid_json_is_repaired_by_the_llm():
+    service, provider = _service("invalid")
+
+    recipe, repairs = _increase("ai_repair_successes", lambda: asyncio.run(service.generate_recipe(INGREDIENTS)))
+
+    assert len(recipe.passos) == 3
+    # Uma chamada de geração e uma de correção, sem gerar a receita de novo
+    assert provider.calls == 2
+    assert repairs == 1
+
+
+def test_invalid_json_is_regenerated_without_repair(monkeypatch):
+    monkeypatch.setattr(settings, "AI_REPAIR_ENABLED", False)
+    service, provider = _service("invalid")
+
+    recipe = asyncio.run(service.generate_recipe(INGREDIENTS))
+
+    assert len(recipe.passos) == 3
+    assert provider.calls == 2
+
+
+def test_gives_up_after_max_attempts():
+    service, provider = _service("500", "500", "500", "500")
+
+    with pytest.raises(Exception, match="Erro ao gerar receita com IA"):
+        asyncio.run(service.generate_recipe(INGREDIENTS))
+
+    assert provider.calls == settings.AI_MAX_ATTEMPTS
+
+
+def test_retries_stop_at_the_deadline():
+    service, provider = _service(*["timeout"] * 10)
+
+    started = time.perf_counter()
+    with pytest.raises(Exception):
+        asyncio.run(service.generate_recipe(INGREDIENTS, deadline=Deadline(0.3)))
+    elapsed = time.perf_counter() - started
+
+    # Nenhuma tentativa passa do orçamento da geração
+    assert elapsed < 0.3 + 0.1
+    assert provider.calls <= 2
+
+
+def test_parallel_generation_recovers_from_mixed_failures():
+    service, provider = _service("429", "invalid", "500")
+
+    recipes = asyncio.run(service.generate_multiple_recipes(INGREDIENTS, count=5, strategy=STRATEGY_PARALLEL))
+
+    assert len(recipes) == 5
+    assert len({recipe.nome for recipe in recipes}) == 5
+
+
+def test_batch_generation_recovers_from_mixed_failures():
+    service, provider = _service("429", "invalid", "500")
+
+    recipes = asyncio.run(service.generate_multiple_recipes(INGREDIENTS, count=5, strategy=STRATEGY_BATCH))
+
+    assert len(recipes) == 5
+    assert len({recipe.nome for recipe in recipes}) == 5
+    # A resposta cortada não consome as novas tentativas das falhas transitórias
+    assert provider.calls == 4
+
+
+class _TruncatedTailProvider(FakeProvider):
+    """Responde com a última receita cortada no meio dos passos, como no limite de tokens"""
+
+    def _respond(self, messages):
+        text = super()._respond(messages)
+        return text[:text.rindex('{"numero": 2')]
+
+
+def test_batch_generation_repairs_truncated_last_recipe():
+    provider = _TruncatedTailProvider()
+    service = AIService(router=ProviderRouter([provider], hedge_enabled=False))
+
+    recipes, recovered = _increase(
+        "ai_batch_truncated_recovered",
+        lambda: asyncio.run(service.generate_multiple_recipes(INGREDIENTS, count=5, strategy=STRATEGY_BATCH))
+    )
+
+    assert len(recipes) == 5
+    # A última receita é aproveitada com os passos completos, sem uma nova chamada
+    assert len(recipes[-1].passos) == 1
+    assert provider.calls == 1
+    assert recovered == 1
+
+
+def test_parallel_generation_returns_partial_result_when_deadline_expires(monkeypatch):
+    monkeypatch.setattr(settings, "AI_GENERATION_DEADLINE", 0.5)
+    # Duas receitas respondem; as demais esgotam o orçamento em timeouts
+    service, provider = _service("ok", "ok", *["timeout"] * 20)
+
+    (recipes, partial) = _increase(
+        "ai_partial_generations",
+        lambda: asyncio.run(service.generate_multiple_recipes(INGREDIENTS, count=5, strategy=STRATEGY_PARALLEL))
+    )
+
+    assert len(recipes) == 2
+    assert partial == 1
+
+
+def test_retry_policy_honors_retry_after():
+    policy = RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.05)
+
+    assert policy.delay(0, retry_after=2.0) == 2.0
+    assert 0 <= policy.delay(5) <= 0.05
+    # A espera pedida pelo provedor não cabe no orçamento restante: desiste
+    assert not policy.should_retry(0, 2.0, Deadline(1.0))
+    assert policy.should_retry(0, 0.01, Deadline(1.0))
+    assert not policy.should_retry(2, 0.01, Deadline(1.0))
+
+
+@pytest.mark.parametrize("value, expected", [("3", 3.0), ("0.5", 0.5), ("-1", 0.0), (None, None), ("abc", None)])
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_batch_short_rounds_do_not_use_transient_retries(monkeypatch):
+    monkeypatch.setattr(settings, "AI_DEDUP_MAX_ROUNDS", 2)
+    monkeypatch.setattr(settings, "AI_MAX_ATTEMPTS", 3)
+    # Duas respostas cortadas (rodadas extras) e duas falhas seguidas (novas tentativas)
+    service, provider = _service("invalid", "invalid", "500", "500")
+
+    recipes, retries = _increase(
+        "ai_retries",
+        lambda: asyncio.run(service.generate_multiple_recipes(INGREDIENTS, count=5, strategy=STRATEGY_BATCH))
+    )
+
+    assert len(recipes) == 5
+    assert provider.calls == 5
+    assert retries == 2
+
+
+def test_batch_short_rounds_are_capped(monkeypatch):
+    monkeypatch.setattr(settings, "AI_DEDUP_MAX_ROUNDS", 2)
+    service, provider = _service(*["invalid"] * 10)
+
+    recipes, retries = _increase(
+        "ai_retries",
+        lambda: asyncio.run(service.generate_multiple_recipes(INGREDIENTS, count=5, strategy=STRATEGY_BATCH))
+    )
+
+    assert recipes == []
+    # A resposta inicial e AI_DEDUP_MAX_ROUNDS rodadas extras, sem novas tentativas
+    assert provider.calls == 3
+    assert retries == 0
+
+
+def test_batch_transient_failures_follow_retry_policy():
+    service, provider = _service(*["500"] * 10)
+
+    recipes = asyncio.run(service.generate_multiple_recipes(INGREDIENTS, count=5, strategy=STRATEGY_BATCH))
+
+    assert recipes == []
+    assert provider.calls == settings.AI_MAX_ATTEMPTS
+
+
+class _RejectingProvider(FakeProvider):
+    """Provedor que recusa a chamada com um erro não transitório (ex.: chave inválida)"""
+
+    async def _before_response(self, prompt_text, timeout):
+        self.calls += 1
+        raise ProviderError("401: chave de API inválida")
+
+
+def test_batch_non_transient_error_reaches_the_caller():
+    provider = _RejectingProvider()
+    service = AIService(router=ProviderRouter([provider], hedge_enabled=False))
+
+    with pytest.raises(ProviderError, match="401"):
+        asyncio.run(service.generate_multiple_recipes(INGREDIENTS, count=5, strategy=STRATEGY_BATCH))
+    # Erro não transitório: sem novas tentativas
+    assert provider.calls == 1
@@ -0,0 +1,139 @@
+"""
+Modos de banco das rotas: no síncrono (padrão), os repositórios rodam no
+threadpool, sem bloquear o event loop; no assíncrono (DB_ASYNC, asyncpg),
+as rotas usam AsyncSession e os repositórios assíncronos de ponta a ponta.
+"""
+import asyncio
+import time
+import uuid
+
+import httpx
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.api.middlewares.auth import user_cache
+from src.core.security import create_access_token
+from src.database.connection import get_session, to_async_url
+from src.meu_app.main import app
+from src.repositories.recipe_repository import AsyncRecipeRepository, RecipeRepository, get_recipe_repository
+
+
+SLOW_QUERY = 0.2
+REQUESTS = 5
+
+
+async def _gather_with_ticker(requests):
+    """
+    Executa as requisições concorrentemente enquanto uma tarefa mede o event loop;
+    retorna as respostas, o tempo total e o maior intervalo entre dois ticks
+    """
+    gaps, stop = [], asyncio.Event()
+
+    async def ticker():
+        last = time.perf_counter()
+        while not stop.is_set():
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    tick = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    responses = await asyncio.gather(*requests)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await tick
+    return responses, elapsed, max(gaps)
+
+
+def test_sync_repositories_run_off_the_event_loop(client, auth_headers, monkeypatch):
+    list_summaries = RecipeRepository.list_summaries_by_user_id
+
+    def slow_list_summaries(self, *args, **kwargs):
+        time.sleep(SLOW_QUERY)
+        return list_summaries(self, *args, **kwargs)
+
+    monkeypatch.setattr(RecipeRepository, "list_summaries_by_user_id", slow_list_summaries)
+    # Aquece o cache do usuário autenticado
+    client.get("/auth/me", headers=auth_headers)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=client.app),
+                                     base_url="http://testserver") as http:
+            return await _gather_with_ticker(http.get("/recipes/", headers=auth_headers) for _ in range(REQUESTS))
+
+    responses, elapsed, longest_gap = asyncio.run(scenario())
+
+    assert all(response.status_code == 200 for response in responses)
+    # As consultas lentas rodam em paralelo no threadpool e o loop segue livre
+    assert elapsed < SLOW_QUERY * REQUESTS / 2
+    assert longest_gap < SLOW_QUERY / 2
+
+
+# Postgres: rotas com AsyncSession (asyncpg)
+
+@pytest.fixture(scope="module")
+def async_database(postgres):
+    postgres.upgrade()
+    user_id = uuid.uuid4()
+    with postgres.engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO users (id, username, email, password, full_name) "
+            "VALUES (:id, 'assincrono', 'assincrono@example.com', 'x', 'Usuário Assíncrono')"
+        ), {"id": user_id})
+    token = create_access_token({
+        "sub": str(user_id),
+        "username": "assincrono",
+        "email": "assincrono@example.com",
+        "full_name": "Usuário Assíncrono"
+    })
+    return postgres, {"Authorization": f"Bearer {token}"}
+
+
+def test_routes_work_with_async_sessions(async_database, monkeypatch):
+    postgres, headers = async_database
+    recipe = {
+        "name": "Omelete",
+        "steps": [{"numero": 1, "descricao": "Bata os ovos."}, {"numero": 2, "descricao": "Frite."}],
+        "ingredients": [{"name": "Ovos", "quantity": "3 unidades", "order": 0}]
+    }
+
+    async def scenario():
+        engine = create_async_engine(to_async_url(postgres.url.render_as_string(hide_password=False)))
+        sessions = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+        used = []
+
+        async def get_async_test_session():
+            async with sessions() as db:
+                used.append(get_recipe_repository(db))
+                yield db
+
+        monkeypatch.setitem(app.dependency_overrides, get_session, get_async_test_session)
+        user_cache.clear()
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app),
+                                         base_url="http://testserver") as http:
+                created = await http.post("/recipes/save", json=recipe, headers=headers)
+                assert created.status_code == 201, created.text
+                recipe_id = created.json()["id"]
+
+                listed, detail = await asyncio.gather(
+                    http.get("/recipes/", headers=headers),
+                    http.get(f"/recipes/{recipe_id}", headers=headers)
+                )
+                deleted = await http.delete(f"/recipes/{recipe_id}", headers=headers)
+                missing = await http.get(f"/recipes/{recipe_id}", headers=headers)
+        finally:
+            user_cache.clear()
+            await engine.dispose()
+        return created.json(), listed, detail, deleted, missing, used
+
+    created, listed, detail, deleted, missing, used = asyncio.run(scenario())
+
+    assert used and all(isinstance(repository, AsyncRecipeRepository) for repository in used)
+    assert created["steps"] == recipe["steps"]
+    assert created["recipe_ingredients"][0]["amount"] == 3
+    assert [(item["id"], item["ingredients_count"]) for item in listed.json()] == [(created["id"], 1)]
+    assert detail.json()["recipe_ingredients"] == created["recipe_ingredients"]
+    assert (deleted.status_code, missing.status_code) == (204, 404)
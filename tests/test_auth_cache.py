@@ -0,0 +1,54 @@
+"""
+Usuário autenticado em cache: idas ao banco por requisição antes e depois do cache.
+"""
+from src.core.config import settings
+from src.models import User
+
+
+def test_authenticated_user_is_queried_once(client, auth_headers, statement_counter):
+    statement_counter.reset()
+    response = client.get("/auth/me", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["username"] == "chef"
+    # Sem cache: uma consulta ao banco por requisição autenticada
+    assert statement_counter.count == 1
+
+    for _ in range(5):
+        statement_counter.reset()
+        response = client.get("/auth/me", headers=auth_headers)
+        assert response.status_code == 200
+        # Com o usuário em cache, nenhuma ida ao banco
+        assert statement_counter.count == 0
+
+
+def test_cached_user_does_not_add_statements_to_endpoints(client, auth_headers, statement_counter):
+    client.get("/recipes/", headers=auth_headers)
+
+    statement_counter.reset()
+    assert client.get("/recipes/", headers=auth_headers).status_code == 200
+    # Só a listagem das receitas, sem a consulta do usuário
+    assert statement_counter.count == 1
+
+
+def test_user_change_invalidates_cache(client, auth_headers, session_factory, user, statement_counter):
+    client.get("/auth/me", headers=auth_headers)
+
+    db = session_factory()
+    db.get(User, user.id).full_name = "Chef Renomeado"
+    db.commit()
+    db.close()
+
+    statement_counter.reset()
+    response = client.get("/auth/me", headers=auth_headers)
+    assert response.json()["full_name"] == "Chef Renomeado"
+    assert statement_counter.count == 1
+
+
+def test_trusted_jwt_claims_skip_database(client, auth_headers, statement_counter, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_TRUST_JWT_CLAIMS", True)
+
+    statement_counter.reset()
+    response = client.get("/auth/me", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["full_name"] == "Chef de Teste"
+    assert statement_counter.count == 0
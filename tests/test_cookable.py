@@ -0,0 +1,197 @@
+"""
+Receitas possíveis com a despensa (GET /recipes/cookable): cobertura e
+ingredientes faltantes calculados pelo índice invertido, descarte do índice
+construído enquanto uma receita é salva e reconstrução depois do TTL.
+"""
+import asyncio
+import time
+import uuid
+
+import pytest
+
+from src.models.ingredient import Ingredient
+from src.services.cookable_service import CookableIndex, CookableService, cookable_service
+
+URL = "/recipes/cookable"
+
+RECIPES = {
+    "Omelete": ["Ovos", "Sal"],
+    "Bolo de fubá": ["Fubá", "Ovos", "Leite", "Açúcar"],
+    "Arroz branco": ["Arroz", "Alho", "Sal"],
+    "Salada de frutas": ["Banana", "Maçã"],
+}
+
+
+def _rows(recipes: dict) -> list:
+    """Linhas (recipe_id, nome, ingrediente, canônico, quantidade, unidade) como as do repositório"""
+    return [
+        (recipe_id, name, ingredient, None, None, None)
+        for recipe_id, (name, ingredients) in recipes.items()
+        for ingredient in ingredients
+    ]
+
+
+def _pantry(*names: str) -> list:
+    return [(name, None, None, None) for name in names]
+
+
+@pytest.fixture(autouse=True)
+def clear_indexes():
+    cookable_service.indexes.clear()
+    yield
+    cookable_service.indexes.clear()
+
+
+def test_index_coverage_and_missing_ingredients():
+    index = CookableIndex()
+    for i, (name, ingredients) in enumerate(RECIPES.items()):
+        index.add(str(i), name, [(ingredient, None, None, None) for ingredient in ingredients])
+
+    matches = index.match(_pantry("ovo", "SAL", "Fubá", "Leite"), limit=10)
+
+    # Mais completas primeiro; a salada não usa nada da despensa e fica de fora
+    assert [(match.recipe.name, match.coverage, match.missing) for match in matches] == [
+        ("Omelete", 1.0, []),
+        ("Bolo de fubá", 0.75, ["Açúcar"]),
+        ("Arroz branco", 1 / 3, ["Arroz", "Alho"]),
+    ]
+    assert [match.recipe.name for match in index.match(_pantry("ovo", "SAL", "Fubá", "Leite"), limit=1)] == ["Omelete"]
+    assert [match.recipe.name for match in index.match(_pantry("ovo", "sal", "fubá", "leite"), limit=10,
+                                                       min_coverage=0.5)] == ["Omelete", "Bolo de fubá"]
+
+
+def test_index_insufficient_quantities():
+    index = CookableIndex()
+    index.add("1", "Omelete", [("Ovos", "ovo", 3, "un"), ("Leite", "leite", 100, "ml"), ("Sal", "sal", None, None)])
+
+    match, = index.match([("Ovos", "ovo", 2, "un"), ("Leite", "leite", 0.5, "kg"), ("Sal", "sal", None, None)], limit=10)
+
+    # O leite está em outra unidade e não é comparado
+    assert (match.coverage, match.missing, match.insufficient) == (1.0, [], ["Ovos"])
+
+
+def test_index_replaces_and_removes_recipes():
+    index = CookableIndex()
+    index.add("1", "Omelete", _pantry("Ovos", "Sal"))
+    index.add("1", "Omelete", _pantry("Ovos", "Queijo"))
+    index.add("2", "Arroz branco", _pantry("Arroz", "Sal"))
+
+    assert [match.missing for match in index.match(_pantry("ovo"), limit=10)] == [["Queijo"]]
+    assert index.match(_pantry("sal"), limit=10)[0].recipe.name == "Arroz branco"
+
+    index.remove("2")
+    assert index.match(_pantry("sal"), limit=10) == []
+    assert index.postings.keys() == {"ovo", "queijo"}
+
+
+def test_cookable_route(client, auth_headers, user, session_factory):
+    recipes = [
+        {"name": name, "steps": [{"numero": 1, "descricao": "Prepare."}],
+         "ingredients": [{"name": ingredient, "quantity": "1 unidade", "order": j} for j, ingredient in enumerate(ingredients)]}
+        for name, ingredients in RECIPES.items()
+    ]
+    saved = client.post("/recipes/save/batch", json={"recipes": recipes}, headers=auth_headers).json()
+    db = session_factory()
+    for name in ("Ovos", "Sal", "Fubá"):
+        db.add(Ingredient(name=name, quantity="1", unit="kg", user_id=user.id))
+    db.commit()
+
+    cookable = client.get(URL, headers=auth_headers).json()
+    assert [(recipe["name"], recipe["coverage"], recipe["missing_ingredients"]) for recipe in cookable] == [
+        ("Omelete", 1.0, []),
+        ("Bolo de fubá", 0.5, ["Leite", "Açúcar"]),
+        ("Arroz branco", 1 / 3, ["Arroz", "Alho"]),
+    ]
+
+    # A despensa é lida a cada consulta; o índice só guarda as receitas
+    db.add(Ingredient(name="Leite", quantity="1", unit="l", user_id=user.id))
+    db.commit()
+    db.close()
+    client.delete(f"/recipes/{saved[0]['id']}", headers=auth_headers)
+
+    cookable = client.get(URL, headers=auth_headers, params={"min_coverage": 0.5}).json()
+    assert [(recipe["name"], recipe["missing_ingredients"]) for recipe in cookable] == [("Bolo de fubá", ["Açúcar"])]
+
+
+class Loader:
+    """load() do índice que conta as chamadas e pode ficar bloqueado até release()"""
+
+    def __init__(self, rows: list, blocked: bool = False):
+        self.rows = rows
+        self.calls = 0
+        self.started = asyncio.Event()
+        self.released = asyncio.Event()
+        if not blocked:
+            self.released.set()
+
+    async def __call__(self) -> list:
+        self.calls += 1
+        self.started.set()
+        await self.released.wait()
+        return self.rows
+
+
+@pytest.mark.parametrize("write", [
+    lambda service, user_id: service.add_recipes(user_id, [
+        {"id": "5", "name": "Pão", "recipe_ingredients": [{"name": "Farinha"}]}
+    ]),
+    lambda service, user_id: service.remove_recipe(user_id, "0"),
+], ids=["save", "delete"])
+def test_index_built_during_a_write_is_not_kept(write):
+    service = CookableService(max_users=10, ttl=60)
+    user_id = str(uuid.uuid4())
+
+    async def scenario():
+        load = Loader(_rows({str(i): (name, ingredients) for i, (name, ingredients) in enumerate(RECIPES.items())}),
+                      blocked=True)
+        build = asyncio.create_task(service.get_index(user_id, load))
+        await load.started.wait()
+        # A receita é salva (ou removida) depois da leitura das linhas pelo load()
+        write(service, user_id)
+        load.released.set()
+        stale = await build
+
+        fresh = await service.get_index(user_id, load)
+        again = await service.get_index(user_id, load)
+        return stale, fresh, again, load.calls
+
+    stale, fresh, again, calls = asyncio.run(scenario())
+
+    # O índice defasado responde a quem o pediu, mas não fica em memória
+    assert len(stale) == len(RECIPES)
+    assert fresh is not stale and again is fresh
+    assert calls == 2
+
+
+def test_index_without_concurrent_writes_is_kept():
+    service = CookableService(max_users=10, ttl=60)
+    user_id = str(uuid.uuid4())
+
+    async def scenario():
+        load = Loader(_rows({"0": ("Omelete", ["Ovos", "Sal"])}))
+        first, second = await asyncio.gather(service.get_index(user_id, load), service.get_index(user_id, load))
+        service.add_recipes(user_id, [{"id": "1", "name": "Pão", "recipe_ingredients": [{"name": "Farinha"}]}])
+        third = await service.get_index(user_id, load)
+        return first, second, third, load.calls
+
+    first, second, third, calls = asyncio.run(scenario())
+
+    # Consultas concorrentes compartilham a construção; a receita salva depois entra no índice existente
+    assert first is second is third
+    assert calls == 1
+    assert len(third) == 2
+
+
+def test_index_is_rebuilt_after_ttl():
+    ttl = 0.05
+    service = CookableService(max_users=10, ttl=ttl)
+    user_id = str(uuid.uuid4())
+    load = Loader(_rows({"0": ("Omelete", ["Ovos", "Sal"])}))
+
+    first = asyncio.run(service.get_index(user_id, load))
+    assert asyncio.run(service.get_index(user_id, load)) is first
+    time.sleep(ttl * 2)
+    rebuilt = asyncio.run(service.get_index(user_id, load))
+
+    assert rebuilt is not first
+    assert load.calls == 2
@@ -0,0 +1,108 @@
+"""
+Pool de conexões configurado por DB_POOL_*: opções do engine e teste de
+carga do tempo de espera por uma conexão com diferentes tamanhos de pool.
+"""
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, exc
+from sqlalchemy.pool import NullPool
+
+from src.core.config import settings
+from src.core.metrics import metrics
+from src.database.pool import InstrumentedQueuePool, pool_options
+
+
+THREADS = 20
+CHECKOUTS_PER_THREAD = 10
+HOLD_SECONDS = 0.01  # Tempo de uso de cada conexão (uma consulta curta)
+
+
+def test_pool_options_keep_pre_ping_by_default():
+    options = pool_options()
+
+    assert options["poolclass"] is InstrumentedQueuePool
+    # Conexões ociosas derrubadas pelo pooler do Supabase são detectadas antes do uso
+    assert options["pool_pre_ping"] is True
+
+
+def test_null_pool_option(monkeypatch):
+    monkeypatch.setattr(settings, "DB_NULL_POOL", True)
+
+    assert pool_options() == {"poolclass": NullPool}
+
+
+def _stress(database_url: str) -> dict:
+    """
+    THREADS threads obtendo CHECKOUTS_PER_THREAD conexões cada, usando cada uma
+    por HOLD_SECONDS. Retorna a variação das métricas do pool durante a carga.
+    """
+    engine = create_engine(database_url, connect_args={"check_same_thread": False}, **pool_options())
+    before = metrics.snapshot()
+    timeouts = []
+
+    def work():
+        for _ in range(CHECKOUTS_PER_THREAD):
+            try:
+                with engine.connect() as conn:
+                    conn.exec_driver_sql("SELECT 1")
+                    time.sleep(HOLD_SECONDS)
+            except exc.TimeoutError:
+                timeouts.append(1)
+
+    threads = [threading.Thread(target=work) for _ in range(THREADS)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+
+    after = metrics.snapshot()
+    empty = {"count": 0, "sum": 0.0}
+    wait_before = before.get("db_pool_wait_seconds", empty)
+    wait_after = after["db_pool_wait_seconds"]
+    checkouts = wait_after["count"] - wait_before["count"]
+    return {
+        "elapsed": elapsed,
+        "checkouts": checkouts,
+        "mean_wait": (wait_after["sum"] - wait_before["sum"]) / checkouts,
+        "timeouts": after.get("db_pool_timeouts", 0) - before.get("db_pool_timeouts", 0),
+        "failed": len(timeouts)
+    }
+
+
+def test_pool_wait_time_shrinks_as_pool_grows(tmp_path, monkeypatch):
+    database_url = f"sqlite:///{tmp_path / 'pool.sqlite3'}"
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(settings, "DB_POOL_TIMEOUT", 10.0)
+
+    results = {}
+    for size in (2, 5, THREADS):
+        monkeypatch.setattr(settings, "DB_POOL_SIZE", size)
+        results[size] = _stress(database_url)
+        print(f"pool={size}: {results[size]}")
+
+    for result in results.values():
+        assert result["checkouts"] == THREADS * CHECKOUTS_PER_THREAD
+        assert result["timeouts"] == 0
+
+    # Com menos conexões que threads, cada checkout espera as demais terminarem
+    assert results[2]["mean_wait"] > results[5]["mean_wait"] > results[THREADS]["mean_wait"]
+    assert results[2]["mean_wait"] > HOLD_SECONDS * 3
+    # Uma conexão por thread: praticamente sem espera
+    assert results[THREADS]["mean_wait"] < HOLD_SECONDS
+    assert results[2]["elapsed"] > results[THREADS]["elapsed"]
+
+
+def test_pool_timeouts_are_counted(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 1)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(settings, "DB_POOL_TIMEOUT", HOLD_SECONDS)
+
+    result = _stress(f"sqlite:///{tmp_path / 'pool.sqlite3'}")
+
+    assert result["timeouts"] > 0
+    assert result["timeouts"] == result["failed"]
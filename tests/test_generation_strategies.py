@@ -0,0 +1,79 @@
+"""
+Estratégias "paralela" e "lote" comparadas com o FakeProvider, simulando o
+tempo até o primeiro token e a vazão de saída: tokens consumidos, tempo até
+a primeira receita e tempo total.
+"""
+import asyncio
+import time
+
+import pytest
+
+from src.core.config import settings
+from src.core.metrics import metrics
+from src.services.ai_service import STRATEGY_BATCH, STRATEGY_PARALLEL, AIService
+from src.services.llm_providers import FakeProvider
+from src.services.llm_router import ProviderRouter
+
+
+LATENCY = 0.1             # Tempo até o primeiro token de cada chamada (segundos)
+TOKENS_PER_SECOND = 3000  # Vazão de saída: cerca de 0,08 s por receita
+INGREDIENTS = [{"Ingrediente": f"Ingrediente {i}", "qtd": "2 unidades"} for i in range(10)]
+COUNT = 5
+
+
+def _run(strategy: str) -> dict:
+    """Gera COUNT receitas em streaming; retorna tokens, tempo da primeira receita e total"""
+    service = AIService(router=ProviderRouter(
+        [FakeProvider(latency=LATENCY, tokens_per_second=TOKENS_PER_SECOND)], hedge_enabled=False
+    ))
+    before = {name: metrics.get(name) for name in ("ai_prompt_tokens", "ai_completion_tokens")}
+
+    async def generate():
+        started, first, recipes = time.perf_counter(), None, 0
+        async for event in service.stream_recipes(INGREDIENTS, COUNT, strategy=strategy):
+            if event["tipo"] == "receita":
+                recipes += 1
+                first = first or time.perf_counter() - started
+        return recipes, first, time.perf_counter() - started
+
+    recipes, first, total = asyncio.run(generate())
+    assert recipes == COUNT
+    tokens = {name: metrics.get(name) - value for name, value in before.items()}
+    return {"prompt": tokens["ai_prompt_tokens"], "completion": tokens["ai_completion_tokens"],
+            "first": first, "total": total}
+
+
+@pytest.fixture(scope="module")
+def results():
+    """Resultados das duas estratégias por AI_MAX_CONCURRENCY (com e sem chamadas simultâneas)"""
+    with pytest.MonkeyPatch.context() as patch:
+        runs = {}
+        for concurrency in (COUNT, 1):
+            patch.setattr(settings, "AI_MAX_CONCURRENCY", concurrency)
+            runs[concurrency] = {strategy: _run(strategy) for strategy in (STRATEGY_PARALLEL, STRATEGY_BATCH)}
+    return runs
+
+
+def test_batch_uses_fewer_tokens(results):
+    parallel, batch = results[COUNT].values()
+
+    # O prompt (instruções e ingredientes) vai uma vez, não uma vez por receita
+    assert batch["prompt"] < parallel["prompt"] / 3
+    assert batch["prompt"] + batch["completion"] < parallel["prompt"] + parallel["completion"]
+
+
+def test_batch_first_recipe_as_fast_but_slower_overall_with_concurrency(results):
+    parallel, batch = results[COUNT].values()
+
+    # A primeira receita chega assim que seu objeto fecha na resposta única
+    assert batch["first"] < parallel["first"] * 1.5
+    # Com uma chamada por receita em paralelo, a saída é gerada ao mesmo tempo;
+    # no lote, uma receita depois da outra
+    assert parallel["total"] < batch["total"]
+
+
+def test_batch_is_faster_without_concurrency(results):
+    parallel, batch = results[1].values()
+
+    # Chamadas em série pagam o tempo até o primeiro token a cada receita
+    assert batch["total"] < parallel["total"]
@@ -0,0 +1,127 @@
+"""
+A geração de receitas não pode bloquear o event loop: com várias gerações
+aguardando a LLM, o /health continua respondendo na mesma latência.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import asyncio
+import json
+import statistics
+import threading
+import time
+
+import httpx
+import pytest
+
+from src.meu_app.main import app
+from src.services.ai_service import AIService
+from src.services.llm_providers import OpenAICompatibleProvider
+from src.services.llm_router import ProviderRouter
+
+
+LLM_DELAY = 1.0
+GENERATIONS = 10
+
+RECIPE = {
+    "nome": "Omelete de Tomate",
+    "listaIngredientes": [{"nome": "Ovo", "quantidade": "2 unidades"}],
+    "passos": [{"numero": 1, "descricao": "Bata os ovos e leve à frigideira."}]
+}
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    """Servidor local com a API de chat completions, que demora LLM_DELAY para responder"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeLLMHandler)
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        with self.server.lock:
+            self.server.in_flight += 1
+        time.sleep(LLM_DELAY)
+        with self.server.lock:
+            self.server.in_flight -= 1
+
+        body = json.dumps({
+            "choices": [{"message": {"content": json.dumps(RECIPE, ensure_ascii=False)}}],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 100}
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def llm_server():
+    server = FakeLLMServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+async def _health_latencies(client: httpx.AsyncClient, samples: int) -> list:
+    latencies = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        response = await client.get("/health")
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200
+        await asyncio.sleep(0.02)
+    return latencies
+
+
+def test_health_latency_stays_flat_during_generations(llm_server):
+    async def scenario():
+        provider = OpenAICompatibleProvider(llm_server.base_url, api_key="test", model="fake")
+        service = AIService(router=ProviderRouter([provider], hedge_enabled=False))
+        ingredients = [{"Ingrediente": "Ovo", "qtd": "2 unidades"}]
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            idle = await _health_latencies(client, samples=10)
+
+            generations = [
+                asyncio.create_task(service.generate_recipe(ingredients))
+                for _ in range(GENERATIONS)
+            ]
+            # Espera as chamadas chegarem à LLM (uma coleta completa do gc
+            # pode atrasá-las em ~0,1 s), sem chegar perto de LLM_DELAY
+            waiting = time.perf_counter()
+            while llm_server.in_flight == 0 and time.perf_counter() - waiting < LLM_DELAY / 4:
+                await asyncio.sleep(0.01)
+            assert llm_server.in_flight > 0
+            busy = await _health_latencies(client, samples=10)
+            in_flight_after = llm_server.in_flight
+
+            recipes = await asyncio.gather(*generations)
+
+        await service.aclose()
+        return idle, busy, in_flight_after, recipes
+
+    idle, busy, in_flight_after, recipes = asyncio.run(scenario())
+
+    assert len(recipes) == GENERATIONS
+    # As medições foram feitas com as chamadas à LLM ainda pendentes
+    assert in_flight_after > 0
+    # Um cliente bloqueante seguraria o /health até a LLM responder (LLM_DELAY)
+    assert max(busy) < LLM_DELAY / 2
+    assert statistics.median(busy) < statistics.median(idle) + 0.05
@@ -0,0 +1,114 @@
+"""
+Processamento de imagens: variantes WebP, recusa de bombas de descompressão
+e upload processado a partir do arquivo temporário.
+"""
+import asyncio
+import io
+import os
+import tempfile
+
+import httpx
+import pytest
+from fastapi import HTTPException, UploadFile
+
+pytest.importorskip("PIL")
+from PIL import Image
+
+from src.services.image_service import (
+    FULL_IMAGE_NAME,
+    THUMBNAIL_SIZES,
+    ImageService,
+    ImageTooLargeError,
+    process_image
+)
+from src.services.storage_service import StorageService
+
+
+def _save(image: Image.Image, format: str) -> str:
+    fd, path = tempfile.mkstemp(suffix=f".{format.lower()}")
+    with os.fdopen(fd, "wb") as file:
+        image.save(file, format)
+    return path
+
+
+@pytest.fixture
+def photo_path():
+    path = _save(Image.new("RGB", (3000, 2000), (200, 50, 50)), "JPEG")
+    yield path
+    os.remove(path)
+
+
+@pytest.fixture
+def bomb_path():
+    # 100 milhões de pixels em poucos KB de PNG
+    path = _save(Image.new("1", (10000, 10000)), "PNG")
+    yield path
+    os.remove(path)
+
+
+def test_process_image_generates_webp_variants(photo_path):
+    variants = process_image(photo_path, max_dimension=1280, quality=80, max_pixels=50_000_000)
+
+    assert set(variants) == {FULL_IMAGE_NAME, *THUMBNAIL_SIZES}
+    with Image.open(io.BytesIO(variants[FULL_IMAGE_NAME])) as full:
+        assert full.format == "WEBP"
+        assert max(full.size) == 1280
+    for name, size in THUMBNAIL_SIZES.items():
+        with Image.open(io.BytesIO(variants[name])) as thumbnail:
+            assert max(thumbnail.size) == size
+
+
+def test_process_image_rejects_decompression_bombs(bomb_path):
+    assert os.path.getsize(bomb_path) < 100_000
+
+    # Acima do limite (aviso do Pillow tratado como erro) e acima do dobro (erro do Pillow)
+    for max_pixels in (60_000_000, 40_000_000):
+        with pytest.raises(ImageTooLargeError):
+            process_image(bomb_path, max_dimension=1280, quality=80, max_pixels=max_pixels)
+
+
+class StorageRecorder(httpx.AsyncBaseTransport):
+    def __init__(self):
+        self.uploaded = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.uploaded[request.url.path] = request.headers["content-type"]
+        async for _ in request.stream:
+            pass
+        return httpx.Response(200, json={})
+
+
+@pytest.fixture
+def processing_storage():
+    image_service = ImageService(max_workers=1)
+    recorder = StorageRecorder()
+    service = StorageService(image_service=image_service)
+    service.async_http_client = httpx.AsyncClient(transport=recorder)
+    yield service, recorder
+    asyncio.run(service.aclose())
+    image_service.shutdown()
+
+
+def test_processed_upload_reads_from_spooled_file(processing_storage, photo_path):
+    service, recorder = processing_storage
+    spooled = set(os.listdir(tempfile.gettempdir()))
+
+    with open(photo_path, "rb") as file:
+        path = asyncio.run(service.upload_image(UploadFile(file=file, filename="foto.jpg")))
+
+    assert path.endswith(f"/{FULL_IMAGE_NAME}.webp")
+    assert len(recorder.uploaded) == 1 + len(THUMBNAIL_SIZES)
+    assert set(recorder.uploaded.values()) == {"image/webp"}
+    # O arquivo temporário do upload é removido
+    assert set(os.listdir(tempfile.gettempdir())) <= spooled
+
+
+def test_processed_upload_rejects_decompression_bombs(processing_storage, bomb_path):
+    service, recorder = processing_storage
+
+    with open(bomb_path, "rb") as file, pytest.raises(HTTPException) as error:
+        asyncio.run(service.upload_image(UploadFile(file=file, filename="foto.png")))
+
+    assert error.value.status_code == 400
+    # A bomba não é enviada nem como arquivo original
+    assert recorder.uploaded == {}
@@ -0,0 +1,150 @@
+"""
+ProviderRouter com o FakeProvider: ordem de tentativa (latência medida,
+ordem configurada, pausa após falhas), failover e hedge.
+"""
+import asyncio
+import time
+
+import pytest
+
+from src.core.config import settings
+from src.core.metrics import metrics
+from src.services.llm_providers import FakeProvider, ProviderUnavailableError
+from src.services.llm_router import MIN_LATENCY_SAMPLES, ProviderRouter
+
+
+MESSAGES = [{"role": "user", "content": "Ingredientes:\n- Ovo: 2 unidades"}]
+
+
+def _router(*names: str) -> ProviderRouter:
+    return ProviderRouter([FakeProvider(name) for name in names], hedge_enabled=False)
+
+
+def _complete(router: ProviderRouter, timeout: float = 2.0) -> str:
+    return asyncio.run(router.complete(MESSAGES, temperature=0.7, max_tokens=100, timeout=timeout))
+
+
+def _increase(names, action) -> dict:
+    before = {name: metrics.get(name) for name in names}
+    action()
+    return {name: metrics.get(name) - value for name, value in before.items()}
+
+
+def _order(router: ProviderRouter) -> list:
+    return [provider.name for provider in router._order()]
+
+
+def test_configured_order_without_measurements():
+    assert _order(_router("a", "b", "c")) == ["a", "b", "c"]
+
+
+def test_unmeasured_providers_do_not_jump_ahead():
+    router = _router("a", "b")
+
+    _complete(router)
+
+    assert router.stats["a"].ewma is not None
+    assert router.stats["b"].ewma is None
+    # O provedor sem medição não é tratado como o mais rápido
+    assert _order(router) == ["a", "b"]
+
+
+def test_measured_providers_by_latency():
+    router = _router("a", "b", "c")
+    router.stats["a"].observe(1.0)
+    router.stats["b"].observe(0.2)
+
+    assert _order(router) == ["b", "a", "c"]
+
+
+def test_cooling_provider_is_last_resort():
+    router = _router("a", "b")
+    router.stats["b"].observe(0.1)
+    router.stats["b"].cool_down(60)
+
+    assert _order(router) == ["a"]
+
+    router.stats["a"].cool_down(30)
+    assert _order(router) == ["a", "b"]
+
+
+@pytest.mark.parametrize("failure", ["429", "500"])
+def test_failover_and_cooldown(monkeypatch, failure):
+    monkeypatch.setattr(settings, "AI_PROVIDER_COOLDOWN", 60)
+    a, b = FakeProvider("a", failures=[failure]), FakeProvider("b")
+    router = ProviderRouter([a, b], hedge_enabled=False)
+
+    increase = _increase(["ai_failovers", "ai_provider_errors_a"], lambda: _complete(router))
+
+    assert (a.calls, b.calls) == (1, 1)
+    assert increase == {"ai_failovers": 1, "ai_provider_errors_a": 1}
+    # Em pausa, "a" não é tentado na próxima chamada
+    assert router.stats["a"].cooling()
+    _complete(router)
+    assert (a.calls, b.calls) == (1, 2)
+
+
+def test_all_providers_failing_raises_transient_error():
+    router = ProviderRouter([FakeProvider("a", failures=["500"]), FakeProvider("b", failures=["500"])],
+                            hedge_enabled=False)
+
+    with pytest.raises(ProviderUnavailableError):
+        _complete(router)
+
+
+def test_hedge_after_default_delay(monkeypatch):
+    monkeypatch.setattr(settings, "AI_HEDGE_DELAY", 0.05)
+    a, b = FakeProvider("a", latency=1.0), FakeProvider("b")
+    router = ProviderRouter([a, b])
+
+    increase = _increase(["ai_hedged_requests", "ai_hedge_wins"], lambda: _complete(router))
+
+    assert (a.calls, b.calls) == (1, 1)
+    assert increase == {"ai_hedged_requests": 1, "ai_hedge_wins": 1}
+    # A chamada cancelada de "a" não vira uma medição de latência
+    assert router.stats["a"].ewma is None
+    assert router.stats["b"].ewma is not None
+
+
+def test_hedge_after_measured_p95(monkeypatch):
+    monkeypatch.setattr(settings, "AI_HEDGE_DELAY", 10.0)
+    a, b = FakeProvider("a", latency=0.5), FakeProvider("b")
+    router = ProviderRouter([a, b])
+    for _ in range(MIN_LATENCY_SAMPLES):
+        router.stats["a"].observe(0.01)
+        router.stats["b"].observe(0.02)
+
+    started = time.perf_counter()
+    _complete(router)
+    elapsed = time.perf_counter() - started
+
+    # Com medições suficientes, o hedge sai após o p95 de "a" (10 ms), não após AI_HEDGE_DELAY
+    assert b.calls == 1
+    assert elapsed < 0.25
+    assert len(router.stats["a"].latencies) == MIN_LATENCY_SAMPLES
+
+
+def test_no_hedge_when_primary_answers_in_time(monkeypatch):
+    monkeypatch.setattr(settings, "AI_HEDGE_DELAY", 1.0)
+    a, b = FakeProvider("a", latency=0.01), FakeProvider("b")
+
+    _complete(ProviderRouter([a, b]))
+
+    assert (a.calls, b.calls) == (1, 0)
+
+
+def test_cancelled_call_is_not_a_latency_sample():
+    a = FakeProvider("a", latency=1.0)
+    router = ProviderRouter([a], hedge_enabled=False)
+
+    async def cancel_midway():
+        task = asyncio.ensure_future(router.complete(MESSAGES, temperature=0.7, max_tokens=100, timeout=2.0))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    increase = _increase(["ai_provider_cancelled_a"], lambda: asyncio.run(cancel_midway()))
+
+    assert router.stats["a"].ewma is None
+    assert increase == {"ai_provider_cancelled_a": 1}
@@ -0,0 +1,23 @@
+"""
+Migrações não dependem do código da aplicação: o que elas gravam não pode
+mudar quando src/ muda depois que foram escritas.
+"""
+import ast
+from pathlib import Path
+
+import pytest
+
+
+VERSIONS = Path(__file__).resolve().parent.parent / "alembic" / "versions"
+
+
+@pytest.mark.parametrize("migration", sorted(VERSIONS.glob("*.py")), ids=lambda path: path.stem)
+def test_migration_does_not_import_application_code(migration):
+    tree = ast.parse(migration.read_text(encoding="utf-8"))
+    imported = [
+        node.module if isinstance(node, ast.ImportFrom) else alias.name
+        for node in ast.walk(tree)
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+        for alias in node.names
+    ]
+    assert not [module for module in imported if module and module.split(".")[0] == "src"]
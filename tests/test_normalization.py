@@ -0,0 +1,91 @@
+"""
+Normalização de nomes de ingredientes: singular e plural do mesmo
+ingrediente têm sempre o mesmo nome canônico, e as cópias congeladas nas
+migrações concordam com src/core/normalization.py.
+"""
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+from src.core.normalization import canonical_ingredient_name, fold_text, normalize_ingredient_name, singularize
+
+
+@pytest.mark.parametrize("singular, plural", [
+    ("tomate", "tomates"),
+    ("ovo", "ovos"),
+    ("limão", "limões"),
+    ("pão", "pães"),
+    ("pastel", "pastéis"),
+    ("atum", "atuns"),
+    ("flor", "flores"),
+    ("açúcar", "açúcares"),
+    ("colher", "colheres"),
+    ("noz", "nozes"),
+    # Singular em consoante + "re"/"se": plural só com "s"
+    ("espinafre", "espinafres"),
+    ("lebre", "lebres"),
+    ("vinagre", "vinagres"),
+    ("mousse", "mousses"),
+    # Singular em vogal + "se"/"re", listados como exceção
+    ("maionese", "maioneses"),
+    ("purê", "purês"),
+    # Singular em "ês"
+    ("pão francês", "pães franceses"),
+    ("molho inglês", "molhos ingleses"),
+    # Palavras de três letras
+    ("pé de moleque", "pés de moleque"),
+    ("pá", "pás"),
+])
+def test_singular_and_plural_share_canonical_name(singular, plural):
+    assert canonical_ingredient_name(plural) == canonical_ingredient_name(singular)
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("Espinafres", "espinafre"),
+    ("Maioneses", "maionese"),
+    ("Flores de abobrinha", "flor de abobrinha"),
+    ("brócolis", "brocolis"),
+    # Singulares terminados em "s"
+    ("Tênis", "tenis"),
+    ("Cogumelos paris", "cogumelo paris"),
+    ("Anis estrelado", "anis estrelado"),
+    ("Molho jus", "molho jus"),
+    # Palavras de três letras no plural; as de uma ou duas ficam como estão
+    ("Pés de moleque", "pe de moleque"),
+    ("Kgs", "kg"),
+    ("os", "os"),
+])
+def test_normalized_names(name, expected):
+    assert normalize_ingredient_name(name) == expected
+
+
+WORDS = [
+    "tomates", "limões", "pastéis", "flores", "espinafres", "maioneses", "franceses",
+    "tênis", "paris", "anis", "pés", "pás", "kgs", "os", "colheres", "xícaras",
+]
+
+
+def _migration(name: str):
+    path = next((Path(__file__).resolve().parent.parent / "alembic" / "versions").glob(f"{name}_*.py"))
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize("revision", ["e5a7c9d1f3b4", "f2b6d8e0a4c7"])
+def test_frozen_singularize_in_migrations_agrees(revision):
+    frozen = _migration(revision)
+    assert [frozen.singularize(frozen.fold_text(word)) for word in WORDS] == \
+        [singularize(fold_text(word)) for word in WORDS]
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("Tomates italianos picados", "tomate"),
+    ("Peito de frango", "frango"),
+    ("  Cebola   roxa ", "cebola roxa"),
+    ("pimenta-do-reino", "pimenta do reino"),
+])
+def test_canonical_dictionary(name, expected):
+    assert canonical_ingredient_name(name) == expected
@@ -0,0 +1,159 @@
+"""
+Paginação por cursor (keyset) das listagens: cada item aparece uma única vez,
+mesmo com datas de criação repetidas, e no Postgres cada página lê do índice
+(user_id, created_at DESC, id DESC) só as suas linhas, ao contrário de OFFSET.
+"""
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from src.core.config import settings
+from src.core.pagination import NEXT_CURSOR_HEADER
+from src.meu_app.main import app
+from src.models.ingredient import Ingredient
+from src.models.recipe import Recipe
+from src.repositories.recipe_repository import _summaries_by_user_query
+from src.services.storage_service import StorageService
+
+
+CREATED_AT = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    service = StorageService()
+    monkeypatch.setattr(app.state, "storage_service", service, raising=False)
+    yield service
+    asyncio.run(service.aclose())
+
+
+def _seed(session_factory, user, model, count: int) -> None:
+    """Itens em pares com a mesma data de criação (o desempate é pelo id)"""
+    db = session_factory()
+    for i in range(count):
+        created_at = CREATED_AT - timedelta(minutes=i // 2)
+        if model is Recipe:
+            db.add(Recipe(name=f"Receita {i}", instructions="[]", user_id=user.id, created_at=created_at))
+        else:
+            db.add(Ingredient(name=f"Ingrediente {i}", quantity="1", unit="kg", user_id=user.id,
+                              created_at=created_at))
+    db.commit()
+    db.close()
+
+
+def _pages(client, headers, url: str, limit: int) -> list:
+    pages, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = client.get(url, params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        pages.append(response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("url, model", [("/recipes/", Recipe), ("/ingredients/", Ingredient)])
+def test_pages_cover_every_item_once_in_order(client, auth_headers, session_factory, user, storage, url, model):
+    _seed(session_factory, user, model, 25)
+
+    pages = _pages(client, auth_headers, url, limit=7)
+
+    assert [len(page) for page in pages] == [7, 7, 7, 4]
+    items = [item for page in pages for item in page]
+    assert len({item["id"] for item in items}) == 25
+    keys = [(item["created_at"], item["id"]) for item in items]
+    assert keys == sorted(keys, reverse=True)
+
+
+@pytest.mark.parametrize("url", ["/recipes/", "/ingredients/"])
+def test_page_size_is_capped(client, auth_headers, session_factory, user, storage, monkeypatch, url):
+    _seed(session_factory, user, Recipe if url == "/recipes/" else Ingredient, 10)
+    monkeypatch.setattr(settings, "PAGE_SIZE_MAX", 4)
+
+    response = client.get(url, params={"limit": 50}, headers=auth_headers)
+
+    assert len(response.json()) == 4
+    assert NEXT_CURSOR_HEADER in response.headers
+
+
+@pytest.mark.parametrize("url", ["/recipes/", "/ingredients/"])
+@pytest.mark.parametrize("cursor", ["nao-e-um-cursor", "W10", "WyJvbnRlbSIsIngiXQ"])
+def test_invalid_cursor_is_rejected(client, auth_headers, storage, url, cursor):
+    response = client.get(url, params={"cursor": cursor}, headers=auth_headers)
+
+    assert response.status_code == 400
+
+
+# Postgres: plano das consultas em uma tabela grande
+
+RECIPES = 20000
+PAGE = 50
+DEEP = 15000  # Posição da página comparada (perto do fim da listagem)
+
+
+@pytest.fixture(scope="module")
+def recipes_database(postgres):
+    """RECIPES receitas para o usuário medido e outras tantas para outro usuário"""
+    postgres.upgrade()
+    users = [uuid.uuid4(), uuid.uuid4()]
+    with postgres.engine.begin() as conn:
+        for i, user_id in enumerate(users):
+            conn.execute(text(
+                "INSERT INTO users (id, username, email, password, full_name) "
+                "VALUES (:id, :name, :email, 'x', 'Usuário')"
+            ), {"id": user_id, "name": f"user{i}", "email": f"user{i}@example.com"})
+            conn.execute(text(
+                "INSERT INTO recipes (id, user_id, name, instructions, created_at) "
+                "SELECT gen_random_uuid(), :user_id, 'Receita ' || n, '[]', "
+                "       :created_at - (n / 2) * interval '1 minute' "
+                "FROM generate_series(1, :count) AS n"
+            ), {"user_id": user_id, "created_at": CREATED_AT, "count": RECIPES})
+        conn.execute(text("ANALYZE"))
+    return postgres, str(users[0])
+
+
+def _plan(conn, query) -> dict:
+    """Plano executado (EXPLAIN ANALYZE) da consulta"""
+    compiled = query.compile(dialect=conn.dialect)
+    return conn.exec_driver_sql(
+        f"EXPLAIN (ANALYZE, FORMAT JSON) {compiled}", compiled.params
+    ).scalar()[0]["Plan"]
+
+
+def _nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _nodes(child)
+
+
+def _index_rows(plan: dict) -> int:
+    """Linhas lidas do índice de paginação"""
+    [scan] = [node for node in _nodes(plan) if node.get("Index Name") == "ix_recipes_user_id_created_at_id"]
+    return scan["Actual Rows"]
+
+
+def test_keyset_page_reads_only_its_rows(recipes_database):
+    postgres, user_id = recipes_database
+    with postgres.engine.connect() as conn:
+        created_at, last_id = conn.execute(text(
+            "SELECT created_at, id FROM recipes WHERE user_id = :user_id "
+            "ORDER BY created_at DESC, id DESC OFFSET :offset LIMIT 1"
+        ), {"user_id": user_id, "offset": DEEP - 1}).one()
+
+        keyset = _summaries_by_user_query(user_id, limit=PAGE, after=(created_at, str(last_id)))
+        offset = _summaries_by_user_query(user_id, limit=PAGE).offset(DEEP)
+
+        # As duas consultas retornam a mesma página
+        assert conn.execute(keyset).all() == conn.execute(offset).all()
+        keyset_plan, offset_plan = _plan(conn, keyset), _plan(conn, offset)
+
+    # Com o cursor, o índice é lido a partir da página; com OFFSET, desde o início
+    assert _index_rows(keyset_plan) == PAGE
+    assert _index_rows(offset_plan) >= DEEP + PAGE
+    # A contagem de ingredientes (subconsulta correlacionada) só roda para a página
+    subplans = [node for node in _nodes(keyset_plan) if node.get("Parent Relationship") == "SubPlan"]
+    assert subplans and all(node["Actual Loops"] == PAGE for node in subplans)
@@ -0,0 +1,73 @@
+"""
+Parser de quantidades: texto livre -> valor numérico e unidade canônica.
+"""
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+from src.core.quantities import Quantity, ingredient_quantity_text, parse_quantities, parse_quantity
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("200g", Quantity(200, "g")),
+    ("1/2 kg", Quantity(500, "g")),
+    ("1 1/2 xícara", Quantity(360, "ml")),
+    ("meia dúzia", Quantity(6, "un")),
+    ("2 a 3 dentes", Quantity(2.5, "un")),
+    ("uma e meia colher de sopa", Quantity(22.5, "ml")),
+    ("1 xícara e meia", Quantity(360, "ml")),
+    ("½ litro", Quantity(500, "ml")),
+    ("3 grandes", Quantity(3, "un")),
+    ("pitada", Quantity(0.5, "g")),
+])
+def test_parse_quantity(text, expected):
+    assert parse_quantity(text) == expected
+
+
+# Quantidades como a LLM costuma escrever: número seguido do próprio ingrediente
+COUNTS = [
+    ("2 ovos", Quantity(2, "un")),
+    ("3 tomates grandes", Quantity(3, "un")),
+    ("1 cebola média picada", Quantity(1, "un")),
+    ("meia cebola", Quantity(0.5, "un")),
+    ("2 a 3 batatas", Quantity(2.5, "un")),
+]
+
+
+@pytest.mark.parametrize("text, expected", COUNTS)
+def test_number_without_unit_is_a_count(text, expected):
+    assert parse_quantity(text) == expected
+
+
+def _migration(name: str):
+    path = next((Path(__file__).resolve().parent.parent / "alembic" / "versions").glob(f"{name}_*.py"))
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize("text, expected", COUNTS + [("200g", Quantity(200, "g")), ("a gosto", None)])
+def test_frozen_parser_in_migration_agrees(text, expected):
+    frozen = _migration("f2b6d8e0a4c7").parse_quantity(text)
+    assert (tuple(frozen) if frozen else None) == (tuple(expected) if expected else None)
+
+
+@pytest.mark.parametrize("text", [None, "", "a gosto", "quanto baste"])
+def test_unrecognized_or_missing_quantity(text):
+    assert parse_quantity(text) is None
+
+
+def test_parse_quantities_accepts_missing_values():
+    assert parse_quantities(["2 unidades", None, "", "2 unidades"]) == [
+        Quantity(2, "un"), None, None, Quantity(2, "un")
+    ]
+
+
+def test_pantry_quantity_text():
+    assert ingredient_quantity_text("2", "kg") == "2 kg"
+    assert ingredient_quantity_text("2 kg") == "2 kg"
+    # Só a unidade, sem quantidade, não vira "1 kg"
+    assert ingredient_quantity_text(None, "kg") is None
+    assert parse_quantity(ingredient_quantity_text("", "kg")) is None
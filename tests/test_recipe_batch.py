@@ -0,0 +1,124 @@
+"""
+Salvamento de receitas em lote (/recipes/save/batch): dois INSERTs por lote,
+seja qual for o número de receitas, respostas na ordem enviada, limite de
+receitas por lote e tudo ou nada quando uma delas falha.
+"""
+import json
+
+import pytest
+
+import src.repositories.recipe_repository as recipe_repository
+from src.models.recipe import Recipe
+
+URL = "/recipes/save/batch"
+MAX_RECIPES = 20
+
+
+def _recipe(i: int, legacy: bool = False) -> dict:
+    steps = [{"numero": 1, "descricao": f"Prepare a receita {i}."}, {"numero": 2, "descricao": "Sirva."}]
+    recipe = {
+        "name": f"Receita {i}",
+        "ingredients": [
+            {"name": f"Ingrediente {i}.{j}", "quantity": f"{j + 1} unidades", "order": j}
+            for j in range(3)
+        ]
+    }
+    if legacy:
+        # Clientes antigos enviam os passos como string JSON (instructions)
+        recipe["instructions"] = json.dumps(steps)
+    else:
+        recipe["steps"] = steps
+    return recipe
+
+
+def _saved_recipes(session_factory) -> int:
+    db = session_factory()
+    count = db.query(Recipe).count()
+    db.close()
+    return count
+
+
+@pytest.mark.parametrize("total", [1, 5, MAX_RECIPES])
+def test_batch_is_two_inserts_and_keeps_order(client, auth_headers, statement_counter, total):
+    recipes = [_recipe(i) for i in range(total)]
+    client.get("/auth/me", headers=auth_headers)
+    statement_counter.reset()
+
+    response = client.post(URL, json={"recipes": recipes}, headers=auth_headers)
+
+    assert response.status_code == 201, response.text
+    # Um INSERT para as receitas e outro para os ingredientes, em vez de um por linha
+    inserts = [statement for statement in statement_counter.statements if statement.lstrip().upper().startswith("INSERT")]
+    assert len(inserts) == 2
+
+    saved = response.json()
+    assert [recipe["name"] for recipe in saved] == [recipe["name"] for recipe in recipes]
+    assert len({recipe["id"] for recipe in saved}) == total
+    assert all(recipe["created_at"] for recipe in saved)
+    for sent, recipe in zip(recipes, saved):
+        assert [ingredient["name"] for ingredient in recipe["recipe_ingredients"]] == \
+            [ingredient["name"] for ingredient in sent["ingredients"]]
+        assert all(ingredient["recipe_id"] == recipe["id"] for ingredient in recipe["recipe_ingredients"])
+
+
+def test_batch_response_matches_stored_recipes(client, auth_headers):
+    saved = client.post(URL, json={"recipes": [_recipe(i) for i in range(3)]}, headers=auth_headers).json()
+
+    for recipe in saved:
+        stored = client.get(f"/recipes/{recipe['id']}", headers=auth_headers).json()
+        assert stored == recipe
+
+
+@pytest.mark.parametrize("total", [0, MAX_RECIPES + 1])
+def test_batch_size_limit(client, auth_headers, session_factory, total):
+    response = client.post(URL, json={"recipes": [_recipe(i) for i in range(total)]}, headers=auth_headers)
+
+    assert response.status_code == 422
+    assert _saved_recipes(session_factory) == 0
+
+
+@pytest.mark.parametrize("invalid", [
+    {"name": "Sem passos", "ingredients": []},
+    {"name": "Passos inválidos", "instructions": "Misture tudo.", "ingredients": []},
+    {"name": "Passo sem descrição", "steps": [{"numero": 1}], "ingredients": []},
+])
+def test_one_invalid_recipe_rejects_the_batch(client, auth_headers, session_factory, invalid):
+    recipes = [_recipe(0), invalid, _recipe(2)]
+
+    response = client.post(URL, json={"recipes": recipes}, headers=auth_headers)
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"][:3] == ["body", "recipes", 1]
+    assert _saved_recipes(session_factory) == 0
+
+
+def test_database_error_rolls_back_the_whole_batch(client, auth_headers, session_factory, monkeypatch):
+    insert_ingredients = recipe_repository._insert_ingredients_query
+
+    def failing_insert_ingredients(ingredient_rows):
+        # Um ingrediente da última receita viola NOT NULL, depois do INSERT das receitas
+        ingredient_rows[-1] = {**ingredient_rows[-1], "name": None}
+        return insert_ingredients(ingredient_rows)
+
+    monkeypatch.setattr(recipe_repository, "_insert_ingredients_query", failing_insert_ingredients)
+
+    response = client.post(URL, json={"recipes": [_recipe(i) for i in range(5)]}, headers=auth_headers)
+
+    assert response.status_code == 500
+    assert _saved_recipes(session_factory) == 0
+    assert client.get("/recipes/", headers=auth_headers).json() == []
+
+
+def test_instructions_and_steps_stay_in_sync(client, auth_headers, session_factory):
+    recipes = [_recipe(0), _recipe(1, legacy=True)]
+
+    saved = client.post(URL, json={"recipes": recipes}, headers=auth_headers).json()
+
+    db = session_factory()
+    for recipe in saved:
+        assert json.loads(recipe["instructions"]) == recipe["steps"]
+        stored = db.get(Recipe, recipe["id"])
+        assert json.loads(stored.instructions) == stored.steps == recipe["steps"]
+    db.close()
+    assert saved[0]["steps"] == recipes[0]["steps"]
+    assert saved[1]["steps"] == json.loads(recipes[1]["instructions"])
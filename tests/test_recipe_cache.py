@@ -0,0 +1,161 @@
+"""
+Cache das receitas geradas: chave canônica da lista de ingredientes,
+backends em memória e SQLite (TTL e LRU) e o ganho de uma lista repetida.
+"""
+import asyncio
+import time
+
+import pytest
+
+from src.api.schemas.recipe_schema import GeneratedRecipe
+from src.core.metrics import metrics
+from src.services.ai_service import AIService
+from src.services.llm_providers import FakeProvider
+from src.services.llm_router import ProviderRouter
+from src.services.recipe_cache_service import (
+    InMemoryCacheBackend,
+    RecipeCacheService,
+    SQLiteCacheBackend,
+    _bucket_quantity,
+    build_cache_key
+)
+
+
+PANTRY = [{"Ingrediente": "Tomate", "qtd": "2 unidades"}, {"Ingrediente": "Limão", "qtd": "1 kg"}]
+
+
+def _recipes(count: int):
+    return [
+        GeneratedRecipe.model_validate({
+            "nome": f"Receita {i}",
+            "listaIngredientes": [{"nome": "Tomate", "quantidade": "2 unidades"}],
+            "passos": [{"numero": 1, "descricao": "Misture tudo."}]
+        })
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("variant", [
+    list(reversed(PANTRY)),
+    [{"Ingrediente": "tomates", "qtd": "2 unidades"}, {"Ingrediente": "LIMAO", "qtd": "1 kg"}],
+    [{"Ingrediente": "  Tomates maduros ", "qtd": "3 unidades"}, {"Ingrediente": "limões", "qtd": "1,5 kg"}],
+])
+def test_key_is_stable_across_order_and_spelling(variant):
+    assert build_cache_key(variant, 5) == build_cache_key(PANTRY, 5)
+
+
+@pytest.mark.parametrize("variant", [
+    [{"Ingrediente": "Tomate", "qtd": "4 unidades"}, {"Ingrediente": "Limão", "qtd": "1 kg"}],
+    [{"Ingrediente": "Cebola", "qtd": "2 unidades"}, {"Ingrediente": "Limão", "qtd": "1 kg"}],
+    PANTRY[:1],
+])
+def test_key_changes_with_ingredients_or_quantity_range(variant):
+    assert build_cache_key(variant, 5) != build_cache_key(PANTRY, 5)
+    assert build_cache_key(PANTRY, 3) != build_cache_key(PANTRY, 5)
+
+
+@pytest.mark.parametrize("quantity, bucket", [
+    ("1 unidade", "0:unidade"),
+    ("2 unidades", "1:unidades"),
+    ("3 unidades", "1:unidades"),
+    ("4 unidades", "2:unidades"),
+    ("7 unidades", "2:unidades"),
+    ("1/2 xícara", "-1:xicara"),
+    ("1,5 kg", "0:kg"),
+    ("0 g", "0:g"),
+    ("a gosto", "a gosto"),
+])
+def test_log2_quantity_buckets(quantity, bucket):
+    assert _bucket_quantity(quantity) == bucket
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_backend(request, tmp_path):
+    """Fábrica de backends com max_entries e ttl; o SQLite serve de substituto de um cache compartilhado"""
+    backends = []
+
+    def make(max_entries: int = 100, ttl: float = 60):
+        if request.param == "memory":
+            backend = InMemoryCacheBackend(max_entries, ttl)
+        else:
+            backend = SQLiteCacheBackend(str(tmp_path / f"cache{len(backends)}.sqlite3"), max_entries)
+        backends.append(backend)
+        return backend
+
+    yield make
+    for backend in backends:
+        backend.close()
+
+
+def test_backend_ttl_expiry(make_backend):
+    backend = make_backend()
+    backend.set("a", "1", ttl=0.05)
+    backend.set("b", "2", ttl=60)
+
+    assert backend.get("a") == "1"
+    time.sleep(0.1)
+    assert backend.get("a") is None
+    assert backend.get("b") == "2"
+
+
+def test_backend_lru_eviction(make_backend):
+    backend = make_backend(max_entries=2)
+    backend.set("a", "1", ttl=60)
+    time.sleep(0.01)
+    backend.set("b", "2", ttl=60)
+    time.sleep(0.01)
+    # "a" usado por último: "b" é o descartado
+    assert backend.get("a") == "1"
+    time.sleep(0.01)
+    backend.set("c", "3", ttl=60)
+
+    assert [backend.get(key) for key in ("a", "b", "c")] == ["1", None, "3"]
+
+
+def test_sqlite_backend_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+    writer, reader = SQLiteCacheBackend(path, 100), SQLiteCacheBackend(path, 100)
+
+    writer.set("a", "1", ttl=60)
+
+    # Outro worker (outra conexão ao mesmo arquivo) vê a entrada
+    assert reader.get("a") == "1"
+    writer.close()
+    reader.close()
+
+
+def test_partial_results_are_not_cached(make_backend):
+    cache = RecipeCacheService(make_backend(), ttl=60)
+
+    cache.set(PANTRY, 5, _recipes(4))
+    assert cache.get(PANTRY, 5) is None
+
+    cache.set(PANTRY, 5, _recipes(5))
+    assert [recipe.nome for recipe in cache.get(list(reversed(PANTRY)), 5)] == [f"Receita {i}" for i in range(5)]
+
+
+def test_repeated_pantry_is_served_from_cache(make_backend):
+    provider = FakeProvider(latency=0.2)
+    service = AIService(router=ProviderRouter([provider], hedge_enabled=False))
+    cache = RecipeCacheService(make_backend(), ttl=60)
+    before = {name: metrics.get(name) for name in ("recipe_cache_hits", "recipe_cache_misses")}
+
+    def request(pantry) -> float:
+        started = time.perf_counter()
+        recipes = asyncio.run(cache.get_or_generate(
+            pantry, 5, lambda: service.generate_multiple_recipes(pantry, count=5)
+        ))
+        assert len(recipes) == 5
+        return time.perf_counter() - started
+
+    generated = request(PANTRY)
+    calls = provider.calls
+    repeats = [request(variant) for variant in (PANTRY, list(reversed(PANTRY)), PANTRY, PANTRY)]
+
+    # Só a primeira lista chega à IA; as repetidas (inclusive em outra ordem) vêm do cache
+    assert provider.calls == calls
+    assert generated >= 0.2
+    assert max(repeats) < 0.05
+    increase = {name: metrics.get(name) - value for name, value in before.items()}
+    assert increase == {"recipe_cache_hits": 4, "recipe_cache_misses": 1}
+    assert cache.hit_ratio() > 0
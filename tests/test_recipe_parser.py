@@ -0,0 +1,126 @@
+"""
+Extração e correção do JSON das receitas geradas pela LLM, sobre um corpus
+de respostas malformadas (texto ao redor, blocos ```json, vírgulas sobrando,
+truncamento em vários pontos, aspas simples).
+"""
+import json
+
+import pytest
+
+from src.core.metrics import metrics
+from src.services.recipe_parser import (
+    JsonObjectScanner,
+    RecipeParseError,
+    parse_generated_recipe,
+    repair_json
+)
+
+
+RECIPE = {
+    "nome": "Omelete de Queijo",
+    "listaIngredientes": [{"nome": "Ovo", "quantidade": "3 unidades"}, {"nome": "Queijo", "quantidade": "50g"}],
+    "passos": [
+        {"numero": 1, "descricao": 'Bata os ovos {bem} com "garfo".'},
+        {"numero": 2, "descricao": "Frite em fogo baixo."}
+    ]
+}
+TEXT = json.dumps(RECIPE, ensure_ascii=False)
+INDENTED = json.dumps(RECIPE, ensure_ascii=False, indent=2)
+# Campos extras após os passos, para truncamentos depois da receita completa
+EXTRA = json.dumps({**RECIPE, "obs": 'Use a "medida" da xícara', "rapida": True}, ensure_ascii=False)
+
+# Resposta -> (ingredientes, passos) recuperados, ou None se não há receita a recuperar
+CORPUS = {
+    "plain": (TEXT, (2, 2)),
+    "fenced": ("```json\n" + INDENTED + "\n```", (2, 2)),
+    "fenced_no_lang": ("```\n" + INDENTED + "\n```", (2, 2)),
+    "preamble": ("Aqui está a sua receita:\n\n" + INDENTED, (2, 2)),
+    "preamble_and_trailer": ("Claro! Segue a receita:\n" + INDENTED + "\n\nEspero que goste! Dica: sirva {quente}.", (2, 2)),
+    "trailing_commas": (
+        INDENTED.replace('"50g"\n', '"50g",\n').replace('baixo."\n    }', 'baixo.",\n    },'),
+        (2, 2)
+    ),
+    "truncated_in_step_text": (TEXT[:TEXT.index("Frite em") + 8], (2, 2)),
+    "truncated_after_key": (TEXT[:TEXT.index('"descricao": "Frite') + 12], (2, 1)),
+    "truncated_after_comma": (TEXT[:TEXT.index(', {"numero": 2') + 1], (2, 1)),
+    "truncated_open_object": (TEXT[:TEXT.index('{"numero": 2') + 1], (2, 1)),
+    "truncated_after_backslash": (EXTRA[:EXTRA.index('\\"medida') + 1], (2, 2)),
+    "truncated_in_literal": (EXTRA[:EXTRA.index('"rapida": t') + 11], (2, 2)),
+    "truncated_in_key": (EXTRA[:EXTRA.index('"rapida"') + 4], (2, 2)),
+    "passos_as_strings": (json.dumps({**RECIPE, "passos": ["Bata os ovos.", "Frite."]}, ensure_ascii=False), (2, 2)),
+    "two_objects": (TEXT + "\n" + TEXT.replace("Omelete", "Outra"), (2, 2)),
+    "braces_in_preamble_string": ('Formato "{nome}" abaixo:\n' + TEXT, (2, 2)),
+    "example_before_recipe": ('Formato: {"nome": "...", "passos": []}\n' + TEXT, (2, 2)),
+    "single_quotes": (TEXT.replace('"', "'"), (2, 2)),
+    # Sem passos ou sem JSON: não há o que recuperar
+    "truncated_in_ingredients": (TEXT[:TEXT.index('{"nome": "Queijo"') + 10], None),
+    "missing_passos": (json.dumps({k: v for k, v in RECIPE.items() if k != "passos"}), None),
+    "no_json": ("Desculpe, não consigo gerar essa receita.", None),
+}
+
+
+@pytest.mark.parametrize("name", CORPUS)
+def test_corpus(name):
+    text, expected = CORPUS[name]
+
+    if expected is None:
+        with pytest.raises(RecipeParseError):
+            parse_generated_recipe(text)
+        return
+
+    recipe = parse_generated_recipe(text)
+    assert recipe.nome == "Omelete de Queijo"
+    assert (len(recipe.listaIngredientes), len(recipe.passos)) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    # Escape cortado: a barra invertida pendente é descartada
+    ('{"obs": "x\\', {"obs": "x"}),
+    ('{"obs": "x\\u00', {"obs": "x"}),
+    ('{"obs": "x\\\\', {"obs": "x\\"}),
+    # Literal cortado: descartado junto com a chave
+    ('{"a": 1, "rapida": tr', {"a": 1}),
+    ('{"a": 1, "porcoes": 4.', {"a": 1}),
+    ('{"a": [1, 2, nu', {"a": [1, 2]}),
+    # Literal completo é mantido
+    ('{"a": 1, "rapida": true', {"a": 1, "rapida": True}),
+    ('{"a": 1, "porcoes": 12', {"a": 1, "porcoes": 12}),
+    # Chave sem valor e vírgulas pendentes
+    ('{"a": 1, "nom', {"a": 1}),
+    ('{"a": 1, "b": ', {"a": 1}),
+    ('{"a": [1, 2,', {"a": [1, 2]}),
+    ('{"a": 1,}', {"a": 1}),
+])
+def test_repair_json(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+
+def test_first_valid_recipe_wins():
+    text = '{"nome": "Sem passos"}\n' + TEXT
+
+    assert parse_generated_recipe(text).nome == "Omelete de Queijo"
+
+
+def test_parse_metrics():
+    before = {name: metrics.get(name) for name in ("ai_parse_ok", "ai_parse_repaired", "ai_parse_failures")}
+
+    parse_generated_recipe(TEXT)
+    parse_generated_recipe(CORPUS["truncated_in_literal"][0])
+    with pytest.raises(RecipeParseError):
+        parse_generated_recipe(CORPUS["no_json"][0])
+
+    assert {name: metrics.get(name) - value for name, value in before.items()} == {
+        "ai_parse_ok": 1, "ai_parse_repaired": 1, "ai_parse_failures": 1
+    }
+
+
+def test_scanner_emits_objects_across_chunks():
+    scanner = JsonObjectScanner()
+    text = "[" + TEXT + ", " + TEXT + "]"
+
+    objects = []
+    for start in range(0, len(text), 7):
+        objects.extend(scanner.feed(text[start:start + 7]))
+
+    assert objects == [TEXT, TEXT]
+    assert scanner.pending() is None
@@ -0,0 +1,62 @@
+"""
+Listagem e detalhe de receitas sem N+1: o número de comandos SQL por
+requisição não cresce com o número de receitas ou de ingredientes.
+"""
+import json
+
+import pytest
+
+from src.repositories.recipe_repository import RecipeRepository
+
+
+def _seed_recipes(session_factory, user, count: int, ingredients_per_recipe: int = 3) -> None:
+    db = session_factory()
+    RecipeRepository(db).create_many(str(user.id), [
+        {
+            "name": f"Receita {i}",
+            "instructions": json.dumps([{"numero": 1, "descricao": "Misture tudo."}]),
+            "steps": [{"numero": 1, "descricao": "Misture tudo."}],
+            "ingredients": [
+                {"name": f"Ingrediente {j}", "quantity": "1 unidade", "order": j}
+                for j in range(ingredients_per_recipe)
+            ]
+        }
+        for i in range(count)
+    ])
+    db.close()
+
+
+def _statements(client, statement_counter, url: str, headers: dict):
+    # Aquece o cache do usuário autenticado, para contar só as consultas do endpoint
+    client.get("/auth/me", headers=headers)
+    statement_counter.reset()
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200, response.text
+    return response, statement_counter.count
+
+
+@pytest.mark.parametrize("total", [1, 10, 100])
+def test_recipe_listing_statement_count_is_constant(client, auth_headers, session_factory, user,
+                                                    statement_counter, total):
+    _seed_recipes(session_factory, user, total)
+
+    response, statements = _statements(client, statement_counter, "/recipes/?limit=200", auth_headers)
+
+    recipes = response.json()
+    assert len(recipes) == total
+    assert all(recipe["ingredients_count"] == 3 for recipe in recipes)
+    # Uma única consulta com a contagem de ingredientes, sem carregar cada receita
+    assert statements == 1
+
+
+@pytest.mark.parametrize("ingredients", [1, 10, 50])
+def test_recipe_detail_statement_count_is_constant(client, auth_headers, session_factory, user,
+                                                   statement_counter, ingredients):
+    _seed_recipes(session_factory, user, 1, ingredients_per_recipe=ingredients)
+    recipe_id = client.get("/recipes/", headers=auth_headers).json()[0]["id"]
+
+    response, statements = _statements(client, statement_counter, f"/recipes/{recipe_id}", auth_headers)
+
+    assert len(response.json()["recipe_ingredients"]) == ingredients
+    # A receita e, com selectinload, todos os seus ingredientes
+    assert statements == 2
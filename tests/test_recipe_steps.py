@@ -0,0 +1,119 @@
+"""
+Migração c3f8a1d5e7b2 (passos em JSONB): converte instructions com a mesma
+validação de RecipeCreate, em vários lotes, deixando nulos os inválidos, e
+pode ser desfeita e refeita.
+"""
+import importlib.util
+import uuid
+from pathlib import Path
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import inspect, text
+
+from src.api.schemas.recipe_schema import RecipeCreate
+
+
+REVISION = "c3f8a1d5e7b2"
+PREVIOUS = "b7d4e2a9c1f3"
+
+INSTRUCTIONS = {
+    '[{"numero": 1, "descricao": "Misture."}]': [{"numero": 1, "descricao": "Misture."}],
+    '[]': [],
+    '[{"numero": "2", "descricao": "Asse."}]': [{"numero": 2, "descricao": "Asse."}],
+    '[{"numero": 3.0, "descricao": "Sirva."}]': [{"numero": 3, "descricao": "Sirva."}],
+    '[{"numero": 1, "descricao": "Corte.", "tempo": "5 min"}]': [{"numero": 1, "descricao": "Corte."}],
+    '[{"numero": true, "descricao": "Misture."}]': [{"numero": 1, "descricao": "Misture."}],
+    '[{"numero": 2.5, "descricao": "Asse."}]': None,
+    '[{"numero": "x", "descricao": "Asse."}]': None,
+    '[{"numero": 1}]': None,
+    '[{"numero": 1, "descricao": 5}]': None,
+    '{"numero": 1, "descricao": "Misture."}': None,
+    '[1, 2]': None,
+    'null': None,
+    'Misture tudo e asse.': None,
+    '': None,
+}
+
+
+def _migration(name: str):
+    path = next((Path(__file__).resolve().parent.parent / "alembic" / "versions").glob(f"{name}_*.py"))
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize("instructions, steps", INSTRUCTIONS.items())
+def test_migration_accepts_what_recipe_create_accepts(instructions, steps):
+    assert _migration(REVISION)._parse_steps(instructions) == steps
+    try:
+        created = RecipeCreate(name="Receita", instructions=instructions, ingredients=[])
+    except ValidationError:
+        assert steps is None
+    else:
+        assert [step.model_dump() for step in created.steps] == steps
+
+
+# Postgres: conversão das receitas existentes
+
+@pytest.fixture(scope="module")
+def legacy_recipes(postgres):
+    """
+    Banco na revisão anterior, com receitas válidas suficientes para três lotes
+    e um exemplar de cada caso de INSTRUCTIONS
+    """
+    valid = 2 * _migration(REVISION).BATCH_SIZE + 2000
+    postgres.upgrade(PREVIOUS)
+    user_id = uuid.uuid4()
+    ids = {}
+    with postgres.engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO users (id, username, email, password, full_name) "
+            "VALUES (:id, 'legado', 'legado@example.com', 'x', 'Usuário')"
+        ), {"id": user_id})
+        conn.execute(text(
+            "INSERT INTO recipes (id, user_id, name, instructions) "
+            "SELECT gen_random_uuid(), :user_id, 'Receita ' || n, "
+            "       json_build_array(json_build_object('numero', 1, 'descricao', 'Passo ' || n))::text "
+            "FROM generate_series(1, :count) AS n"
+        ), {"user_id": user_id, "count": valid})
+        for instructions in INSTRUCTIONS:
+            ids[instructions] = uuid.uuid4()
+            conn.execute(text(
+                "INSERT INTO recipes (id, user_id, name, instructions) VALUES (:id, :user_id, 'Caso', :instructions)"
+            ), {"id": ids[instructions], "user_id": user_id, "instructions": instructions})
+    return postgres, valid, ids
+
+
+def _converted(postgres, valid: int, ids: dict) -> None:
+    with postgres.engine.connect() as conn:
+        steps = dict(conn.execute(text("SELECT id, steps FROM recipes WHERE name = 'Caso'")).all())
+        counts = conn.execute(text(
+            "SELECT count(*) FILTER (WHERE steps IS NOT NULL), "
+            "       count(*) FILTER (WHERE steps = json_build_array(json_build_object("
+            "           'numero', 1, 'descricao', 'Passo ' || substr(name, 9)))::jsonb) "
+            "FROM recipes WHERE name <> 'Caso'"
+        )).one()
+
+    assert tuple(counts) == (valid, valid)
+    assert {instructions: steps[recipe_id] for instructions, recipe_id in ids.items()} == INSTRUCTIONS
+
+
+def test_upgrade_converts_every_batch(legacy_recipes):
+    postgres, valid, ids = legacy_recipes
+
+    postgres.upgrade(REVISION)
+
+    _converted(postgres, valid, ids)
+
+
+def test_downgrade_and_upgrade_again(legacy_recipes):
+    postgres, valid, ids = legacy_recipes
+    postgres.upgrade(REVISION)
+
+    postgres.downgrade(PREVIOUS)
+    assert "steps" not in {column["name"] for column in inspect(postgres.engine).get_columns("recipes")}
+
+    postgres.upgrade(REVISION)
+    _converted(postgres, valid, ids)
@@ -0,0 +1,143 @@
+"""
+Geração em streaming (/recipes/generate/stream) com o FakeProvider: ordem dos
+eventos, receitas repetidas sem rodadas restantes e devolução da vaga de
+geração quando o cliente desconecta.
+"""
+import asyncio
+import json
+
+import pytest
+
+from src.meu_app.main import app
+from src.services.admission_service import admission_service
+from src.services.ai_service import ai_service
+from src.services.llm_providers import FakeProvider
+from src.services.llm_router import ProviderRouter
+from src.services.recipe_cache_service import recipe_cache_service
+
+
+INGREDIENTS = [{"Ingrediente": "Tomate", "qtd": "2 unidades"}, {"Ingrediente": "Ovo", "qtd": "3 unidades"}]
+URL = "/recipes/generate/stream"
+
+
+class RepeatingProvider(FakeProvider):
+    """Responde sempre com a mesma receita, como uma LLM que ignora a lista de exclusão"""
+
+    def _respond(self, messages):
+        self.recipes = 0
+        return super()._respond(messages)
+
+
+@pytest.fixture(autouse=True)
+def no_recipe_cache(monkeypatch):
+    monkeypatch.setattr(recipe_cache_service, "enabled", False)
+
+
+def _use_provider(monkeypatch, provider):
+    monkeypatch.setattr(ai_service, "router", ProviderRouter([provider], hedge_enabled=False))
+
+
+def _events(client, headers, **params):
+    response = client.post(URL, json={"listaIngredientes": INGREDIENTS, **params.pop("body", {})},
+                           params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+@pytest.mark.parametrize("strategy", ["paralela", "lote"])
+def test_recipes_then_end_event(client, auth_headers, monkeypatch, strategy):
+    _use_provider(monkeypatch, FakeProvider())
+
+    events = _events(client, auth_headers, body={"estrategia": strategy})
+
+    assert [event["tipo"] for event in events] == ["receita"] * 5 + ["fim"]
+    assert sorted(event["indice"] for event in events[:5]) == list(range(5))
+    assert len({event["receita"]["nome"] for event in events[:5]}) == 5
+    assert events[-1] == {"tipo": "fim", "total": 5, "parcial": False}
+
+
+def test_tokens_arrive_before_their_recipe(client, auth_headers, monkeypatch):
+    _use_provider(monkeypatch, FakeProvider())
+
+    events = _events(client, auth_headers, tokens="true")
+
+    for event in (event for event in events if event["tipo"] == "receita"):
+        position = events.index(event)
+        text = "".join(
+            token["conteudo"] for token in events[:position]
+            if token["tipo"] == "token" and token["indice"] == event["indice"]
+        )
+        assert json.loads(text)["nome"] == event["receita"]["nome"]
+    assert events[-1]["tipo"] == "fim"
+
+
+def test_server_sent_events_format(client, auth_headers, monkeypatch):
+    _use_provider(monkeypatch, FakeProvider())
+
+    response = client.post(URL, json={"listaIngredientes": INGREDIENTS},
+                           headers={**auth_headers, "Accept": "text/event-stream"})
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    blocks = response.text.strip().split("\n\n")
+    assert [block.split("\n")[0] for block in blocks] == ["event: receita"] * 5 + ["event: fim"]
+    assert json.loads(blocks[-1].split("\n")[1].removeprefix("data: "))["total"] == 5
+
+
+def test_repeated_recipes_are_reported_as_errors(client, auth_headers, monkeypatch):
+    provider = RepeatingProvider()
+    _use_provider(monkeypatch, provider)
+
+    events = _events(client, auth_headers)
+
+    # A primeira receita é aceita; as demais se repetem até acabarem as rodadas
+    kinds = [event["tipo"] for event in events]
+    assert kinds.count("receita") == 1
+    errors = [event for event in events if event["tipo"] == "erro"]
+    assert sorted(event["indice"] for event in errors + [events[kinds.index("receita")]]) == list(range(5))
+    assert all(event["detalhe"].startswith("Receita repetida") for event in errors)
+    assert events[-1] == {"tipo": "fim", "total": 1, "parcial": True}
+
+
+async def _disconnect_after_first_event(headers: dict) -> list:
+    """Chama a rota diretamente pela ASGI e desconecta assim que chega o primeiro evento"""
+    body = json.dumps({"listaIngredientes": INGREDIENTS}).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": URL, "raw_path": URL.encode(),
+        "query_string": b"tokens=true", "root_path": "",
+        "headers": [(b"content-type", b"application/json")]
+        + [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+        "client": ("testclient", 50000), "server": ("testserver", 80),
+    }
+    first_event = asyncio.Event()
+    request_sent = False
+    chunks = []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await first_event.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            chunks.append(message["body"])
+            first_event.set()
+
+    await asyncio.wait_for(app(scope, receive, send), timeout=5)
+    return chunks
+
+
+def test_disconnect_releases_admission_slot(client, auth_headers, monkeypatch):
+    # Receitas lentas: o cliente desconecta bem antes de a geração terminar
+    provider = FakeProvider(latency=0.05, tokens_per_second=100)
+    _use_provider(monkeypatch, provider)
+    active = admission_service.active
+
+    chunks = asyncio.run(_disconnect_after_first_event(auth_headers))
+
+    assert chunks
+    assert all(json.loads(line)["tipo"] == "token" for chunk in chunks for line in chunk.decode().splitlines())
+    assert admission_service.active == active
@@ -0,0 +1,173 @@
+"""
+Busca de receitas e da despensa (Postgres, migração d9e4b6c2a8f1): ignora
+acentos, tolera erros de digitação, encontra receitas pelos passos e pelos
+ingredientes e usa os índices GIN, em vez de calcular o documento de busca
+de cada linha.
+"""
+import json
+import uuid
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from src.repositories.ingredient_repository import IngredientRepository
+from src.repositories.ingredient_repository import _search_by_user_query as _pantry_search_query
+from src.repositories.recipe_repository import RecipeRepository, _search_by_user_query
+
+
+FILLER = 20000  # Receitas (com 5 ingredientes cada) e itens da despensa que não correspondem às buscas
+
+RECIPES = {
+    "Camarão grelhado": (["Grelhe o camarão com alho."], ["Camarão", "Alho"]),
+    "Feijão tropeiro": (["Refogue o bacon."], ["Feijão", "Bacon", "Farinha de mandioca"]),
+    "Bolo simples": (["Asse por 40 minutos."], ["Fubá", "Ovos"]),
+    "Salmão ao forno": (["Tempere com limão siciliano."], ["Salmão"]),
+    "Pão de alho": (["Espalhe a pasta no pão."], ["Pão francês", "Manteiga"]),
+}
+PANTRY = ["Cogumelo paris", "Feijão preto"]
+
+RECIPE_INDEXES = {
+    "ix_recipes_search_vector", "ix_recipes_name_trgm",
+    "ix_recipe_ingredients_search_vector", "ix_recipe_ingredients_name_trgm",
+}
+PANTRY_INDEXES = {"ix_ingredients_search_vector", "ix_ingredients_name_trgm"}
+
+
+def _add_recipe(conn, user_id, name: str, steps: list, ingredients: list) -> None:
+    recipe_id = uuid.uuid4()
+    conn.execute(text(
+        "INSERT INTO recipes (id, user_id, name, instructions, steps) "
+        "VALUES (:id, :user_id, :name, '[]', CAST(:steps AS jsonb))"
+    ), {"id": recipe_id, "user_id": user_id, "name": name,
+        "steps": json.dumps([{"numero": i + 1, "descricao": step} for i, step in enumerate(steps)])})
+    for order, ingredient in enumerate(ingredients):
+        conn.execute(text(
+            'INSERT INTO recipe_ingredients (id, recipe_id, name, quantity, "order") '
+            "VALUES (:id, :recipe_id, :name, '1', :order)"
+        ), {"id": uuid.uuid4(), "recipe_id": recipe_id, "name": ingredient, "order": order})
+
+
+@pytest.fixture(scope="module")
+def search_database(postgres):
+    """Receitas e despensa do usuário buscado, mais uma receita de outro usuário"""
+    postgres.upgrade()
+    user_id, other_id = uuid.uuid4(), uuid.uuid4()
+    with postgres.engine.begin() as conn:
+        for i, id_ in enumerate((user_id, other_id)):
+            conn.execute(text(
+                "INSERT INTO users (id, username, email, password, full_name) "
+                "VALUES (:id, :name, :email, 'x', 'Usuário')"
+            ), {"id": id_, "name": f"busca{i}", "email": f"busca{i}@example.com"})
+        conn.execute(text(
+            "INSERT INTO recipes (id, user_id, name, instructions, steps) "
+            "SELECT gen_random_uuid(), :user_id, 'Receita ' || n, '[]', "
+            "       jsonb_build_array(jsonb_build_object('numero', 1, 'descricao', 'Misture o item ' || n)) "
+            "FROM generate_series(1, :count) AS n"
+        ), {"user_id": user_id, "count": FILLER})
+        conn.execute(text(
+            'INSERT INTO recipe_ingredients (id, recipe_id, name, quantity, "order") '
+            "SELECT gen_random_uuid(), r.id, 'Ingrediente ' || g, '1', g "
+            "FROM recipes AS r, generate_series(1, 5) AS g"
+        ))
+        conn.execute(text(
+            "INSERT INTO ingredients (id, user_id, name, quantity, unit) "
+            "SELECT gen_random_uuid(), :user_id, 'Item ' || n, '1', 'kg' FROM generate_series(1, :count) AS n"
+        ), {"user_id": user_id, "count": FILLER})
+        for name, (steps, ingredients) in RECIPES.items():
+            _add_recipe(conn, user_id, name, steps, ingredients)
+        _add_recipe(conn, other_id, "Camarão na moranga", ["Recheie a moranga."], ["Camarão"])
+        for name in PANTRY:
+            conn.execute(text(
+                "INSERT INTO ingredients (id, user_id, name, quantity, unit) "
+                "VALUES (gen_random_uuid(), :user_id, :name, '1', 'kg')"
+            ), {"user_id": user_id, "name": name})
+        conn.execute(text("ANALYZE"))
+
+    session = Session(postgres.engine)
+    yield session, user_id
+    session.close()
+
+
+@pytest.mark.parametrize("q, found", [
+    ("camarao", "Camarão grelhado"),            # sem acento
+    ("CAMARÃO grelhado", "Camarão grelhado"),   # maiúsculas
+    ("grelhar", "Camarão grelhado"),            # radical (português)
+    ("camarao grelhdo", "Camarão grelhado"),    # erro de digitação
+    ("feijao tropero", "Feijão tropeiro"),
+    ("siciliano", "Salmão ao forno"),           # só nos passos
+    ("fuba", "Bolo simples"),                   # só nos ingredientes
+])
+def test_recipe_search_finds_recipe(search_database, q, found):
+    session, user_id = search_database
+
+    results = RecipeRepository(session).search_summaries_by_user_id(str(user_id), q, limit=5)
+
+    # Só as receitas do usuário (a "Camarão na moranga" é de outro)
+    assert [row.name for row in results] == [found]
+
+
+def test_recipe_search_ranks_name_above_steps_and_ingredients(search_database):
+    session, user_id = search_database
+
+    results = RecipeRepository(session).search_summaries_by_user_id(str(user_id), "alho", limit=5)
+
+    # "Pão de alho" pelo nome; "Camarão grelhado" pelos passos e por um ingrediente
+    assert [row.name for row in results] == ["Pão de alho", "Camarão grelhado"]
+    assert results[0].rank > results[1].rank
+
+
+def test_search_without_matches(search_database):
+    session, user_id = search_database
+
+    assert RecipeRepository(session).search_summaries_by_user_id(str(user_id), "salmon", limit=5) == []
+    assert IngredientRepository(session).search_by_user(user_id, "abacaxi", limit=5) == []
+
+
+@pytest.mark.parametrize("q, found", [
+    ("cogumelo", "Cogumelo paris"),
+    ("cogumelos", "Cogumelo paris"),
+    ("cogumlo", "Cogumelo paris"),
+    ("feijao", "Feijão preto"),
+])
+def test_pantry_search(search_database, q, found):
+    session, user_id = search_database
+
+    results = IngredientRepository(session).search_by_user(user_id, q, limit=5)
+
+    assert [ingredient.name for ingredient in results] == [found]
+
+
+def _explain(session, query) -> dict:
+    """Plano executado (EXPLAIN ANALYZE) da consulta, com o tempo de execução"""
+    compiled = query.compile(dialect=session.get_bind().dialect)
+    return session.connection().exec_driver_sql(
+        f"EXPLAIN (ANALYZE, FORMAT JSON) {compiled}", compiled.params
+    ).scalar()[0]
+
+
+def _index_names(plan: dict) -> set:
+    names = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", []):
+        names |= _index_names(child)
+    return names
+
+
+@pytest.mark.parametrize("search, indexes", [
+    (lambda user_id: _search_by_user_query(str(user_id), "camarao", 50), RECIPE_INDEXES),
+    (lambda user_id: _pantry_search_query(user_id, "cogumelo", 50), PANTRY_INDEXES),
+], ids=["recipes", "pantry"])
+def test_search_uses_gin_indexes_and_is_faster_with_them(search_database, search, indexes):
+    session, user_id = search_database
+    query = search(user_id)
+
+    with_indexes = _explain(session, query)
+    # Sem os índices (DROP desfeito pelo rollback), cada documento de busca é calculado
+    for index in indexes:
+        session.execute(text(f"DROP INDEX {index}"))
+    without_indexes = _explain(session, query)
+    session.rollback()
+
+    assert indexes <= _index_names(with_indexes["Plan"])
+    assert not indexes & _index_names(without_indexes["Plan"])
+    assert with_indexes["Execution Time"] * 5 < without_indexes["Execution Time"]
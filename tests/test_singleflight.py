@@ -0,0 +1,110 @@
+"""
+SingleFlight: chamadas concorrentes idênticas compartilham uma única execução,
+com o mesmo resultado ou a mesma exceção, e cancelamento só sem ninguém aguardando.
+"""
+import asyncio
+
+import pytest
+
+from src.core.singleflight import SingleFlight
+
+
+class Work:
+    """fn() de teste: conta execuções e cancelamentos; termina quando `release` é sinalizado"""
+
+    def __init__(self, result="ok", error: Exception = None):
+        self.result = result
+        self.error = error
+        self.runs = 0
+        self.cancelled = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.runs += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_identical_concurrent_calls_run_once():
+    async def scenario():
+        flight, work, other = SingleFlight(), Work("a"), Work("b")
+        calls = [asyncio.ensure_future(flight.do("a", work)) for _ in range(10)]
+        calls.append(asyncio.ensure_future(flight.do("b", other)))
+        await asyncio.sleep(0)
+        assert flight.in_flight() == 2
+
+        work.release.set()
+        other.release.set()
+        results = await asyncio.gather(*calls)
+
+        assert results == ["a"] * 10 + ["b"]
+        assert (work.runs, other.runs) == (1, 1)
+        # Terminada a execução, uma nova chamada executa fn() de novo
+        assert flight.in_flight() == 0
+        assert await flight.do("a", work) == "a"
+        assert work.runs == 2
+
+    asyncio.run(scenario())
+
+
+def test_failing_leader_passes_exception_to_every_waiter():
+    async def scenario():
+        error = ValueError("falhou")
+        flight, work = SingleFlight(), Work(error=error)
+        calls = [asyncio.ensure_future(flight.do("a", work)) for _ in range(5)]
+        await asyncio.sleep(0)
+
+        work.release.set()
+        results = await asyncio.gather(*calls, return_exceptions=True)
+
+        assert all(result is error for result in results)
+        assert work.runs == 1
+        assert flight.in_flight() == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelling_one_waiter_keeps_shared_task_running():
+    async def scenario():
+        flight, work = SingleFlight(), Work("a")
+        first = asyncio.ensure_future(flight.do("a", work))
+        second = asyncio.ensure_future(flight.do("a", work))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert "a" in flight
+
+        work.release.set()
+        assert await second == "a"
+        assert (work.runs, work.cancelled) == (1, 0)
+
+    asyncio.run(scenario())
+
+
+def test_cancelling_last_waiter_cancels_task():
+    async def scenario():
+        flight, work = SingleFlight(), Work("a")
+        calls = [asyncio.ensure_future(flight.do("a", work)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        for call in calls:
+            call.cancel()
+        await asyncio.gather(*calls, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        assert work.cancelled == 1
+        # A chave fica livre: uma nova chamada inicia outra execução
+        assert flight.in_flight() == 0
+        work.release.set()
+        assert await flight.do("a", work) == "a"
+        assert work.runs == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,194 @@
+"""
+StorageService compartilhado: um único cliente do Supabase por processo,
+reaproveitado por todas as requisições; URLs públicas montadas localmente,
+iguais às do SDK, e URLs assinadas em lote e cacheadas.
+"""
+import asyncio
+import string
+import time
+import timeit
+from types import SimpleNamespace
+
+import pytest
+
+import src.services.storage_service as storage_module
+from src.core.config import settings
+from src.meu_app.main import app
+from src.models.ingredient import Ingredient
+from src.services.storage_service import StorageService
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    """Instância do processo, como a criada na inicialização do servidor"""
+    service = StorageService()
+    monkeypatch.setattr(app.state, "storage_service", service, raising=False)
+    yield service
+    asyncio.run(service.aclose())
+
+
+@pytest.fixture
+def created_clients(monkeypatch):
+    """Clientes do Supabase criados a partir daqui (create_client)"""
+    created = []
+    create_client = storage_module.create_client
+
+    def counting_create_client(*args, **kwargs):
+        created.append(create_client(*args, **kwargs))
+        return created[-1]
+
+    monkeypatch.setattr(storage_module, "create_client", counting_create_client)
+    return created
+
+
+def _seed_ingredients(session_factory, user, count: int) -> None:
+    db = session_factory()
+    db.add_all(
+        Ingredient(name=f"Ingrediente {i}", quantity="1", unit="kg",
+                   image_url=f"ingredients/{i}.jpg", user_id=user.id)
+        for i in range(count)
+    )
+    db.commit()
+    db.close()
+
+
+def test_requests_reuse_the_process_storage_service(client, auth_headers, session_factory, user,
+                                                    storage, created_clients, monkeypatch):
+    _seed_ingredients(session_factory, user, 3)
+    used = []
+    get_image_urls = StorageService.get_image_urls
+
+    def recording_get_image_urls(self, file_paths):
+        used.append(self)
+        return get_image_urls(self, file_paths)
+
+    monkeypatch.setattr(StorageService, "get_image_urls", recording_get_image_urls)
+
+    for _ in range(5):
+        response = client.get("/ingredients/", headers=auth_headers)
+        assert response.status_code == 200, response.text
+        assert all(item["image_url"].startswith(storage.public_url_prefix) for item in response.json())
+
+    # Nenhum cliente novo por requisição: todas usam a instância do processo
+    assert created_clients == []
+    assert used == [storage] * 5
+
+
+def test_shared_client_is_far_cheaper_than_one_per_request(storage):
+    started = time.perf_counter()
+    services = [StorageService() for _ in range(3)]
+    per_request = (time.perf_counter() - started) / len(services)
+    for service in services:
+        asyncio.run(service.aclose())
+
+    started = time.perf_counter()
+    for i in range(1000):
+        storage.get_image_url(f"ingredients/{i}.jpg")
+    shared = (time.perf_counter() - started) / 1000
+
+    # Criar o cliente (e seus pools HTTP) custa dezenas de ms antes de qualquer
+    # I/O; com a instância compartilhada, resolver uma URL custa microssegundos
+    assert per_request > shared * 100
+
+
+@pytest.mark.parametrize("path", [
+    "ingredients/3f2c8a1e-0000-4000-8000-000000000000.jpg",
+    "ingredients/3f2c8a1e-0000-4000-8000-000000000000/full.webp",
+    "/ingredients/barra-inicial.png",
+    "ingredients/pão de queijo.jpg",
+    *(f"ingredients/a{char}b.jpg" for char in string.punctuation if char not in "#?/"),
+])
+def test_public_url_matches_sdk(storage, path):
+    bucket = storage.supabase.storage.from_(storage.bucket_name)
+
+    assert storage.get_public_url(path) == bucket.get_public_url(path)
+
+
+@pytest.mark.parametrize("name, escaped", [("a#b.jpg", "a%23b.jpg"), ("a?b.jpg", "a%3Fb.jpg"), ("a%20b.jpg", "a%2520b.jpg")])
+def test_public_url_escapes_what_the_sdk_mangles(storage, name, escaped):
+    # O SDK corta o caminho em "#" e "?" e lê "%20" como já escapado;
+    # aqui eles fazem parte do nome do objeto
+    assert storage.get_public_url(f"ingredients/{name}") == f"{storage.public_url_prefix}ingredients/{escaped}"
+
+
+def test_public_urls_are_faster_than_sdk(storage):
+    paths = [f"ingredients/{i}/full.webp" for i in range(1000)]
+    bucket = storage.supabase.storage.from_(storage.bucket_name)
+
+    assert [storage.get_public_url(path) for path in paths] == [bucket.get_public_url(path) for path in paths]
+    # Melhor de 5 rodadas, como o timeit: pausas do gc não entram na comparação
+    local = min(timeit.repeat(lambda: [storage.get_public_url(path) for path in paths], number=1, repeat=5))
+    sdk = min(timeit.repeat(lambda: [bucket.get_public_url(path) for path in paths], number=1, repeat=5))
+
+    assert local < sdk / 2
+
+
+class SigningBucket:
+    """Bucket falso: registra as chamadas a create_signed_urls e assina cada caminho"""
+
+    def __init__(self, fail: set = frozenset()):
+        self.calls = []
+        self.fail = fail
+
+    def create_signed_urls(self, paths, expires_in):
+        self.calls.append(list(paths))
+        return [
+            {"path": path, "error": "Not found", "signedURL": None} if path in self.fail
+            else {"path": path, "error": None, "signedURL": f"signed/{path}?n={len(self.calls)}"}
+            for path in paths
+        ]
+
+
+@pytest.fixture
+def signing(monkeypatch):
+    """StorageService no modo assinado, com o bucket falso; expires_in é ajustável"""
+    services = []
+
+    def make(expires_in: int = 3600, fail: set = frozenset()):
+        monkeypatch.setattr(settings, "STORAGE_SIGNED_URLS", True)
+        monkeypatch.setattr(settings, "STORAGE_SIGNED_URL_EXPIRES_IN", expires_in)
+        service, bucket = StorageService(), SigningBucket(fail)
+        service.supabase = SimpleNamespace(storage=SimpleNamespace(from_=lambda name: bucket))
+        services.append(service)
+        return service, bucket
+
+    yield make
+    for service in services:
+        asyncio.run(service.aclose())
+
+
+def test_signed_urls_are_signed_in_one_call_and_cached(signing):
+    service, bucket = signing()
+    paths = [f"ingredients/{i}.jpg" for i in range(50)]
+
+    first = service.get_image_urls(paths + paths[:5])
+    assert bucket.calls == [paths]
+    assert first == {path: f"signed/{path}?n=1" for path in paths}
+
+    # Só os caminhos novos vão ao Supabase; os já assinados vêm do cache
+    second = service.get_image_urls(paths[:10] + ["ingredients/novo.jpg"])
+    assert bucket.calls[1:] == [["ingredients/novo.jpg"]]
+    assert second["ingredients/0.jpg"] == first["ingredients/0.jpg"]
+    assert service.get_image_url("ingredients/1.jpg") == first["ingredients/1.jpg"]
+    assert len(bucket.calls) == 2
+
+
+def test_signed_urls_are_renewed_before_expiring(signing):
+    service, bucket = signing(expires_in=1)
+
+    url = service.get_image_url("ingredients/0.jpg")
+    time.sleep(0.7)
+    assert service.get_image_url("ingredients/0.jpg") == url
+    # Passados 80% da validade, a URL é assinada de novo
+    time.sleep(0.15)
+    assert service.get_image_url("ingredients/0.jpg") != url
+    assert len(bucket.calls) == 2
+
+
+def test_unsigned_paths_are_left_out_and_not_cached(signing):
+    service, bucket = signing(fail={"ingredients/sumiu.jpg"})
+
+    urls = service.get_image_urls(["ingredients/0.jpg", "ingredients/sumiu.jpg"])
+    assert list(urls) == ["ingredients/0.jpg"]
+    service.get_image_urls(["ingredients/0.jpg", "ingredients/sumiu.jpg"])
+    assert bucket.calls[1:] == [["ingredients/sumiu.jpg"]]
@@ -0,0 +1,123 @@
+"""
+Uploads de imagens em streaming: a memória usada por upload fica limitada
+a poucos blocos (STORAGE_UPLOAD_CHUNK_SIZE), mesmo com muitos uploads
+grandes simultâneos, e arquivos grandes demais são recusados sem serem lidos inteiros.
+"""
+import asyncio
+import io
+import tracemalloc
+
+import httpx
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from src.core.config import settings
+from src.services.storage_service import StorageService
+
+
+JPEG_HEADER = b"\xff\xd8\xff\xe0\x00\x10JFIF\x00"
+UPLOADS = 20
+UPLOAD_BYTES = 4 * 1024 * 1024
+
+
+class GeneratedFile(io.RawIOBase):
+    """Arquivo de `size` bytes gerado sob demanda (o teste não o mantém em memória)"""
+
+    def __init__(self, size: int, header: bytes = JPEG_HEADER):
+        self.size = size
+        self.header = header
+        self.position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0:
+            size = self.size - self.position
+        size = min(size, self.size - self.position)
+        start = self.position
+        self.position += size
+        if start >= len(self.header):
+            return bytes(size)
+        chunk = self.header[start:start + size]
+        return chunk + bytes(size - len(chunk))
+
+
+class StorageSink(httpx.AsyncBaseTransport):
+    """
+    Storage falso: consome cada upload bloco a bloco, sem guardar o conteúdo
+    (o httpx.MockTransport lê a requisição inteira antes de responder)
+    """
+
+    def __init__(self):
+        self.received = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        total = 0
+        async for chunk in request.stream:
+            total += len(chunk)
+            # Cede a vez aos outros uploads, como uma rede real
+            await asyncio.sleep(0)
+        self.received[request.url.path] = total
+        return httpx.Response(200, json={"Key": request.url.path})
+
+
+@pytest.fixture
+def storage():
+    sink = StorageSink()
+    service = StorageService(image_service=None)
+    service.async_http_client = httpx.AsyncClient(transport=sink)
+    yield service, sink
+    asyncio.run(service.aclose())
+
+
+def _upload_file(size: int) -> UploadFile:
+    # Sem `size`: o tamanho é descoberto durante a leitura, como em uploads chunked
+    return UploadFile(file=GeneratedFile(size), filename="foto.jpg")
+
+
+def test_concurrent_uploads_memory_is_bounded_by_chunk_size(storage):
+    service, sink = storage
+
+    async def scenario():
+        files = [_upload_file(UPLOAD_BYTES) for _ in range(UPLOADS)]
+        tracemalloc.start()
+        try:
+            paths = await asyncio.gather(*(service.upload_image(file) for file in files))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return paths, peak
+
+    paths, peak = asyncio.run(scenario())
+
+    assert len(set(paths)) == UPLOADS
+    assert all(path.endswith(".jpg") for path in paths)
+    assert sorted(sink.received.values()) == [UPLOAD_BYTES] * UPLOADS
+    # Bufferizar os arquivos custaria UPLOADS * UPLOAD_BYTES (80 MB);
+    # em streaming, cada upload mantém só alguns blocos em memória
+    assert peak < UPLOADS * settings.STORAGE_UPLOAD_CHUNK_SIZE * 8
+    assert peak < UPLOADS * UPLOAD_BYTES / 10
+
+
+def test_oversized_upload_is_rejected_while_reading(storage):
+    service, sink = storage
+    file = GeneratedFile(settings.STORAGE_UPLOAD_MAX_BYTES * 4)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(service.upload_image(UploadFile(file=file, filename="foto.jpg")))
+
+    assert error.value.status_code == 400
+    # A leitura para no primeiro bloco além do limite
+    assert file.position <= settings.STORAGE_UPLOAD_MAX_BYTES + settings.STORAGE_UPLOAD_CHUNK_SIZE
+
+
+def test_upload_type_is_sniffed_from_content(storage):
+    service, sink = storage
+    file = UploadFile(file=GeneratedFile(1024, header=b"GIF89a"), filename="foto.jpg")
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(service.upload_image(file))
+
+    assert error.value.status_code == 400
+    assert sink.received == {}